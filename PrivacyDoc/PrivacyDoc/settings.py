@@ -19,6 +19,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'corsheaders',
+    'apps.core',
     'apps.documents',
     'apps.analysis',
     'apps.users',
@@ -135,3 +136,60 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+
+# Hash uploads while they stream in so identical PDFs hit the extraction cache
+FILE_UPLOAD_HANDLERS = [
+    'apps.documents.uploadhandlers.HashingMemoryFileUploadHandler',
+    'apps.documents.uploadhandlers.HashingTemporaryFileUploadHandler',
+]
+
+# Document processing settings
+# Worker processes used by batch processing (0 = one per CPU core)
+DOCUMENT_BATCH_WORKERS = config('DOCUMENT_BATCH_WORKERS', default=0, cast=int)
+# Queue uploads for the process_documents worker instead of extracting inline
+DOCUMENT_PROCESSING_ASYNC = config('DOCUMENT_PROCESSING_ASYNC', default=True, cast=bool)
+# Maximum number of pages returned by one page range request
+DOCUMENT_PAGE_RANGE_LIMIT = config('DOCUMENT_PAGE_RANGE_LIMIT', default=50, cast=int)
+# Chunked uploads: largest accepted file and largest single chunk, in bytes
+DOCUMENT_UPLOAD_MAX_SIZE = config('DOCUMENT_UPLOAD_MAX_SIZE', default=1024 * 1024 * 1024, cast=int)
+DOCUMENT_UPLOAD_CHUNK_SIZE = config('DOCUMENT_UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+# Per-document extraction limits; a document that hits one is stored partially.
+# MAX_BYTES bounds the memory of an extraction: its result holds the cleaned
+# text twice (whole and by page), so allow about twice this per worker
+DOCUMENT_EXTRACTION_MAX_PAGES = config('DOCUMENT_EXTRACTION_MAX_PAGES', default=5000, cast=int)
+DOCUMENT_EXTRACTION_MAX_BYTES = config('DOCUMENT_EXTRACTION_MAX_BYTES', default=64 * 1024 * 1024, cast=int)
+DOCUMENT_EXTRACTION_MAX_SECONDS = config('DOCUMENT_EXTRACTION_MAX_SECONDS', default=300, cast=float)
+# Near-duplicate detection: MinHash signature length, LSH bands (must divide the
+# length) and the lowest estimated similarity reported by the similar action
+DOCUMENT_MINHASH_PERMUTATIONS = config('DOCUMENT_MINHASH_PERMUTATIONS', default=128, cast=int)
+DOCUMENT_MINHASH_BANDS = config('DOCUMENT_MINHASH_BANDS', default=16, cast=int)
+DOCUMENT_SIMILARITY_THRESHOLD = config('DOCUMENT_SIMILARITY_THRESHOLD', default=0.8, cast=float)
+# Full-text search backend: 'auto' uses the SQLite FTS5 index where it exists
+# and a LIKE scan elsewhere; 'fts5', 'like' or the dotted path of a SearchBackend
+DOCUMENT_SEARCH_BACKEND = config('DOCUMENT_SEARCH_BACKEND', default='auto')
+
+# NLP settings
+# spaCy pipeline used for analysis; loaded once per process on first use
+SPACY_MODEL = config('SPACY_MODEL', default='en_core_web_sm')
+# Texts per spaCy batch and largest batch accepted by analyze_batch
+ANALYSIS_BATCH_SIZE = config('ANALYSIS_BATCH_SIZE', default=32, cast=int)
+ANALYSIS_BATCH_MAX_ITEMS = config('ANALYSIS_BATCH_MAX_ITEMS', default=1000, cast=int)
+# Characters parsed at a time when summarizing; longer texts are read chunk by chunk
+ANALYSIS_CHUNK_SIZE = config('ANALYSIS_CHUNK_SIZE', default=10000, cast=int)
+# Summary length in sentences, and how they are picked: 'tfidf' ranks every
+# sentence, 'lead' takes the first ones and stops parsing early
+ANALYSIS_SUMMARY_SENTENCES = config('ANALYSIS_SUMMARY_SENTENCES', default=5, cast=int)
+ANALYSIS_SUMMARY_METHOD = config('ANALYSIS_SUMMARY_METHOD', default='tfidf')
+# Seconds between checks of the risk lexicon's version stamp; each worker
+# recompiles its matcher when the RiskTerm table has changed
+ANALYSIS_LEXICON_CHECK_SECONDS = config('ANALYSIS_LEXICON_CHECK_SECONDS', default=5, cast=float)
+# Analysis result cache: in-process LRU budget in bytes, and the database tier
+ANALYSIS_CACHE_MEMORY_BYTES = config('ANALYSIS_CACHE_MEMORY_BYTES', default=32 * 1024 * 1024, cast=int)
+ANALYSIS_CACHE_PERSIST = config('ANALYSIS_CACHE_PERSIST', default=True, cast=bool)
+# N-way comparison: most policies per request, and threads analyzing uncached ones
+ANALYSIS_COMPARE_MAX_POLICIES = config('ANALYSIS_COMPARE_MAX_POLICIES', default=50, cast=int)
+ANALYSIS_COMPARE_WORKERS = config('ANALYSIS_COMPARE_WORKERS', default=4, cast=int)
+# Async analysis endpoints: threads running analysis, and requests allowed to wait
+# for one before new ones are turned away with 429 Too Many Requests
+ANALYSIS_EXECUTOR_WORKERS = config('ANALYSIS_EXECUTOR_WORKERS', default=2, cast=int)
+ANALYSIS_EXECUTOR_QUEUE = config('ANALYSIS_EXECUTOR_QUEUE', default=16, cast=int)
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import RiskTerm
+
+
+@admin.register(RiskTerm)
+class RiskTermAdmin(admin.ModelAdmin):
+    list_display = ('term', 'category', 'weight', 'is_active', 'updated_at')
+    list_filter = ('category', 'is_active')
+    list_editable = ('weight', 'is_active')
+    search_fields = ('term',)
@@ -4,4 +4,10 @@ from django.apps import AppConfig
 class AnalysisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.analysis'
-    verbose_name = 'Analysis' 
\ No newline at end of file
+    verbose_name = 'Analysis'
+
+    def ready(self):
+        try:
+            import apps.analysis.signals  # noqa
+        except ImportError:
+            pass
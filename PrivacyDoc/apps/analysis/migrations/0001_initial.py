@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 16:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('documents', '0009_document_extraction_limit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PolicyAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(verbose_name='document version')),
+                ('analyzer_version', models.CharField(max_length=100, verbose_name='analyzer version')),
+                ('summary', models.JSONField(default=list, verbose_name='summary')),
+                ('risk_score', models.PositiveIntegerField(default=0, verbose_name='risk score')),
+                ('found_risks', models.JSONField(default=list, verbose_name='found risks')),
+                ('risk_matches', models.JSONField(default=dict, verbose_name='risk matches')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analyses', to='documents.document')),
+            ],
+            options={
+                'verbose_name': 'policy analysis',
+                'verbose_name_plural': 'policy analyses',
+                'ordering': ['document', '-version'],
+                'constraints': [models.UniqueConstraint(fields=('document', 'version'), name='unique_analysis_per_document_version')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 16:29
+
+from django.db import migrations, models
+
+DEFAULT_TERMS = [
+    ('third party', 'sharing'),
+    ('share with third parties', 'sharing'),
+    ('sell your data', 'sharing'),
+    ('no encryption', 'security'),
+    ('data retention', 'retention'),
+    ('tracking', 'tracking'),
+    ('personal data', 'collection'),
+    ('consent', 'consent'),
+    ('collect', 'collection'),
+    ('disclose', 'sharing'),
+    ('transfer', 'sharing'),
+]
+
+
+def seed_terms(apps, schema_editor):
+    RiskTerm = apps.get_model('analysis', 'RiskTerm')
+    RiskTerm.objects.bulk_create([
+        RiskTerm(term=term, category=category) for term, category in DEFAULT_TERMS
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=200, unique=True, verbose_name='term')),
+                ('category', models.CharField(blank=True, max_length=50, verbose_name='category')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='weight')),
+                ('synonyms', models.JSONField(blank=True, default=list, verbose_name='synonyms')),
+                ('is_active', models.BooleanField(default=True, verbose_name='active')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'risk term',
+                'verbose_name_plural': 'risk terms',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(seed_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from apps.documents.models import Document
+
+
+class PolicyAnalysis(models.Model):
+    """Stored result of PolicyAnalyzer.analyze for one version of a document."""
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name='analyses'
+    )
+    version = models.PositiveIntegerField(_('document version'))
+    analyzer_version = models.CharField(_('analyzer version'), max_length=100)
+    summary = models.JSONField(_('summary'), default=list)
+    risk_score = models.PositiveIntegerField(_('risk score'), default=0)
+    found_risks = models.JSONField(_('found risks'), default=list)
+    risk_matches = models.JSONField(_('risk matches'), default=dict)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('policy analysis')
+        verbose_name_plural = _('policy analyses')
+        ordering = ['document', '-version']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['document', 'version'],
+                name='unique_analysis_per_document_version'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Analysis of document {self.document_id} v{self.version}"
+
+
+class RiskTerm(models.Model):
+    """A term of the risk lexicon that PolicyAnalyzer looks for in policies."""
+    term = models.CharField(_('term'), max_length=200, unique=True)
+    category = models.CharField(_('category'), max_length=50, blank=True)
+    weight = models.PositiveIntegerField(_('weight'), default=1)
+    synonyms = models.JSONField(_('synonyms'), default=list, blank=True)
+    is_active = models.BooleanField(_('active'), default=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('risk term')
+        verbose_name_plural = _('risk terms')
+        ordering = ['id']
+
+    def __str__(self):
+        return self.term
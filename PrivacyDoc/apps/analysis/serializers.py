@@ -1,14 +1,77 @@
+import os
+from django.conf import settings
 from rest_framework import serializers
+from .models import PolicyAnalysis
 
 
 class PolicyAnalysisSerializer(serializers.Serializer):
-    policy_text = serializers.CharField(required=True)
+    policy_text = serializers.CharField(required=False)
+    document_id = serializers.IntegerField(required=False)
+    start_page = serializers.IntegerField(required=False, min_value=1)
+    end_page = serializers.IntegerField(required=False, min_value=1)
+    summary_sentences = serializers.IntegerField(required=False, min_value=1, max_value=50)
     summary = serializers.ListField(child=serializers.CharField(), required=False)
     risk_score = serializers.IntegerField(required=False)
     found_risks = serializers.ListField(child=serializers.CharField(), required=False)
 
+    def validate(self, data):
+        if not data.get('policy_text') and data.get('document_id') is None:
+            raise serializers.ValidationError('Provide policy_text or document_id')
+        return data
+
+
+class PolicyBatchAnalysisSerializer(serializers.Serializer):
+    texts = serializers.ListField(
+        child=serializers.CharField(allow_blank=True, trim_whitespace=False),
+        required=False
+    )
+    document_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    batch_size = serializers.IntegerField(required=False, min_value=1, max_value=1000)
+    n_process = serializers.IntegerField(required=False, min_value=1, default=1)
+
+    def validate_n_process(self, value):
+        if value > (os.cpu_count() or 1):
+            raise serializers.ValidationError('n_process must not exceed the number of CPU cores')
+        return value
+
+    def validate(self, data):
+        count = len(data.get('texts', [])) + len(data.get('document_ids', []))
+        if not count:
+            raise serializers.ValidationError('Provide texts or document_ids')
+        max_items = getattr(settings, 'ANALYSIS_BATCH_MAX_ITEMS', 1000)
+        if count > max_items:
+            raise serializers.ValidationError(f'A batch may contain at most {max_items} items')
+        return data
+
 
 class PolicyComparisonSerializer(serializers.Serializer):
     policy_text_1 = serializers.CharField(required=True)
     policy_text_2 = serializers.CharField(required=True)
-    comparison = serializers.DictField(required=False) 
\ No newline at end of file
+    comparison = serializers.DictField(required=False)
+
+
+class PolicyMultiComparisonSerializer(serializers.Serializer):
+    texts = serializers.ListField(child=serializers.CharField(), required=False)
+    labels = serializers.ListField(child=serializers.CharField(), required=False)
+    document_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate(self, data):
+        count = len(data.get('texts', [])) + len(data.get('document_ids', []))
+        if count < 2:
+            raise serializers.ValidationError('Provide at least two policies to compare')
+        max_policies = getattr(settings, 'ANALYSIS_COMPARE_MAX_POLICIES', 50)
+        if count > max_policies:
+            raise serializers.ValidationError(f'At most {max_policies} policies can be compared at once')
+        if 'labels' in data and len(data['labels']) != len(data.get('texts', [])):
+            raise serializers.ValidationError('Provide one label per text')
+        return data
+
+
+class DocumentAnalysisSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PolicyAnalysis
+        fields = [
+            'id', 'document', 'version', 'analyzer_version', 'summary',
+            'risk_score', 'found_risks', 'risk_matches', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
@@ -1,18 +1,442 @@
-import spacy
-from typing import List, Tuple, Dict
+import asyncio
+import hashlib
+import json
+import math
+import operator
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+from itertools import islice
+from typing import Iterator, List, Tuple, Dict, Optional, Sequence
+import numpy as np
 from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.db.models import Count, Exists, Max, OuterRef
+from apps.core.cache import TwoTierCache
+from utils.clause_diff import diff_clauses, split_clauses
+from utils.risk_matcher import RiskMatcher
+from utils.spacy_models import DEFAULT_MODEL, get_nlp, iter_sentences
+from utils.summarizer import TfidfSummarizer
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies of a policy share cache entries."""
+    return ' '.join(text.split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+# Used when the RiskTerm table cannot be read, e.g. before migrations ran
+DEFAULT_RISKY_TERMS = [
+    "third party", "share with third parties", "sell your data",
+    "no encryption", "data retention", "tracking", "personal data",
+    "consent", "collect", "disclose", "transfer"
+]
+
+
+class RiskLexicon:
+    """
+    Immutable snapshot of the risk lexicon with its compiled matcher.
+
+    Args:
+        terms (List[str]): Terms in matching and reporting order
+        weights (Optional[Dict[str, int]]): Risk score of each term; 1 if missing
+        categories (Optional[Dict[str, str]]): Category of each term
+        synonyms (Optional[Dict[str, List[str]]]): Other spellings reported
+            as the term
+        stamp (Optional[str]): Version stamp of the table it was loaded from
+    """
+
+    def __init__(self, terms: List[str], weights: Optional[Dict[str, int]] = None,
+                 categories: Optional[Dict[str, str]] = None,
+                 synonyms: Optional[Dict[str, List[str]]] = None,
+                 stamp: Optional[str] = None):
+        self.matcher = RiskMatcher(terms, synonyms)
+        self.terms = self.matcher.terms
+        self.weights = {term.lower(): weight for term, weight in (weights or {}).items()}
+        self.categories = {term.lower(): category for term, category in (categories or {}).items()}
+        self.synonyms = {term.lower(): list(others) for term, others in (synonyms or {}).items()}
+        self.stamp = stamp
+        # Identifies what the lexicon matches and how it scores, for cache keys
+        self.version = text_hash(json.dumps(
+            [[term, self.weights.get(term, 1), self.synonyms.get(term, [])] for term in self.terms]
+        ))
+
+    @classmethod
+    def load(cls, stamp: Optional[str] = None) -> 'RiskLexicon':
+        """Build a lexicon from the active RiskTerm rows."""
+        from .models import RiskTerm
+        rows = list(RiskTerm.objects.filter(is_active=True).values_list(
+            'term', 'weight', 'category', 'synonyms'
+        ))
+        return cls(
+            [term for term, _, _, _ in rows],
+            weights={term: weight for term, weight, _, _ in rows},
+            categories={term: category for term, _, category, _ in rows if category},
+            synonyms={term: synonyms for term, _, _, synonyms in rows if synonyms},
+            stamp=stamp
+        )
+
+    def score(self, terms) -> int:
+        """Sum of the weights of the given terms."""
+        return sum(self.weights.get(term, 1) for term in terms)
+
+    def describe(self) -> List[Dict]:
+        return [
+            {
+                'term': term,
+                'weight': self.weights.get(term, 1),
+                'category': self.categories.get(term, ''),
+                'synonyms': self.synonyms.get(term, []),
+            }
+            for term in self.terms
+        ]
+
+
+class LexiconCache:
+    """
+    Process-wide holder of the compiled RiskLexicon.
+
+    The matcher is compiled once and reused until the version stamp of the
+    RiskTerm table changes. The stamp is a single aggregate query, made at
+    most every ``check_interval`` seconds, so a change made through any
+    worker is picked up by all of them without reloading the spaCy model.
+    Saving or deleting a RiskTerm in this process forces a check on the
+    next use. Bulk ``QuerySet.update`` calls must set ``updated_at`` for
+    the change to show in the stamp.
+
+    Args:
+        check_interval (Optional[float]): Seconds between stamp checks
+    """
+
+    def __init__(self, check_interval: Optional[float] = None):
+        if check_interval is None:
+            check_interval = getattr(settings, 'ANALYSIS_LEXICON_CHECK_SECONDS', 5)
+        self.check_interval = check_interval
+        self._lexicon = None
+        self._checked = None
+        self._compiles = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stamp() -> str:
+        """Version stamp of the RiskTerm table: row count and latest change."""
+        from .models import RiskTerm
+        stamp = RiskTerm.objects.aggregate(count=Count('id'), changed=Max('updated_at'))
+        changed = stamp['changed'].isoformat() if stamp['changed'] else ''
+        return f"{stamp['count']}-{changed}"
+
+    def get(self) -> RiskLexicon:
+        """The current lexicon, recompiled if the table changed since it was built."""
+        with self._lock:
+            now = time.monotonic()
+            if self._checked is not None and now - self._checked < self.check_interval:
+                return self._lexicon
+            try:
+                stamp = self.stamp()
+                if self._lexicon is None or stamp != self._lexicon.stamp:
+                    self._lexicon = RiskLexicon.load(stamp)
+                    self._compiles += 1
+            except DatabaseError:
+                if self._lexicon is None:
+                    return RiskLexicon(DEFAULT_RISKY_TERMS)
+            self._checked = now
+            return self._lexicon
+
+    def expire(self):
+        """Check the stamp again on the next get."""
+        with self._lock:
+            self._checked = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._lexicon.terms) if self._lexicon else 0,
+                'version': self._lexicon.version if self._lexicon else None,
+                'stamp': self._lexicon.stamp if self._lexicon else None,
+                'compiles': self._compiles,
+                'check_interval': self.check_interval,
+            }
+
+
+_lexicon_cache = None
+_lexicon_cache_lock = threading.Lock()
+
+
+def get_lexicon_cache() -> LexiconCache:
+    """The process-wide LexiconCache, created on first use."""
+    global _lexicon_cache
+    with _lexicon_cache_lock:
+        if _lexicon_cache is None:
+            _lexicon_cache = LexiconCache()
+        return _lexicon_cache
 
 
 class PolicyAnalyzer:
     """Service class for analyzing privacy policies."""
 
-    def __init__(self):
-        self.nlp = spacy.load("en_core_web_sm")
-        self.risky_terms = [
-            "third party", "share with third parties", "sell your data",
-            "no encryption", "data retention", "tracking", "personal data",
-            "consent", "collect", "disclose", "transfer"
-        ]
+    # Bump whenever the structure or meaning of analysis results changes
+    VERSION = '2'
+    # 'tfidf' ranks all sentences with TfidfSummarizer; 'lead' takes the first ones
+    SUMMARY_METHODS = ('tfidf', 'lead')
+
+    def __init__(self, model_name: Optional[str] = None, use_cache: bool = True,
+                 chunk_size: Optional[int] = None, summary_sentences: Optional[int] = None,
+                 summary_method: Optional[str] = None, lexicon: Optional[RiskLexicon] = None):
+        self.model_name = model_name or getattr(settings, 'SPACY_MODEL', DEFAULT_MODEL)
+        self.use_cache = use_cache
+        self.chunk_size = chunk_size or getattr(settings, 'ANALYSIS_CHUNK_SIZE', 10000)
+        self.summary_sentences = summary_sentences or getattr(settings, 'ANALYSIS_SUMMARY_SENTENCES', 5)
+        self.summary_method = summary_method or getattr(settings, 'ANALYSIS_SUMMARY_METHOD', 'tfidf')
+        if self.summary_method not in self.SUMMARY_METHODS:
+            raise ValueError(f'Unknown summary method: {self.summary_method}')
+        self._lexicon = lexicon
+        self.summarizer = TfidfSummarizer()
+
+    @property
+    def lexicon(self) -> RiskLexicon:
+        """The lexicon given to the analyzer, or else the current one from the RiskTerm table."""
+        return self._lexicon or get_lexicon_cache().get()
+
+    @property
+    def risky_terms(self) -> List[str]:
+        return self.lexicon.terms
+
+    @property
+    def risk_matcher(self) -> RiskMatcher:
+        return self.lexicon.matcher
+
+    @property
+    def nlp(self):
+        """The process-wide spaCy pipeline, loaded on first use."""
+        return get_nlp(self.model_name)
+
+    @property
+    def cache_version(self) -> str:
+        """Identifies the analyzer, model, summary settings and risk lexicon that produce a result."""
+        return self.cache_version_for(self.lexicon)
+
+    def cache_version_for(self, lexicon: RiskLexicon) -> str:
+        """cache_version for results produced with a given lexicon snapshot."""
+        nlp = self.nlp
+        meta = nlp.meta
+        model = text_hash(
+            f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}|{','.join(nlp.pipe_names)}"
+        )
+        summary = f"{self.summary_method}{self.summary_sentences}"
+        return f"{self.VERSION}-{model[:16]}-{summary}-{lexicon.version[:16]}"
+
+    @property
+    def cache(self) -> TwoTierCache:
+        """
+        Result cache for the current model and lexicon.
+
+        Built on every access, so a change to the lexicon takes effect at once.
+        """
+        return self._cache(self.lexicon)
+
+    def _cache(self, lexicon: RiskLexicon) -> TwoTierCache:
+        return TwoTierCache(
+            'analysis',
+            version=self.cache_version_for(lexicon),
+            max_bytes=getattr(settings, 'ANALYSIS_CACHE_MEMORY_BYTES', 32 * 1024 * 1024),
+            persist=getattr(settings, 'ANALYSIS_CACHE_PERSIST', True)
+        )
+
+    def analyze(self, text: str, lexicon: Optional[RiskLexicon] = None) -> Dict:
+        """
+        Analyze a privacy policy text.
+
+        Args:
+            text (str): The privacy policy text to analyze
+            lexicon (Optional[RiskLexicon]): Lexicon snapshot to use; by
+                default the current one is taken once for the whole call
+
+        Results are cached by the hash of the whitespace-normalized text.
+        Only as much of the text is parsed as the summary needs; risky terms
+        are matched over all of it.
+
+        Returns:
+            Dict: ``summary`` sentences, ``risk_score`` (sum of the weights of
+            the distinct risky terms found), ``found_risks`` and ``risk_matches``
+        """
+        lexicon = lexicon or self.lexicon
+        if not self.use_cache:
+            return self._result(self.summarize(text, lexicon), text, lexicon)
+        cache = self._cache(lexicon)
+        key = cache.key(normalize_text(text))
+        cached = cache.get(key)
+        if cached is not None:
+            return self._from_cache(cached, text, lexicon)
+        result = self._result(self.summarize(text, lexicon), text, lexicon)
+        cache.set(key, {**result, 'text_sha256': text_hash(text)})
+        return result
+
+    def analyze_many(self, texts: Sequence[Optional[str]], batch_size: Optional[int] = None,
+                     n_process: int = 1, lexicon: Optional[RiskLexicon] = None) -> List[Dict]:
+        """
+        Analyze many policy texts, streaming them through ``nlp.pipe``.
+
+        Cached results are looked up for the whole batch at once; only the
+        misses go through the pipeline. Texts longer than ``chunk_size`` are
+        summarized chunk by chunk instead, like in analyze.
+
+        Args:
+            texts (Sequence[Optional[str]]): Texts to analyze; None marks an
+                item that could not be loaded
+            batch_size (Optional[int]): Texts per spaCy batch
+            n_process (int): Processes spaCy may use
+            lexicon (Optional[RiskLexicon]): Lexicon snapshot to use for every text
+
+        Returns:
+            List[Dict]: One result per text, in input order. Items that fail
+            get ``{'error': message}`` instead of an analysis.
+        """
+        results = [None] * len(texts)
+        for index, result in self.iter_analyze_many(texts, batch_size, n_process, lexicon):
+            results[index] = result
+        return results
+
+    def iter_analyze_many(self, texts: Sequence[Optional[str]], batch_size: Optional[int] = None,
+                          n_process: int = 1,
+                          lexicon: Optional[RiskLexicon] = None) -> Iterator[Tuple[int, Dict]]:
+        """
+        Analyze many policy texts, yielding each result as soon as it is ready.
+
+        Invalid items and cache hits come first, then the pipeline results in
+        input order, then the long texts. New results are written to the
+        cache once per ``batch_size`` items, so a client that stops reading
+        keeps what was already analyzed. The lexicon is taken once, so every
+        result comes from the same snapshot even if the table changes midway.
+
+        Args:
+            texts (Sequence[Optional[str]]): Texts to analyze; None marks an
+                item that could not be loaded
+            batch_size (Optional[int]): Texts per spaCy batch
+            n_process (int): Processes spaCy may use
+            lexicon (Optional[RiskLexicon]): Lexicon snapshot to use for every text
+
+        Yields:
+            Tuple[int, Dict]: Index of the text and its result, as in
+            analyze_many
+        """
+        if batch_size is None:
+            batch_size = getattr(settings, 'ANALYSIS_BATCH_SIZE', 32)
+        lexicon = lexicon or self.lexicon
+        nlp = self.nlp
+        valid = []
+        for index, text in enumerate(texts):
+            if not isinstance(text, str) or not text.strip():
+                yield index, {'error': 'No text to analyze'}
+            else:
+                valid.append(index)
+
+        keys = {}
+        if self.use_cache and valid:
+            cache = self._cache(lexicon)
+            keys = {index: cache.key(normalize_text(texts[index])) for index in valid}
+            cached = cache.get_many(keys.values())
+            misses = []
+            for index in valid:
+                if keys[index] in cached:
+                    yield index, self._from_cache(cached[keys[index]], texts[index], lexicon)
+                else:
+                    misses.append(index)
+            valid = misses
+
+        done = set()
+        unsaved = {}
+
+        def finish(index, result):
+            done.add(index)
+            if keys and 'error' not in result:
+                unsaved[keys[index]] = {**result, 'text_sha256': text_hash(texts[index])}
+                if len(unsaved) >= batch_size:
+                    cache.set_many(unsaved)
+                    unsaved.clear()
+            return index, result
+
+        short = [index for index in valid if len(texts[index]) <= self.chunk_size]
+        try:
+            docs = nlp.pipe(
+                (texts[index] for index in short),
+                batch_size=batch_size,
+                n_process=n_process
+            )
+            for index, doc in zip(short, docs):
+                yield finish(index, self._result(
+                    self._pick_sentences([sent.text for sent in doc.sents], lexicon),
+                    texts[index], lexicon
+                ))
+            for index in valid:
+                if index not in done:
+                    yield finish(index, self._result(
+                        self.summarize(texts[index], lexicon), texts[index], lexicon
+                    ))
+        except Exception:
+            # A failure aborts the whole pipe; redo the rest one by one so
+            # only the offending items are reported as errors.
+            for index in valid:
+                if index not in done:
+                    try:
+                        yield finish(index, self.analyze(texts[index], lexicon))
+                    except Exception as e:
+                        yield finish(index, {'error': str(e)})
+        if unsaved:
+            cache.set_many(unsaved)
+
+    def _from_cache(self, cached: Dict, text: str, lexicon: RiskLexicon) -> Dict:
+        result = dict(cached)
+        if result.pop('text_sha256') != text_hash(text):
+            # Same policy with different whitespace: the summary still
+            # applies, but offsets have to come from this copy of the text.
+            risk_matches = self.match_risks(text, lexicon)
+            result.update(
+                risk_score=lexicon.score(risk_matches),
+                found_risks=list(risk_matches),
+                risk_matches=risk_matches
+            )
+        return result
+
+    def summarize(self, text: str, lexicon: Optional[RiskLexicon] = None) -> List[str]:
+        """
+        Pick the summary sentences of a text.
+
+        The text is parsed ``chunk_size`` characters at a time, so it may
+        exceed the model's max_length. With the 'lead' method parsing stops
+        once the first ``summary_sentences`` sentences are found; 'tfidf'
+        segments the whole text and keeps the best-ranked sentences in
+        document order.
+
+        Args:
+            text (str): Policy text
+            lexicon (Optional[RiskLexicon]): Lexicon whose terms favour
+                sentences; defaults to the current one
+
+        Returns:
+            List[str]: Summary sentences
+        """
+        sentences = iter_sentences(self.nlp, text, self.chunk_size)
+        if self.summary_method == 'lead':
+            return list(islice(sentences, self.summary_sentences))
+        return self._pick_sentences(list(sentences), lexicon or self.lexicon)
+
+    def _pick_sentences(self, sentences: List[str], lexicon: RiskLexicon) -> List[str]:
+        if self.summary_method == 'lead':
+            return sentences[:self.summary_sentences]
+        return self.summarizer.summarize(sentences, self.summary_sentences, lexicon.matcher)
+
+    def _result(self, sentences: List[str], text: str, lexicon: RiskLexicon) -> Dict:
+        risk_matches = self.match_risks(text, lexicon)
+        return {
+            'summary': sentences,
+            'risk_score': lexicon.score(risk_matches),
+            'found_risks': list(risk_matches),
+            'risk_matches': risk_matches
+        }
 
     def analyze_policy(self, text: str) -> Tuple[List[str], int, List[str]]:
         """
@@ -24,21 +448,43 @@ class PolicyAnalyzer:
         Returns:
             Tuple[List[str], int, List[str]]: Summary sentences, risk score, and found risks
         """
-        doc = self.nlp(text)
-        
-        # Extract summary sentences
-        sentences = [sent.text for sent in doc.sents][:5]
-        
-        # Calculate risk score
-        risk_score = 0
-        found_risks = []
+        result = self.analyze(text)
+        return result['summary'], result['risk_score'], result['found_risks']
+
+    def match_risks(self, text: str, lexicon: Optional[RiskLexicon] = None) -> Dict[str, Dict]:
+        """
+        Find every occurrence of the risky terms in one pass over the text.
+
+        Args:
+            text (str): Text to search
+            lexicon (Optional[RiskLexicon]): Lexicon to match; defaults to
+                the current one
+
+        Returns:
+            Dict[str, Dict]: ``count`` and character ``offsets`` (start, end)
+            of each risky term found, in the order of risky_terms
+        """
+        return {
+            term: {'count': len(offsets), 'offsets': [list(offset) for offset in offsets]}
+            for term, offsets in (lexicon or self.lexicon).matcher.match(text).items()
+        }
+
+    def analyze_pages(self, document, start: Optional[int] = None,
+                      end: Optional[int] = None) -> Dict:
+        """
+        Analyze a range of pages of a processed document.
 
-        for term in self.risky_terms:
-            if term.lower() in text.lower():
-                risk_score += 1
-                found_risks.append(term)
+        Only the requested pages are read from the database.
 
-        return sentences, risk_score, found_risks
+        Args:
+            document (Document): Processed document
+            start (Optional[int]): First page (1-based, inclusive)
+            end (Optional[int]): Last page (1-based, inclusive)
+
+        Returns:
+            Dict: Same as analyze
+        """
+        return self.analyze(document.get_page_text(start, end))
 
     def compare_policies(self, policy1: str, policy2: str) -> Dict:
         """
@@ -71,4 +517,438 @@ class PolicyAnalyzer:
                 'unique_risks_policy1': list(set(risks1) - set(risks2)),
                 'unique_risks_policy2': list(set(risks2) - set(risks1))
             }
-        } 
\ No newline at end of file
+        }
+
+    def analyze_concurrently(self, texts: Sequence[str], max_workers: Optional[int] = None,
+                             lexicon: Optional[RiskLexicon] = None) -> List[Dict]:
+        """
+        Analyze several texts at once, reusing cached analyses.
+
+        The cache is queried once for all texts. The misses are analyzed on
+        a thread pool and written back with one cache write; identical
+        texts are only analyzed once. The lexicon is taken before the pool
+        starts, so the worker threads never query the database.
+
+        Args:
+            texts (Sequence[str]): Policy texts
+            max_workers (Optional[int]): Threads analyzing cache misses
+            lexicon (Optional[RiskLexicon]): Lexicon snapshot to use for every text
+
+        Returns:
+            List[Dict]: One analysis per text, in input order, as from analyze
+        """
+        if max_workers is None:
+            max_workers = getattr(settings, 'ANALYSIS_COMPARE_WORKERS', 4)
+        lexicon = lexicon or self.lexicon
+        keys = [normalize_text(text) for text in texts]
+        # Results in their cached form, carrying the hash of the text they came from
+        results = {}
+        cache = self._cache(lexicon) if self.use_cache else None
+        if cache is not None:
+            cache_keys = {key: cache.key(key) for key in keys}
+            cached = cache.get_many(cache_keys.values())
+            results = {key: cached[cache_keys[key]] for key in keys if cache_keys[key] in cached}
+
+        misses = {}
+        for key, text in zip(keys, texts):
+            if key not in results:
+                misses.setdefault(key, text)
+        if misses:
+            workers = max(1, min(max_workers, len(misses)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                analyzed = list(executor.map(
+                    lambda text: {
+                        **self._result(self.summarize(text, lexicon), text, lexicon),
+                        'text_sha256': text_hash(text)
+                    },
+                    misses.values()
+                ))
+            results.update(zip(misses, analyzed))
+            if cache is not None:
+                cache.set_many({cache_keys[key]: results[key] for key in misses})
+        return [self._from_cache(results[key], text, lexicon) for key, text in zip(keys, texts)]
+
+    def compare_many(self, texts: Sequence[str], labels: Optional[Sequence[str]] = None) -> Dict:
+        """
+        Compare any number of policies with each other.
+
+        Each policy's risky terms are held as a bitmask over ``risk_matcher.terms``
+        and as a row of a presence matrix; pairwise results come from numpy
+        matrix operations on that matrix rather than from loops over pairs.
+
+        Args:
+            texts (Sequence[str]): Policy texts
+            labels (Optional[Sequence[str]]): Name of each policy; defaults
+                to "Policy 1", "Policy 2", ...
+
+        Returns:
+            Dict: ``policies`` (label, summary, risk score, risks and risk
+            mask of each), ``terms``, the pairwise ``risk_difference`` (row
+            minus column), ``common_risks`` and ``similarity`` (Jaccard index
+            of the risk sets) matrices, ``term_presence`` (indices of the
+            policies containing each term), and the terms ``shared_by_all``
+            and ``found_in_any`` policy
+        """
+        labels = list(labels or [f'Policy {number}' for number in range(1, len(texts) + 1)])
+        lexicon = self.lexicon
+        analyses = self.analyze_concurrently(texts, lexicon=lexicon)
+        terms = lexicon.matcher.terms
+        columns = {term: index for index, term in enumerate(terms)}
+        masks = [
+            sum(1 << columns[term] for term in analysis['found_risks'])
+            for analysis in analyses
+        ]
+        presence = np.zeros((len(texts), len(terms)), dtype=np.int32)
+        rows, cols = [], []
+        for row, analysis in enumerate(analyses):
+            for term in analysis['found_risks']:
+                rows.append(row)
+                cols.append(columns[term])
+        presence[rows, cols] = 1
+
+        scores = presence.sum(axis=1)
+        risk_scores = np.array([analysis['risk_score'] for analysis in analyses], dtype=np.int64)
+        common = presence @ presence.T
+        union = scores[:, None] + scores[None, :] - common
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity = np.where(union > 0, common / union, 1.0)
+        shared = reduce(operator.and_, masks) if masks else 0
+        found = reduce(operator.or_, masks, 0)
+        return {
+            'policies': [
+                {
+                    'index': index,
+                    'label': label,
+                    'summary': analysis['summary'],
+                    'risk_score': analysis['risk_score'],
+                    'risks': analysis['found_risks'],
+                    'risk_mask': mask,
+                }
+                for index, (label, analysis, mask) in enumerate(zip(labels, analyses, masks))
+            ],
+            'terms': terms,
+            'risk_difference': (risk_scores[:, None] - risk_scores[None, :]).tolist(),
+            'common_risks': common.tolist(),
+            'similarity': np.round(similarity, 4).tolist(),
+            'term_presence': {
+                term: np.flatnonzero(presence[:, index]).tolist()
+                for index, term in enumerate(terms)
+            },
+            'shared_by_all': [term for term in terms if shared >> columns[term] & 1],
+            'found_in_any': [term for term in terms if found >> columns[term] & 1],
+        }
+
+
+class DocumentAnalysisService:
+    """Service class for the stored analyses of processed documents."""
+
+    def __init__(self, analyzer: Optional[PolicyAnalyzer] = None):
+        self.analyzer = analyzer or PolicyAnalyzer()
+
+    def analyze_documents(self, documents) -> List:
+        """
+        Analyze the current version of documents and store the results.
+
+        All texts go through the analyzer in one batch and the results are
+        written with one upsert, replacing any earlier analysis of the same
+        version. Documents without text or whose analysis fails are skipped.
+
+        Args:
+            documents (Iterable[Document]): Processed documents
+
+        Returns:
+            List[PolicyAnalysis]: The stored analyses
+        """
+        from .models import PolicyAnalysis
+
+        documents = [
+            document for document in documents
+            if document.is_processed and document.processed_text
+        ]
+        if not documents:
+            return []
+        lexicon = self.analyzer.lexicon
+        results = self.analyzer.analyze_many(
+            [document.processed_text for document in documents], lexicon=lexicon
+        )
+        analyzer_version = self.analyzer.cache_version_for(lexicon)
+        analyses = [
+            PolicyAnalysis(
+                document=document,
+                version=document.version,
+                analyzer_version=analyzer_version,
+                summary=result['summary'],
+                risk_score=result['risk_score'],
+                found_risks=result['found_risks'],
+                risk_matches=result['risk_matches']
+            )
+            for document, result in zip(documents, results)
+            if 'error' not in result
+        ]
+        if analyses:
+            PolicyAnalysis.objects.bulk_create(
+                analyses,
+                update_conflicts=True,
+                unique_fields=['document', 'version'],
+                update_fields=[
+                    'analyzer_version', 'summary', 'risk_score',
+                    'found_risks', 'risk_matches', 'updated_at'
+                ]
+            )
+        return analyses
+
+    def analyze_pending(self, batch_size: Optional[int] = None) -> int:
+        """
+        Analyze the processed documents whose current version has no stored analysis.
+
+        Jobs analyze their document as they finish; this picks up text that
+        was stored outside a job, by extraction cache hits at upload and by
+        batch processing, so that analysis also runs on the worker.
+
+        Args:
+            batch_size (Optional[int]): Documents analyzed per batch
+
+        Returns:
+            int: Number of analyses stored
+        """
+        from apps.documents.models import Document
+        from .models import PolicyAnalysis
+
+        if batch_size is None:
+            batch_size = getattr(settings, 'ANALYSIS_BATCH_SIZE', 32)
+        stored = PolicyAnalysis.objects.filter(
+            document=OuterRef('pk'), version=OuterRef('version')
+        )
+        pending = list(
+            Document.objects.filter(is_processed=True, is_archived=False)
+            .exclude(processed_text='')
+            .exclude(Exists(stored))
+            .values_list('pk', flat=True)
+        )
+        analyzed = 0
+        for start in range(0, len(pending), batch_size):
+            analyzed += len(self.analyze_documents(
+                Document.objects.filter(pk__in=pending[start:start + batch_size])
+            ))
+        return analyzed
+
+    def get_analysis(self, document):
+        """
+        Return the stored analysis of a document's current version.
+
+        The analysis is computed and stored on the spot when it is missing or
+        was produced by a different analyzer, model or risk lexicon.
+
+        Args:
+            document (Document): Processed document
+
+        Returns:
+            Optional[PolicyAnalysis]: The analysis, or None if the document
+            has no text to analyze
+        """
+        analysis = document.analyses.filter(version=document.version).first()
+        if analysis is not None and analysis.analyzer_version == self.analyzer.cache_version:
+            return analysis
+        self.analyze_documents([document])
+        return document.analyses.filter(version=document.version).first()
+
+
+class VersionDiffService:
+    """Service class for clause-level differences between document versions."""
+
+    # Bump whenever the structure or meaning of diffs changes
+    VERSION = '1'
+
+    def __init__(self, analyzer: Optional[PolicyAnalyzer] = None):
+        self.analyzer = analyzer or PolicyAnalyzer()
+
+    @property
+    def cache(self) -> TwoTierCache:
+        """Diff cache for the current diff algorithm and risk lexicon."""
+        return self._cache(self.analyzer.lexicon)
+
+    def _cache(self, lexicon: RiskLexicon) -> TwoTierCache:
+        return TwoTierCache(
+            'version_diff',
+            version=f"{self.VERSION}-{lexicon.version[:16]}",
+            max_bytes=getattr(settings, 'ANALYSIS_CACHE_MEMORY_BYTES', 32 * 1024 * 1024),
+            persist=getattr(settings, 'ANALYSIS_CACHE_PERSIST', True)
+        )
+
+    def diff(self, old, new) -> Dict:
+        """
+        Compare the clauses of two versions of a document.
+
+        Diffs are cached by the hashes of both texts, so every pair of
+        versions is only aligned once.
+
+        Args:
+            old (Document): Earlier version
+            new (Document): Later version
+
+        Returns:
+            Dict: ``from_version`` and ``to_version``, counts of ``unchanged``,
+            ``added``, ``removed`` and ``changed`` clauses, the ``changes``
+            (see diff_texts) and the ``risks`` added and removed overall
+        """
+        lexicon = self.analyzer.lexicon
+        cache = self._cache(lexicon)
+        result = cache.get_or_set(
+            cache.key(text_hash(old.processed_text), text_hash(new.processed_text)),
+            lambda: self.diff_texts(old.processed_text, new.processed_text, lexicon)
+        )
+        return {'from_version': old.version, 'to_version': new.version, **result}
+
+    def diff_texts(self, old_text: str, new_text: str,
+                   lexicon: Optional[RiskLexicon] = None) -> Dict:
+        """
+        Compare the clauses of two policy texts.
+
+        Args:
+            old_text (str): Earlier text
+            new_text (str): Later text
+            lexicon (Optional[RiskLexicon]): Lexicon snapshot to use; defaults
+                to the analyzer's current one
+
+        Returns:
+            Dict: Clause counts, the ``changes`` from utils.clause_diff with
+            the risky terms each change adds and removes, and the overall
+            ``risks`` (terms ``added`` and ``removed`` and per-term
+            ``counts`` that changed)
+        """
+        old = split_clauses(old_text)
+        new = split_clauses(new_text)
+        changes = diff_clauses(old, new)
+        lexicon = lexicon or self.analyzer.lexicon
+        matcher = lexicon.matcher
+        for change in changes:
+            before = matcher.find_terms(change['old']) if change['old'] else []
+            after = matcher.find_terms(change['new']) if change['new'] else []
+            change['risks_added'] = [term for term in after if term not in before]
+            change['risks_removed'] = [term for term in before if term not in after]
+
+        # One matcher pass per text; a full analysis would also segment and
+        # summarize both versions whenever the analysis cache misses.
+        old_counts, new_counts = (
+            {term: match['count'] for term, match in self.analyzer.match_risks(text, lexicon).items()}
+            for text in (old_text, new_text)
+        )
+        stats = {'added': 0, 'removed': 0, 'changed': 0}
+        for change in changes:
+            stats[change['type']] += 1
+        return {
+            'unchanged': len(old) - stats['removed'] - stats['changed'],
+            **stats,
+            'changes': changes,
+            'risks': {
+                'added': [term for term in new_counts if term not in old_counts],
+                'removed': [term for term in old_counts if term not in new_counts],
+                'counts': {
+                    term: {'from': old_counts.get(term, 0), 'to': new_counts.get(term, 0)}
+                    for term in matcher.terms
+                    if old_counts.get(term, 0) != new_counts.get(term, 0)
+                },
+            },
+        }
+
+
+class ExecutorBusy(Exception):
+    """Raised when the analysis executor has no room for another task."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f'Analysis queue is full; retry in {retry_after} s')
+        self.retry_after = retry_after
+
+
+class AnalysisExecutor:
+    """
+    Bounded thread pool that runs analysis off the event loop.
+
+    At most ``max_workers`` tasks run at once and at most ``max_queue``
+    more wait for a thread; beyond that ``run`` fails fast with
+    ExecutorBusy instead of letting requests pile up. Threads rather than
+    processes are used so every task shares the process's loaded spaCy
+    pipeline and in-memory caches.
+
+    Args:
+        max_workers (Optional[int]): Tasks run concurrently
+        max_queue (Optional[int]): Tasks allowed to wait for a thread
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.max_workers = max_workers or getattr(settings, 'ANALYSIS_EXECUTOR_WORKERS', 2)
+        if max_queue is None:
+            max_queue = getattr(settings, 'ANALYSIS_EXECUTOR_QUEUE', 16)
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='analysis')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+        # Moving average of task durations, used to estimate Retry-After
+        self._average = 1.0
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up."""
+        with self._lock:
+            waiting = max(self._pending - self.max_workers, 0) + 1
+            return max(1, math.ceil(self._average * waiting / self.max_workers))
+
+    async def run(self, function, *args):
+        """
+        Run a function on the pool and wait for its result.
+
+        Raises:
+            ExecutorBusy: If every worker is busy and the queue is full
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                busy = True
+            else:
+                self._pending += 1
+                busy = False
+        if busy:
+            raise ExecutorBusy(self.retry_after())
+        future = self._executor.submit(self._call, function, args)
+        # Release the slot when the task finishes or is cancelled before it
+        # starts, not when the caller stops waiting.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def _call(self, function, args):
+        close_old_connections()
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._average = 0.8 * self._average + 0.2 * elapsed
+            close_old_connections()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'pending': self._pending,
+                'rejected': self._rejected,
+                'average_seconds': round(self._average, 4),
+            }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> AnalysisExecutor:
+    """The process-wide AnalysisExecutor, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = AnalysisExecutor()
+        return _executor
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.documents.signals import document_processed
+from .models import RiskTerm
+from .services import DocumentAnalysisService, get_lexicon_cache
+
+
+@receiver(document_processed)
+def analyze_processed_documents(sender, documents, **kwargs):
+    DocumentAnalysisService().analyze_documents(documents)
+
+
+@receiver(post_save, sender=RiskTerm)
+@receiver(post_delete, sender=RiskTerm)
+def expire_risk_lexicon(sender, **kwargs):
+    get_lexicon_cache().expire()
@@ -1,7 +1,30 @@
-from django.test import TestCase, Client
+import asyncio
+import json
+import tempfile
+import threading
+from unittest import mock
+from itertools import islice
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import AsyncClient, SimpleTestCase, TestCase, Client, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
-from .services import PolicyAnalyzer
+from rest_framework.test import APIClient
+from apps.core.models import CacheEntry
+from apps.documents.models import Document, DocumentPage
+from apps.documents.services import ProcessingQueue
+from apps.documents.tests import pdf_bytes
+from utils.clause_diff import diff_clauses, split_clauses
+from utils.risk_matcher import RiskMatcher
+from utils.spacy_models import ModelRegistry, get_nlp, iter_sentences
+from utils.summarizer import TfidfSummarizer
+from .models import PolicyAnalysis, RiskTerm
+from .services import (
+    DEFAULT_RISKY_TERMS, AnalysisExecutor, DocumentAnalysisService, ExecutorBusy,
+    LexiconCache, PolicyAnalyzer, RiskLexicon, VersionDiffService, get_lexicon_cache
+)
 
 User = get_user_model()
 
@@ -59,4 +82,602 @@ class AnalysisTests(TestCase):
             'policy_text_2': 'Second policy'
         })
         self.assertEqual(response.status_code, 200)
-        self.assertTemplateUsed(response, 'analysis/policy_comparison.html') 
\ No newline at end of file
+        self.assertTemplateUsed(response, 'analysis/policy_comparison.html')
+
+    def test_analyze_page_range_of_document(self):
+        document = Document.objects.create(title='Policy', user=self.user, page_count=3)
+        DocumentPage.objects.bulk_create([
+            DocumentPage.from_text(document.id, number, text)
+            for number, text in enumerate(
+                ['We value you.', 'We sell your data for tracking.', 'We use consent.'],
+                start=1
+            )
+        ])
+
+        response = self.client.post('/api/analysis/analysis/analyze/', {
+            'document_id': document.id,
+            'start_page': 2,
+            'end_page': 2
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.json()['found_risks']), ['sell your data', 'tracking'])
+
+
+class BatchAnalysisTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_login(self.user)
+
+    def test_results_keep_input_order_with_per_item_errors(self):
+        document = Document.objects.create(
+            title='Policy', user=self.user, is_processed=True,
+            processed_text='We sell your data.'
+        )
+        pending = Document.objects.create(title='Pending', user=self.user)
+
+        response = self.client.post('/api/analysis/analysis/analyze_batch/', {
+            'texts': ['We collect consent.', '', 'Nothing risky.'],
+            'document_ids': [document.id, 999, pending.id],
+            'batch_size': 2
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([item['index'] for item in results], list(range(6)))
+        self.assertEqual(
+            [item['status'] for item in results],
+            ['success', 'error', 'success', 'success', 'error', 'error']
+        )
+        self.assertEqual(results[0]['found_risks'], ['consent', 'collect'])
+        self.assertEqual(results[2]['risk_score'], 0)
+        self.assertEqual(results[3]['document_id'], document.id)
+        self.assertEqual(results[3]['found_risks'], ['sell your data'])
+        self.assertEqual(results[4]['error'], 'Document not found')
+        self.assertEqual(results[5]['error'], 'Document has not been processed')
+
+    def test_stream_yields_results_as_they_finish(self):
+        analyzer = PolicyAnalyzer()
+        analyzer.cache.clear()
+        analyzer.analyze('We sell your data.')
+
+        response = self.client.post('/api/analysis/analysis/analyze_batch/?stream=ndjson', {
+            'texts': ['We collect consent.', '', 'We sell your data.'],
+        }, content_type='application/json')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        results = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        # The invalid item and the cache hit come before the pipeline result
+        self.assertEqual([item['index'] for item in results], [1, 2, 0])
+        self.assertEqual(
+            [item['status'] for item in results], ['error', 'success', 'success']
+        )
+        self.assertEqual(results[1]['found_risks'], ['sell your data'])
+
+    def test_matches_single_analysis(self):
+        analyzer = PolicyAnalyzer()
+        texts = ['We share with third parties. We collect data.', 'Tracking is used.']
+
+        self.assertEqual(
+            analyzer.analyze_many(texts, batch_size=1),
+            [analyzer.analyze(text) for text in texts]
+        )
+
+    def test_requires_items(self):
+        response = self.client.post(
+            '/api/analysis/analysis/analyze_batch/', {}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class AnalysisCacheTests(TestCase):
+    def setUp(self):
+        self.analyzer = PolicyAnalyzer()
+        self.analyzer.cache.clear()
+
+    def test_repeated_analysis_is_served_from_cache(self):
+        text = 'We share with third parties. We use tracking.'
+        first = self.analyzer.analyze(text)
+        self.analyzer.cache.memory.clear()
+
+        self.assertEqual(self.analyzer.analyze(text), first)
+        self.assertEqual(self.analyzer.analyze_many([text]), [first])
+        stats = self.analyzer.cache.stats()
+        self.assertEqual((stats['misses'], stats['db_hits'], stats['memory_hits']), (1, 1, 1))
+
+    def test_offsets_follow_the_text_that_was_sent(self):
+        self.analyzer.analyze('We use tracking.')
+        result = self.analyzer.analyze('We   use\ntracking.')
+
+        self.assertEqual(result['risk_matches']['tracking']['offsets'], [[9, 17]])
+        self.assertEqual(self.analyzer.cache.stats()['memory_hits'], 1)
+
+    def test_lexicon_change_invalidates_entries(self):
+        text = 'We collect data.'
+        self.analyzer.analyze(text)
+        RiskTerm.objects.create(term='data')
+        self.addCleanup(get_lexicon_cache().expire)
+
+        self.assertIn('data', self.analyzer.analyze(text)['found_risks'])
+
+
+class DocumentUploadTestCase(TestCase):
+    """Base class that uploads documents through the API into a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media.cleanup()
+
+    def upload(self, pages):
+        response = self.client.post('/api/documents/documents/', {
+            'title': 'Policy',
+            'file': SimpleUploadedFile('policy.pdf', pdf_bytes(pages), 'application/pdf'),
+        }, format='multipart')
+        ProcessingQueue().run_next()
+        return response.data['id']
+
+
+class StoredAnalysisTests(DocumentUploadTestCase):
+    def test_analysis_is_stored_when_document_is_processed(self):
+        document_id = self.upload(['We use tracking.'])
+
+        analysis = PolicyAnalysis.objects.get(document_id=document_id)
+        self.assertEqual(analysis.version, 1)
+        self.assertEqual(analysis.found_risks, ['tracking'])
+        self.assertEqual(analysis.risk_matches['tracking']['offsets'], [[7, 15]])
+
+        response = self.client.get(f'/api/documents/documents/{document_id}/analysis/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], analysis.id)
+        self.assertEqual(response.data['risk_score'], 1)
+
+    def test_documents_processed_outside_a_job_are_analyzed_by_the_worker(self):
+        self.upload(['We use tracking.'])
+        # Identical bytes are applied from the extraction cache in the request
+        duplicate_id = self.upload(['We use tracking.'])
+        self.assertTrue(Document.objects.get(pk=duplicate_id).is_processed)
+        self.assertFalse(PolicyAnalysis.objects.filter(document_id=duplicate_id).exists())
+
+        call_command('process_documents', once=True, stdout=StringIO())
+
+        analysis = PolicyAnalysis.objects.get(document_id=duplicate_id)
+        self.assertEqual((analysis.version, analysis.found_risks), (1, ['tracking']))
+        self.assertEqual(DocumentAnalysisService().analyze_pending(), 0)
+
+    def test_worker_purges_cache_entries_of_other_versions(self):
+        analyzer = PolicyAnalyzer()
+        analyzer.cache.clear()
+        analyzer.analyze('We use tracking.')
+        for namespace in ('analysis', 'version_diff'):
+            CacheEntry.objects.create(namespace=namespace, key='0' * 64, version='old', value={})
+
+        call_command('process_documents', once=True, stdout=StringIO())
+
+        self.assertEqual(
+            list(CacheEntry.objects.values_list('namespace', 'version')),
+            [('analysis', analyzer.cache_version)]
+        )
+
+    def test_each_version_keeps_its_analysis(self):
+        document_id = self.upload(['We use tracking.'])
+        self.client.patch(f'/api/documents/documents/{document_id}/', {
+            'file': SimpleUploadedFile(
+                'policy-v2.pdf', pdf_bytes(['We sell your data.']), 'application/pdf'
+            ),
+        }, format='multipart')
+        ProcessingQueue().run_next()
+
+        response = self.client.get(f'/api/documents/documents/{document_id}/analysis/history/')
+        self.assertEqual(
+            [(entry['version'], entry['found_risks']) for entry in response.data],
+            [(2, ['sell your data']), (1, ['tracking'])]
+        )
+
+    def test_stale_analysis_is_recomputed_on_read(self):
+        document_id = self.upload(['We use tracking.'])
+        PolicyAnalysis.objects.filter(document_id=document_id).update(
+            analyzer_version='old', found_risks=[]
+        )
+
+        analysis = DocumentAnalysisService().get_analysis(Document.objects.get(pk=document_id))
+        self.assertEqual(analysis.found_risks, ['tracking'])
+        self.assertEqual(PolicyAnalysis.objects.filter(document_id=document_id).count(), 1)
+
+
+class VersionDiffTests(DocumentUploadTestCase):
+    def test_clauses_are_aligned_by_fingerprint(self):
+        old = split_clauses('Intro. We collect email. We keep logs.  Contact us!')
+        new = split_clauses('intro. We collect email and location. New clause here? Contact us!')
+
+        changes = diff_clauses(old, new)
+        self.assertEqual(
+            [(change['type'], change['old_index'], change['new_index']) for change in changes],
+            [('changed', 1, 1), ('removed', 2, None), ('added', None, 2)]
+        )
+
+    def test_risk_changes_are_reported(self):
+        # Only the risk matcher runs; neither version is parsed or summarized
+        with mock.patch.object(PolicyAnalyzer, 'summarize', side_effect=AssertionError):
+            result = VersionDiffService(PolicyAnalyzer(use_cache=False)).diff_texts(
+                'We collect email. We share usage with advertisers for tracking.',
+                'We collect email. We share usage with advertisers who may sell your data.'
+            )
+
+        self.assertEqual((result['unchanged'], result['changed']), (1, 1))
+        change = result['changes'][0]
+        self.assertEqual(change['risks_added'], ['sell your data'])
+        self.assertEqual(change['risks_removed'], ['tracking'])
+        self.assertEqual(result['risks']['added'], ['sell your data'])
+        self.assertEqual(result['risks']['counts']['tracking'], {'from': 1, 'to': 0})
+
+    def test_diff_between_versions_is_cached(self):
+        document_id = self.upload(['We collect email. We use tracking.'])
+        self.client.patch(f'/api/documents/documents/{document_id}/', {
+            'file': SimpleUploadedFile(
+                'policy-v2.pdf', pdf_bytes(['We collect email. We sell your data.']),
+                'application/pdf'
+            ),
+        }, format='multipart')
+        ProcessingQueue().run_next()
+        service = VersionDiffService()
+        service.cache.clear()
+
+        response = self.client.get(f'/api/documents/documents/{document_id}/diff/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['from_version'], response.data['to_version']), (1, 2))
+        self.assertEqual(response.data['risks']['added'], ['sell your data'])
+
+        self.client.get(f'/api/documents/documents/{document_id}/diff/?from=1&to=2')
+        self.assertEqual(service.cache.stats()['memory_hits'], 1)
+        response = self.client.get(f'/api/documents/documents/{document_id}/diff/?from=3')
+        self.assertEqual(response.status_code, 404)
+
+
+class MultiComparisonTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.analyzer = PolicyAnalyzer()
+        self.analyzer.cache.clear()
+        self.texts = [
+            'We use tracking and collect personal data.',
+            'We collect personal data and sell your data.',
+            'We never share anything.',
+        ]
+
+    def test_matrices_and_term_presence(self):
+        comparison = self.analyzer.compare_many(self.texts, ['A', 'B', 'C'])
+
+        self.assertEqual([policy['label'] for policy in comparison['policies']], ['A', 'B', 'C'])
+        self.assertEqual([policy['risk_score'] for policy in comparison['policies']], [3, 3, 0])
+        self.assertEqual(comparison['risk_difference'], [[0, 0, 3], [0, 0, 3], [-3, -3, 0]])
+        self.assertEqual(comparison['common_risks'], [[3, 2, 0], [2, 3, 0], [0, 0, 0]])
+        self.assertEqual(comparison['similarity'][0][1], 0.5)
+        self.assertEqual(comparison['similarity'][2][2], 1.0)
+        self.assertEqual(comparison['term_presence']['personal data'], [0, 1])
+        self.assertEqual(comparison['term_presence']['tracking'], [0])
+        self.assertEqual(comparison['shared_by_all'], [])
+        self.assertEqual(
+            comparison['found_in_any'],
+            ['sell your data', 'tracking', 'personal data', 'collect']
+        )
+
+    def test_cached_analyses_are_reused(self):
+        self.analyzer.analyze(self.texts[0])
+        self.analyzer.compare_many(self.texts + [self.texts[1]])
+
+        stats = self.analyzer.cache.stats()
+        self.assertEqual(stats['memory_hits'], 1)
+        self.assertEqual(stats['db_entries'], 3)
+
+    def test_compare_many_endpoint_accepts_documents(self):
+        document = Document.objects.create(
+            user=self.user, title='Vendor', processed_text=self.texts[1], is_processed=True
+        )
+        response = self.client.post('/api/analysis/analysis/compare_many/', {
+            'texts': [self.texts[0]],
+            'document_ids': [document.id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [policy['label'] for policy in response.data['policies']], ['Policy 1', 'Vendor']
+        )
+        self.assertEqual(response.data['shared_by_all'], ['personal data', 'collect'])
+
+        response = self.client.post(
+            '/api/analysis/analysis/compare_many/', {'texts': [self.texts[0]]}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class CountingPipeline:
+    """Wraps a pipeline and records the length of every text it parses."""
+
+    def __init__(self, nlp, max_length=None):
+        self.nlp = nlp
+        self.max_length = max_length or nlp.max_length
+        self.parsed = []
+
+    def __call__(self, text):
+        if len(text) > self.max_length:
+            raise ValueError('Text exceeds max_length')
+        self.parsed.append(len(text))
+        return self.nlp(text)
+
+
+class LongDocumentTests(TestCase):
+    def setUp(self):
+        self.text = ' '.join(f'Clause {number} covers how we collect data.' for number in range(2000))
+
+    def test_chunked_sentences_match_whole_parse(self):
+        nlp = get_nlp()
+        text = self.text[:3000]
+
+        self.assertEqual(
+            list(iter_sentences(nlp, text, chunk_size=100)),
+            [sent.text for sent in nlp(text).sents]
+        )
+
+    def test_summary_stops_parsing_once_complete(self):
+        nlp = CountingPipeline(get_nlp())
+        sentences = list(islice(iter_sentences(nlp, self.text, chunk_size=500), 5))
+
+        self.assertEqual(sentences[-1], 'Clause 4 covers how we collect data.')
+        self.assertEqual(len(nlp.parsed), 1)
+        self.assertLessEqual(nlp.parsed[0], 500)
+
+    def test_text_longer_than_max_length(self):
+        nlp = CountingPipeline(get_nlp(), max_length=1000)
+        text = self.text + ' We use tracking.'
+        sentences = list(iter_sentences(nlp, text, chunk_size=5000))
+
+        self.assertEqual(len(sentences), 2001)
+        self.assertEqual(max(nlp.parsed), 1000)
+
+        result = PolicyAnalyzer(use_cache=False, chunk_size=500).analyze(text)
+        self.assertEqual(len(result['summary']), 5)
+        self.assertEqual(result['risk_matches']['collect']['count'], 2000)
+        self.assertEqual(result['risk_matches']['tracking']['offsets'], [[len(text) - 9, len(text) - 1]])
+
+
+class SummarizerTests(TestCase):
+    def setUp(self):
+        self.sentences = [
+            'Welcome to our website.',
+            'This policy was last updated in March.',
+            'We collect your email address and browsing history.',
+            'We share your email address and browsing history with advertisers.',
+            'Advertisers use your browsing history for tracking.',
+            'Thank you for reading.',
+        ]
+
+    def test_central_and_risky_sentences_are_picked_in_order(self):
+        summary = TfidfSummarizer().summarize(
+            self.sentences, 2, RiskMatcher(['tracking', 'collect'])
+        )
+
+        self.assertEqual(summary, [self.sentences[2], self.sentences[4]])
+
+    def test_short_texts_are_returned_whole(self):
+        self.assertEqual(TfidfSummarizer().summarize(self.sentences[:2], 5), self.sentences[:2])
+
+    def test_summary_length_is_configurable(self):
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.post('/api/analysis/analysis/analyze/', {
+            'policy_text': ' '.join(self.sentences),
+            'summary_sentences': 3,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['summary']), 3)
+        lead = PolicyAnalyzer(summary_method='lead', summary_sentences=2).analyze(' '.join(self.sentences))
+        self.assertEqual(lead['summary'], self.sentences[:2])
+
+
+@override_settings(ANALYSIS_CACHE_PERSIST=False)
+class AsyncAnalysisTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = AsyncClient()
+        self.client.force_login(self.user)
+
+    async def test_analyze_runs_on_executor(self):
+        text = 'We use tracking. We collect personal data.'
+        response = await self.client.post(
+            '/api/analysis/async/analyze/', {'policy_text': text}, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['found_risks'], ['tracking', 'personal data', 'collect'])
+        response = await self.client.post(
+            '/api/analysis/async/compare/',
+            {'policy_text_1': text, 'policy_text_2': 'We use tracking.'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.json()['comparison']['risk_difference'], 2)
+
+    async def test_full_queue_is_rejected_with_retry_after(self):
+        executor = mock.Mock(run=mock.AsyncMock(side_effect=ExecutorBusy(3)))
+        with mock.patch('apps.analysis.views_async.get_executor', return_value=executor):
+            response = await self.client.post(
+                '/api/analysis/async/analyze/', {'policy_text': 'We use tracking.'},
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '3')
+
+    async def test_requires_authentication(self):
+        response = await AsyncClient().post(
+            '/api/analysis/async/analyze/', {'policy_text': 'x'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class AnalysisExecutorTests(SimpleTestCase):
+    def test_tasks_beyond_workers_and_queue_are_rejected(self):
+        executor = AnalysisExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(executor.run(release.wait))
+            second = asyncio.ensure_future(executor.run(lambda: 'queued'))
+            await asyncio.sleep(0)
+            with self.assertRaises(ExecutorBusy) as busy:
+                await executor.run(lambda: 'rejected')
+            release.set()
+            return await first, await second, busy.exception.retry_after
+
+        first, second, retry_after = asyncio.run(scenario())
+        self.assertEqual((first, second), (True, 'queued'))
+        self.assertGreaterEqual(retry_after, 1)
+        self.assertEqual(executor.stats()['rejected'], 1)
+        self.assertEqual(executor.stats()['pending'], 0)
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def test_pipeline_is_loaded_once_per_process(self):
+        calls = []
+
+        def loader(name, exclude):
+            calls.append((name, exclude))
+            return object()
+
+        registry = ModelRegistry(loader=loader)
+        models = []
+        threads = [
+            threading.Thread(target=lambda: models.append(registry.get('model')))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, [('model', ['lemmatizer', 'ner'])])
+        self.assertEqual(len({id(model) for model in models}), 1)
+        stats = registry.stats()
+        self.assertEqual(stats[0]['name'], 'model')
+        self.assertGreaterEqual(stats[0]['load_seconds'], 0)
+        self.assertIn('memory_bytes', stats[0])
+
+    def test_analyzers_share_the_pipeline(self):
+        self.assertIs(PolicyAnalyzer().nlp, PolicyAnalyzer().nlp)
+        self.assertNotIn('ner', PolicyAnalyzer().nlp.pipe_names)
+
+
+class RiskMatcherTests(SimpleTestCase):
+    def test_reports_overlapping_hits_with_offsets(self):
+        matcher = RiskMatcher(['personal data', 'data retention', 'data', 'Tracking'])
+        text = 'Personal data retention. TRACKING and tracking.'
+
+        self.assertEqual(matcher.match(text), {
+            'personal data': [(0, 13)],
+            'data retention': [(9, 23)],
+            'data': [(9, 13)],
+            'tracking': [(25, 33), (38, 46)],
+        })
+        self.assertEqual(matcher.counts(text)['tracking'], 2)
+        self.assertEqual(matcher.find_terms('no risks here'), [])
+
+    def test_matches_substring_loop(self):
+        analyzer = PolicyAnalyzer(lexicon=RiskLexicon(DEFAULT_RISKY_TERMS))
+        text = 'We sell your data to a Third Party and collected consent for transfers.'
+
+        self.assertEqual(
+            analyzer.risk_matcher.find_terms(text),
+            [term for term in analyzer.risky_terms if term.lower() in text.lower()]
+        )
+        matches = analyzer.match_risks(text)
+        self.assertEqual(matches['collect'], {'count': 1, 'offsets': [[39, 46]]})
+        self.assertEqual(matches['third party']['offsets'], [[23, 34]])
+
+
+class RiskLexiconTests(TestCase):
+    def setUp(self):
+        self.addCleanup(get_lexicon_cache().expire)
+
+    def test_default_terms_are_seeded(self):
+        self.assertEqual(PolicyAnalyzer().risky_terms, DEFAULT_RISKY_TERMS)
+        self.assertEqual(RiskTerm.objects.get(term='tracking').category, 'tracking')
+
+    def test_weights_and_synonyms(self):
+        RiskTerm.objects.filter(term='tracking').update(
+            weight=3, synonyms=['cookies'], updated_at=timezone.now()
+        )
+        get_lexicon_cache().expire()
+
+        result = PolicyAnalyzer(use_cache=False).analyze('We use Cookies and collect data.')
+
+        self.assertEqual(result['found_risks'], ['tracking', 'collect'])
+        self.assertEqual(result['risk_score'], 4)
+        self.assertEqual(result['risk_matches']['tracking']['offsets'], [[7, 14]])
+
+    def test_matcher_is_recompiled_when_stamp_changes(self):
+        cache = LexiconCache(check_interval=60)
+        lexicon = cache.get()
+        self.assertIs(cache.get(), lexicon)
+
+        RiskTerm.objects.create(term='biometric', weight=5)
+        # Other workers see the change at their next stamp check
+        self.assertIs(cache.get(), lexicon)
+        cache.expire()
+        updated = cache.get()
+
+        self.assertIn('biometric', updated.terms)
+        self.assertNotEqual(updated.version, lexicon.version)
+        self.assertEqual(cache.stats()['compiles'], 2)
+        cache.expire()
+        self.assertIs(cache.get(), updated)
+
+    def test_each_call_takes_one_lexicon_snapshot(self):
+        analyzer = PolicyAnalyzer()
+        texts = [f'We collect data and share it with partner {number}.' for number in range(4)]
+        get = LexiconCache.get
+        threads = []
+
+        def record(cache):
+            threads.append(threading.get_ident())
+            return get(cache)
+
+        with mock.patch.object(LexiconCache, 'get', autospec=True, side_effect=record):
+            analyzer.analyze(texts[0])
+            self.assertEqual(len(threads), 1)
+            list(analyzer.iter_analyze_many(texts))
+            self.assertEqual(len(threads), 2)
+            analyzer.analyze_concurrently(texts + ['We track you.'], max_workers=4)
+            self.assertEqual(len(threads), 3)
+            analyzer.compare_many(texts)
+            self.assertEqual(len(threads), 4)
+
+        # The worker threads of analyze_concurrently never query the table
+        self.assertEqual(set(threads), {threading.get_ident()})
+
+    def test_inactive_terms_are_ignored(self):
+        RiskTerm.objects.filter(term='consent').update(is_active=False, updated_at=timezone.now())
+        get_lexicon_cache().expire()
+
+        self.assertNotIn('consent', PolicyAnalyzer().risky_terms)
+        self.client.force_login(User.objects.create_user(username='testuser', password='testpass123'))
+        terms = self.client.get('/api/analysis/analysis/risk_terms/').json()['terms']
+        self.assertEqual(len(terms), len(DEFAULT_RISKY_TERMS) - 1)
+        self.assertEqual(terms[0], {
+            'term': 'third party', 'weight': 1, 'category': 'sharing', 'synonyms': []
+        })
+
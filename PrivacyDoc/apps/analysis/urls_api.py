@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import views_async
 from .views_api import PolicyAnalysisViewSet
 
 router = DefaultRouter()
 router.register(r'analysis', PolicyAnalysisViewSet, basename='analysis')
 
 urlpatterns = [
+    path('async/analyze/', views_async.analyze, name='async-analyze'),
+    path('async/compare/', views_async.compare, name='async-compare'),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
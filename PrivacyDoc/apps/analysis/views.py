@@ -6,13 +6,13 @@ from .services import PolicyAnalyzer
 
 class PolicyAnalysisView(LoginRequiredMixin, TemplateView):
     template_name = 'analysis/policy_analysis.html'
+    analyzer = PolicyAnalyzer()
 
     def post(self, request, *args, **kwargs):
         policy_text = request.POST.get('policy_text', '')
-        analyzer = PolicyAnalyzer()
-        
+
         try:
-            summary, risk_score, found_risks = analyzer.analyze_policy(policy_text)
+            summary, risk_score, found_risks = self.analyzer.analyze_policy(policy_text)
             context = {
                 'summary': summary,
                 'risk_score': risk_score,
@@ -30,14 +30,14 @@ class PolicyAnalysisView(LoginRequiredMixin, TemplateView):
 
 class PolicyComparisonView(LoginRequiredMixin, TemplateView):
     template_name = 'analysis/policy_comparison.html'
+    analyzer = PolicyAnalyzer()
 
     def post(self, request, *args, **kwargs):
         policy1 = request.POST.get('policy_text_1', '')
         policy2 = request.POST.get('policy_text_2', '')
-        analyzer = PolicyAnalyzer()
-        
+
         try:
-            comparison_results = analyzer.compare_policies(policy1, policy2)
+            comparison_results = self.analyzer.compare_policies(policy1, policy2)
             context = {
                 'comparison': comparison_results,
                 'policy_text_1': policy1,
@@ -1,8 +1,16 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .serializers import PolicyAnalysisSerializer, PolicyComparisonSerializer
-from .services import PolicyAnalyzer
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from apps.core.streaming import stream_format, stream_response
+from apps.documents.models import Document
+from utils.spacy_models import registry
+from .serializers import (
+    PolicyAnalysisSerializer, PolicyBatchAnalysisSerializer, PolicyComparisonSerializer,
+    PolicyMultiComparisonSerializer
+)
+from .services import PolicyAnalyzer, get_executor, get_lexicon_cache
 
 
 class PolicyAnalysisViewSet(viewsets.ViewSet):
@@ -13,15 +21,26 @@ class PolicyAnalysisViewSet(viewsets.ViewSet):
     def analyze(self, request):
         serializer = PolicyAnalysisSerializer(data=request.data)
         if serializer.is_valid():
-            try:
-                summary, risk_score, found_risks = self.analyzer.analyze_policy(
-                    serializer.validated_data['policy_text']
+            data = serializer.validated_data
+            document = None
+            if data.get('document_id') is not None:
+                document = get_object_or_404(
+                    Document.objects.filter(
+                        Q(user=request.user) | Q(shared_with=request.user)
+                    ).distinct(),
+                    pk=data['document_id']
                 )
-                return Response({
-                    'summary': summary,
-                    'risk_score': risk_score,
-                    'found_risks': found_risks
-                })
+            analyzer = self.analyzer
+            if data.get('summary_sentences'):
+                analyzer = PolicyAnalyzer(summary_sentences=data['summary_sentences'])
+            try:
+                if document is not None:
+                    result = analyzer.analyze_pages(
+                        document, data.get('start_page'), data.get('end_page')
+                    )
+                else:
+                    result = analyzer.analyze(data['policy_text'])
+                return Response(result)
             except Exception as e:
                 return Response(
                     {'error': str(e)},
@@ -29,6 +48,78 @@ class PolicyAnalysisViewSet(viewsets.ViewSet):
                 )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'])
+    def analyze_batch(self, request):
+        serializer = PolicyBatchAnalysisSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        items = [{'index': index} for index in range(len(data.get('texts', [])))]
+        texts = list(data.get('texts', []))
+        document_ids = data.get('document_ids', [])
+        documents = Document.objects.filter(
+            Q(user=request.user) | Q(shared_with=request.user),
+            id__in=document_ids
+        ).distinct().only('id', 'is_processed', 'processed_text').in_bulk()
+        errors = {}
+        for document_id in document_ids:
+            items.append({'index': len(items), 'document_id': document_id})
+            document = documents.get(document_id)
+            if document is None:
+                errors[len(texts)] = 'Document not found'
+            elif not document.is_processed:
+                errors[len(texts)] = 'Document has not been processed'
+            texts.append(document.processed_text if document and document.is_processed else None)
+
+        def complete(index, result):
+            item = items[index]
+            if index in errors or 'error' in result:
+                item.update(status='error', error=errors.get(index, result.get('error')))
+            else:
+                item.update(status='success', **result)
+            return item
+
+        fmt = stream_format(request)
+        if fmt is not None:
+            results = self.analyzer.iter_analyze_many(
+                texts,
+                batch_size=data.get('batch_size'),
+                n_process=data['n_process']
+            )
+            return stream_response(
+                (complete(index, result) for index, result in results), fmt
+            )
+
+        results = self.analyzer.analyze_many(
+            texts,
+            batch_size=data.get('batch_size'),
+            n_process=data['n_process']
+        )
+        for index, result in enumerate(results):
+            complete(index, result)
+        return Response(items)
+
+    @action(detail=False, methods=['get'])
+    def risk_terms(self, request):
+        cache = get_lexicon_cache()
+        return Response({
+            'terms': cache.get().describe(),
+            **cache.stats(),
+        })
+
+    @action(detail=False, methods=['get'])
+    def models(self, request):
+        return Response(registry.stats())
+
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        return Response(self.analyzer.cache.stats())
+
+    @action(detail=False, methods=['get'])
+    def executor_stats(self, request):
+        return Response(get_executor().stats())
+
     @action(detail=False, methods=['post'])
     def compare(self, request):
         serializer = PolicyComparisonSerializer(data=request.data)
@@ -44,4 +135,36 @@ class PolicyAnalysisViewSet(viewsets.ViewSet):
                     {'error': str(e)},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST) 
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'])
+    def compare_many(self, request):
+        serializer = PolicyMultiComparisonSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        texts = list(data.get('texts', []))
+        labels = list(data.get('labels', [f'Policy {number}' for number in range(1, len(texts) + 1)]))
+        document_ids = data.get('document_ids', [])
+        documents = Document.objects.filter(
+            Q(user=request.user) | Q(shared_with=request.user),
+            id__in=document_ids
+        ).distinct().only('id', 'title', 'is_processed', 'processed_text').in_bulk()
+        for document_id in document_ids:
+            document = documents.get(document_id)
+            if document is None or not document.is_processed or not document.processed_text:
+                return Response(
+                    {'error': f'Document {document_id} not found or not processed'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            texts.append(document.processed_text)
+            labels.append(document.title)
+
+        try:
+            return Response(self.analyzer.compare_many(texts, labels))
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -0,0 +1,94 @@
+import json
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from apps.documents.models import Document
+from .serializers import PolicyAnalysisSerializer, PolicyComparisonSerializer
+from .services import ExecutorBusy, PolicyAnalyzer, get_executor
+
+analyzer = PolicyAnalyzer()
+
+
+@sync_to_async
+def authenticate(request):
+    """
+    Authenticate a request with the same classes as the REST API.
+
+    Like DRF views, these views are exempt from CsrfViewMiddleware and
+    SessionAuthentication enforces CSRF itself.
+
+    Returns:
+        The authenticated user, or None
+    """
+    drf_request = Request(request, authenticators=[
+        authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    try:
+        user = drf_request.user
+    except exceptions.APIException:
+        return None
+    return user if user.is_authenticated else None
+
+
+def _analyze(user, data):
+    if data.get('document_id') is None:
+        policy_analyzer = analyzer
+        if data.get('summary_sentences'):
+            policy_analyzer = PolicyAnalyzer(summary_sentences=data['summary_sentences'])
+        return policy_analyzer.analyze(data['policy_text'])
+    document = get_object_or_404(
+        Document.objects.filter(Q(user=user) | Q(shared_with=user)).distinct(),
+        pk=data['document_id']
+    )
+    return analyzer.analyze_pages(document, data.get('start_page'), data.get('end_page'))
+
+
+def _compare(user, data):
+    return analyzer.compare_policies(data['policy_text_1'], data['policy_text_2'])
+
+
+async def _handle(request, serializer_class, task):
+    user = await authenticate(request)
+    if user is None:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were missing or invalid.'}, status=403
+        )
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Request body must be JSON'}, status=400)
+    serializer = serializer_class(data=payload)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    try:
+        result = await get_executor().run(task, user, serializer.validated_data)
+    except ExecutorBusy as e:
+        response = JsonResponse({'error': str(e)}, status=429)
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    except Http404:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse(result)
+
+
+@csrf_exempt
+@require_POST
+async def analyze(request):
+    """Async counterpart of PolicyAnalysisViewSet.analyze that runs on the analysis executor."""
+    return await _handle(request, PolicyAnalysisSerializer, _analyze)
+
+
+@csrf_exempt
+@require_POST
+async def compare(request):
+    """Async counterpart of PolicyAnalysisViewSet.compare that runs on the analysis executor."""
+    return await _handle(request, PolicyComparisonSerializer, _compare)
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable
+from django.db.models import F
+from django.utils import timezone
+from .models import CacheEntry
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache bounded by the total size of its values.
+
+    Sizes are the length of each value's JSON encoding, a cheap and stable
+    stand-in for the memory the value occupies.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value, size: int):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+class TwoTierCache:
+    """
+    Cache of JSON-serializable results with an in-process LRU in front of the database.
+
+    Lookups try the process's LRU first, then the CacheEntry table; database
+    hits are copied into the LRU. Every namespace has one LRU per process,
+    shared by all TwoTierCache instances for that namespace.
+
+    ``version`` is hashed into every key, so changing it (for example when
+    the inputs that determine a result change) makes older entries
+    unreachable; purge_stale removes them from the database.
+
+    Args:
+        namespace (str): Name that separates this cache's entries from others
+        version (str): Identifies how the cached values were produced
+        max_bytes (int): Size budget of the in-process tier
+        persist (bool): Whether to use the database tier
+    """
+
+    _lock = threading.Lock()
+    _memory = {}
+    _counters = {}
+
+    def __init__(self, namespace: str, version: str = '1',
+                 max_bytes: int = 32 * 1024 * 1024, persist: bool = True):
+        self.namespace = namespace
+        self.version = version
+        self.persist = persist
+        with self._lock:
+            if namespace not in self._memory:
+                self._memory[namespace] = LRUCache(max_bytes)
+                self._counters[namespace] = {'memory_hits': 0, 'db_hits': 0, 'misses': 0}
+            self.memory = self._memory[namespace]
+            self.memory.max_bytes = max_bytes
+
+    def _count(self, **increments):
+        with self._lock:
+            counters = self._counters[self.namespace]
+            for name, value in increments.items():
+                counters[name] += value
+
+    def key(self, *parts: str) -> str:
+        """Build a key from the cache version and any number of strings."""
+        digest = hashlib.sha256(f"{self.namespace}\0{self.version}".encode('utf-8'))
+        for part in parts:
+            digest.update(b'\0')
+            digest.update(part.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Look up several keys, querying the database once for all memory misses.
+
+        Args:
+            keys (Iterable[str]): Keys built with ``key``
+
+        Returns:
+            Dict[str, Any]: Cached value of every key that was found
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for key in keys:
+            value = self.memory.get(key, _MISSING)
+            if value is not _MISSING:
+                found[key] = value
+        memory_hits = len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.persist:
+            entries = CacheEntry.objects.filter(namespace=self.namespace, key__in=missing)
+            for key, value, size in entries.values_list('key', 'value', 'size'):
+                found[key] = value
+                self.memory.set(key, value, size)
+            if len(found) > memory_hits:
+                entries.filter(key__in=[key for key in missing if key in found]).update(
+                    hit_count=F('hit_count') + 1,
+                    last_hit_at=timezone.now()
+                )
+        self._count(
+            memory_hits=memory_hits,
+            db_hits=len(found) - memory_hits,
+            misses=len(keys) - len(found)
+        )
+        return found
+
+    def get(self, key: str, default=None):
+        """Return the cached value for a key, or ``default`` on a miss."""
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, values: Dict[str, Any]):
+        """Store several values in both tiers."""
+        entries = []
+        for key, value in values.items():
+            size = len(json.dumps(value))
+            self.memory.set(key, value, size)
+            entries.append(CacheEntry(
+                namespace=self.namespace, key=key, version=self.version,
+                value=value, size=size
+            ))
+        if entries and self.persist:
+            CacheEntry.objects.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=['namespace', 'key'],
+                update_fields=['version', 'value', 'size']
+            )
+
+    def set(self, key: str, value):
+        """Store a value in both tiers."""
+        self.set_many({key: value})
+
+    def get_or_set(self, key: str, compute: Callable[[], Any]):
+        """Return the cached value for a key, computing and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def purge_stale(self) -> int:
+        """Delete database entries written under another version; returns how many."""
+        deleted, _ = CacheEntry.objects.filter(namespace=self.namespace).exclude(
+            version=self.version
+        ).delete()
+        return deleted
+
+    def clear(self):
+        """Empty this namespace in both tiers and reset its counters."""
+        self.memory.clear()
+        if self.persist:
+            CacheEntry.objects.filter(namespace=self.namespace).delete()
+        with self._lock:
+            self._counters[self.namespace] = {'memory_hits': 0, 'db_hits': 0, 'misses': 0}
+
+    def stats(self) -> dict:
+        """Hit counters of this process per tier, plus sizes of both tiers."""
+        with self._lock:
+            counters = dict(self._counters[self.namespace])
+        lookups = sum(counters.values())
+        hits = counters['memory_hits'] + counters['db_hits']
+        stats = {
+            'namespace': self.namespace,
+            'version': self.version,
+            **counters,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'memory_hit_rate': counters['memory_hits'] / lookups if lookups else 0.0,
+            'memory_entries': len(self.memory),
+            'memory_bytes': self.memory.bytes,
+            'memory_max_bytes': self.memory.max_bytes,
+        }
+        if self.persist:
+            stats['db_entries'] = CacheEntry.objects.filter(
+                namespace=self.namespace, version=self.version
+            ).count()
+        return stats
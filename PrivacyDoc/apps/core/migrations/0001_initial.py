@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(max_length=50, verbose_name='namespace')),
+                ('key', models.CharField(max_length=64, verbose_name='key')),
+                ('version', models.CharField(max_length=100, verbose_name='version')),
+                ('value', models.JSONField(verbose_name='value')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='size')),
+                ('hit_count', models.PositiveIntegerField(default=0, verbose_name='hit count')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True, verbose_name='last hit at')),
+            ],
+            options={
+                'verbose_name': 'cache entry',
+                'verbose_name_plural': 'cache entries',
+                'indexes': [models.Index(fields=['namespace', 'version'], name='core_cachee_namespa_323539_idx')],
+                'constraints': [models.UniqueConstraint(fields=('namespace', 'key'), name='unique_cache_key_per_namespace')],
+            },
+        ),
+    ]
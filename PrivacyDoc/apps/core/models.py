@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class CacheEntry(models.Model):
+    """Persistent tier of a TwoTierCache: one JSON value per namespace and key."""
+    namespace = models.CharField(_('namespace'), max_length=50)
+    key = models.CharField(_('key'), max_length=64)
+    version = models.CharField(_('version'), max_length=100)
+    value = models.JSONField(_('value'))
+    size = models.PositiveIntegerField(_('size'), default=0)
+    hit_count = models.PositiveIntegerField(_('hit count'), default=0)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    last_hit_at = models.DateTimeField(_('last hit at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('cache entry')
+        verbose_name_plural = _('cache entries')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['namespace', 'key'],
+                name='unique_cache_key_per_namespace'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['namespace', 'version']),
+        ]
+
+    def __str__(self):
+        return f"{self.namespace}:{self.key[:12]}"
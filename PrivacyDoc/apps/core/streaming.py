@@ -0,0 +1,75 @@
+import json
+from typing import Iterable, Iterator, Optional
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+
+def stream_format(request) -> Optional[str]:
+    """
+    Read the requested streaming format from the ``stream`` query parameter.
+
+    A query parameter is used rather than the Accept header because DRF's
+    content negotiation rejects media types no renderer produces.
+
+    Returns:
+        Optional[str]: 'ndjson' or 'sse', or None for a regular response
+    """
+    value = request.query_params.get('stream', '').lower()
+    if value in ('1', 'true'):
+        return 'ndjson'
+    return value if value in STREAM_FORMATS else None
+
+
+def _encode(item) -> str:
+    return json.dumps(item, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+def iter_events(items: Iterable, fmt: str) -> Iterator[str]:
+    """
+    Encode items one at a time as NDJSON lines or Server-Sent Events.
+
+    Server-Sent Events are sent as ``result`` events and followed by a
+    ``done`` event with the number of results, so a client can tell a
+    finished stream from a dropped connection.
+
+    Args:
+        items (Iterable): JSON-serializable results, consumed lazily
+        fmt (str): 'ndjson' or 'sse'
+
+    Yields:
+        str: Encoded chunks, one per item
+    """
+    count = 0
+    for item in items:
+        count += 1
+        if fmt == 'sse':
+            yield f'event: result\ndata: {_encode(item)}\n\n'
+        else:
+            yield _encode(item) + '\n'
+    if fmt == 'sse':
+        yield f'event: done\ndata: {_encode({"count": count})}\n\n'
+
+
+def stream_response(items: Iterable, fmt: str) -> StreamingHttpResponse:
+    """
+    Stream results to the client as they are produced.
+
+    Args:
+        items (Iterable): JSON-serializable results, consumed lazily
+        fmt (str): 'ndjson' or 'sse'
+
+    Returns:
+        StreamingHttpResponse: Response that is not buffered by the server
+        or by proxies that honour ``X-Accel-Buffering``
+    """
+    response = StreamingHttpResponse(
+        iter_events(items, fmt), content_type=STREAM_FORMATS[fmt]
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,48 @@
+from django.test import SimpleTestCase, TestCase
+from .cache import LRUCache, TwoTierCache
+from .models import CacheEntry
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used_by_size(self):
+        cache = LRUCache(max_bytes=10)
+        cache.set('a', 'A', 4)
+        cache.set('b', 'B', 4)
+        cache.get('a')
+        cache.set('c', 'C', 4)
+
+        self.assertEqual(cache.get('a'), 'A')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.bytes, 8)
+
+        cache.set('huge', 'H', 11)
+        self.assertIsNone(cache.get('huge'))
+        self.assertEqual(len(cache), 2)
+
+
+class TwoTierCacheTests(TestCase):
+    def setUp(self):
+        self.cache = TwoTierCache('test', version='1')
+        self.cache.clear()
+
+    def test_database_tier_refills_memory(self):
+        key = self.cache.key('policy text')
+        self.assertIsNone(self.cache.get(key))
+        self.cache.set(key, {'score': 3})
+        self.cache.memory.clear()
+
+        self.assertEqual(self.cache.get(key), {'score': 3})
+        self.assertEqual(self.cache.get(key), {'score': 3})
+        stats = self.cache.stats()
+        self.assertEqual(
+            (stats['misses'], stats['db_hits'], stats['memory_hits']), (1, 1, 1)
+        )
+        self.assertAlmostEqual(stats['hit_rate'], 2 / 3)
+        self.assertEqual(CacheEntry.objects.get(key=key).hit_count, 1)
+
+    def test_version_is_part_of_the_key(self):
+        self.cache.set(self.cache.key('text'), 1)
+        newer = TwoTierCache('test', version='2')
+
+        self.assertIsNone(newer.get(newer.key('text')))
+        self.assertEqual(newer.purge_stale(), 1)
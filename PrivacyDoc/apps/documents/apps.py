@@ -10,4 +10,8 @@ class DocumentsConfig(AppConfig):
         try:
             import apps.documents.signals  # noqa
         except ImportError:
-            pass 
\ No newline at end of file
+            pass
+        from django.db.models.signals import post_migrate
+        from .services import SQLiteFTS5Backend
+        # A migration may create or drop the search index
+        post_migrate.connect(SQLiteFTS5Backend.expire, dispatch_uid='documents_search_index') 
\ No newline at end of file
@@ -0,0 +1,70 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.analysis.services import DocumentAnalysisService, PolicyAnalyzer, VersionDiffService
+from apps.documents.services import ChunkedUploadService, NearDuplicateIndex, ProcessingQueue
+
+
+class Command(BaseCommand):
+    help = 'Run a worker that processes queued document uploads and analyzes them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit as soon as the queue is empty instead of polling.'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=2.0,
+            help='Seconds to wait between polls of an empty queue.'
+        )
+        parser.add_argument(
+            '--max-jobs', type=int, default=0,
+            help='Exit after this many jobs (0 = no limit).'
+        )
+        parser.add_argument(
+            '--stale-after', type=float, default=3600.0,
+            help='Requeue jobs left running longer than this many seconds.'
+        )
+        parser.add_argument(
+            '--purge-uploads-after', type=float, default=86400.0,
+            help='Delete chunked uploads idle for longer than this many seconds.'
+        )
+
+    def handle(self, *args, **options):
+        queue = ProcessingQueue()
+        requeued = queue.requeue_stale(options['stale_after'])
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale job(s).')
+        purged = ChunkedUploadService().purge_expired(options['purge_uploads_after'])
+        if purged:
+            self.stdout.write(f'Removed {purged} abandoned upload(s).')
+        indexed = NearDuplicateIndex().index_missing()
+        if indexed:
+            self.stdout.write(f'Indexed {indexed} document(s) for near-duplicate search.')
+        # Entries written under an older analyzer, model or lexicon can never be hit again
+        purged = sum(
+            cache.purge_stale() for cache in (PolicyAnalyzer().cache, VersionDiffService().cache)
+        )
+        if purged:
+            self.stdout.write(f'Removed {purged} stale cache entries.')
+
+        processed = 0
+        try:
+            while not options['max_jobs'] or processed < options['max_jobs']:
+                job = queue.run_next()
+                if job is None:
+                    # Documents processed outside a job are analyzed while idle
+                    analyzed = DocumentAnalysisService().analyze_pending()
+                    if analyzed:
+                        self.stdout.write(f'Analyzed {analyzed} document(s).')
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                processed += 1
+                message = f'Document {job.document_id}: {job.state}'
+                if job.error:
+                    message += f' ({job.error})'
+                self.stdout.write(message)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} job(s).'))
@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-18 15:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('documents', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='name')),
+                ('description', models.TextField(blank=True, verbose_name='description')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'category',
+                'verbose_name_plural': 'categories',
+            },
+        ),
+        migrations.CreateModel(
+            name='Document',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='title')),
+                ('file', models.FileField(upload_to='documents/', verbose_name='file')),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True, verbose_name='uploaded at')),
+                ('processed_text', models.TextField(blank=True, verbose_name='processed text')),
+                ('is_processed', models.BooleanField(default=False, verbose_name='is processed')),
+                ('file_size', models.PositiveIntegerField(default=0, verbose_name='file size')),
+                ('file_type', models.CharField(blank=True, max_length=50, verbose_name='file type')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='version')),
+                ('is_shared', models.BooleanField(default=False, verbose_name='is shared')),
+                ('search_vector', models.TextField(blank=True, verbose_name='search vector')),
+                ('parent_version', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='child_versions', to='documents.document')),
+                ('shared_with', models.ManyToManyField(blank=True, related_name='shared_documents', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents', to=settings.AUTH_USER_MODEL)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='documents', to='documents.documentcategory')),
+            ],
+            options={
+                'verbose_name': 'document',
+                'verbose_name_plural': 'documents',
+                'ordering': ['-uploaded_at'],
+                'indexes': [models.Index(fields=['title'], name='documents_d_title_ccf306_idx'), models.Index(fields=['uploaded_at'], name='documents_d_uploade_65506e_idx'), models.Index(fields=['category'], name='documents_d_categor_fec314_idx'), models.Index(fields=['is_processed'], name='documents_d_is_proc_e16fac_idx')],
+            },
+        ),
+    ]
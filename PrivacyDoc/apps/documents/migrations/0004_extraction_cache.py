@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_processingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='content hash'),
+        ),
+        migrations.CreateModel(
+            name='ExtractionCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('extractor_version', models.CharField(max_length=50, verbose_name='extractor version')),
+                ('text', models.TextField(blank=True, verbose_name='text')),
+                ('hit_count', models.PositiveIntegerField(default=0, verbose_name='hit count')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True, verbose_name='last hit at')),
+            ],
+            options={
+                'verbose_name': 'extraction cache entry',
+                'verbose_name_plural': 'extraction cache entries',
+                'constraints': [models.UniqueConstraint(fields=('sha256', 'extractor_version'), name='unique_extraction_per_version')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_extraction_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='page_char_counts',
+            field=models.JSONField(blank=True, default=list, verbose_name='characters per page'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='page_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='page count'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='pdf_metadata',
+            field=models.JSONField(blank=True, default=dict, verbose_name='PDF metadata'),
+        ),
+        migrations.AddField(
+            model_name='extractioncacheentry',
+            name='page_char_counts',
+            field=models.JSONField(blank=True, default=list, verbose_name='characters per page'),
+        ),
+        migrations.AddField(
+            model_name='extractioncacheentry',
+            name='page_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='page count'),
+        ),
+        migrations.AddField(
+            model_name='extractioncacheentry',
+            name='pdf_metadata',
+            field=models.JSONField(blank=True, default=dict, verbose_name='PDF metadata'),
+        ),
+    ]
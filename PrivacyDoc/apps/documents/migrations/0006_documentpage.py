@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 15:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0005_document_pdf_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractioncacheentry',
+            name='pages',
+            field=models.JSONField(blank=True, default=list, verbose_name='pages'),
+        ),
+        migrations.CreateModel(
+            name='DocumentPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='page number')),
+                ('text', models.TextField(blank=True, verbose_name='text')),
+                ('char_count', models.PositiveIntegerField(default=0, verbose_name='character count')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='documents.document')),
+            ],
+            options={
+                'verbose_name': 'page',
+                'verbose_name_plural': 'pages',
+                'ordering': ['document', 'number'],
+                'constraints': [models.UniqueConstraint(fields=('document', 'number'), name='unique_page_per_document')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0006_documentpage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='pages_reused',
+            field=models.PositiveIntegerField(default=0, verbose_name='pages reused'),
+        ),
+        migrations.AddField(
+            model_name='documentpage',
+            name='source_hash',
+            field=models.CharField(blank=True, max_length=64, verbose_name='source hash'),
+        ),
+        migrations.AddField(
+            model_name='extractioncacheentry',
+            name='page_hashes',
+            field=models.JSONField(blank=True, default=list, verbose_name='page hashes'),
+        ),
+    ]
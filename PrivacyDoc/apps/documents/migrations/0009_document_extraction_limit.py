@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0008_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='extraction_limit',
+            field=models.CharField(blank=True, max_length=20, verbose_name='extraction limit reached'),
+        ),
+    ]
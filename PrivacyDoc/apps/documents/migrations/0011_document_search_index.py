@@ -0,0 +1,78 @@
+from django.db import migrations
+
+FTS_TABLE = 'documents_document_fts'
+
+CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON documents_document BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, search_vector) VALUES (new.id, new.search_vector);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON documents_document BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_vector)
+        VALUES ('delete', old.id, old.search_vector);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF search_vector ON documents_document
+    WHEN old.search_vector IS NOT new.search_vector BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_vector)
+        VALUES ('delete', old.id, old.search_vector);
+        INSERT INTO {FTS_TABLE}(rowid, search_vector) VALUES (new.id, new.search_vector);
+    END
+    """,
+]
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def fill_search_vectors(apps, schema_editor):
+    Document = apps.get_model('documents', 'Document')
+    batch = []
+    for document in Document.objects.only('id', 'title', 'processed_text').iterator():
+        document.search_vector = ' '.join(f"{document.title}\n{document.processed_text}".lower().split())
+        batch.append(document)
+        if len(batch) >= 500:
+            Document.objects.bulk_update(batch, ['search_vector'])
+            batch = []
+    Document.objects.bulk_update(batch, ['search_vector'])
+
+
+def create_index(apps, schema_editor):
+    fill_search_vectors(apps, schema_editor)
+    if not fts5_available(schema_editor.connection):
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(search_vector, "
+        f"content='documents_document', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    for statement in CREATE_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for suffix in ('insert', 'delete', 'update'):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0010_minhash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
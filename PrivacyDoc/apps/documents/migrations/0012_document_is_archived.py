@@ -0,0 +1,71 @@
+# Generated by Django 5.2 on 2026-10-18 16:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+FTS_TABLE = 'documents_document_fts'
+
+# Same as in 0011, but archived versions are kept out of the index
+CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON documents_document
+    WHEN NOT new.is_archived BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, search_vector) VALUES (new.id, new.search_vector);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON documents_document
+    WHEN NOT old.is_archived BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_vector)
+        VALUES ('delete', old.id, old.search_vector);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF search_vector, is_archived ON documents_document
+    WHEN old.search_vector IS NOT new.search_vector OR old.is_archived IS NOT new.is_archived BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_vector)
+        SELECT 'delete', old.id, old.search_vector WHERE NOT old.is_archived;
+        INSERT INTO {FTS_TABLE}(rowid, search_vector)
+        SELECT new.id, new.search_vector WHERE NOT new.is_archived;
+    END
+    """,
+]
+
+
+def mark_archived(apps, schema_editor):
+    Document = apps.get_model('documents', 'Document')
+    Document.objects.filter(child_versions__isnull=False).update(is_archived=True)
+
+    connection = schema_editor.connection
+    if FTS_TABLE not in connection.introspection.table_names():
+        return
+    for suffix in ('insert', 'delete', 'update'):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+    for statement in CREATE_TRIGGERS:
+        schema_editor.execute(statement)
+    schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_vector) "
+        f"SELECT 'delete', id, search_vector FROM documents_document WHERE is_archived"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0011_document_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='is_archived',
+            field=models.BooleanField(default=False, editable=False, verbose_name='is archived'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['is_archived'], name='documents_d_is_arch_a568c1_idx'),
+        ),
+        migrations.RunPython(mark_archived, migrations.RunPython.noop),
+    ]
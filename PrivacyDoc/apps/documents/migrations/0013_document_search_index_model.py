@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 17:20
+
+import apps.documents.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0012_document_is_archived'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSearchIndex',
+            fields=[
+                ('document', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='documents.document')),
+                ('search_vector', apps.documents.models.FullTextField(verbose_name='search vector')),
+                ('rank', models.FloatField(verbose_name='rank')),
+            ],
+            options={
+                'verbose_name': 'search index entry',
+                'verbose_name_plural': 'search index entries',
+                'db_table': 'documents_document_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,3 +1,6 @@
+import hashlib
+import os
+import uuid
 from django.db import models
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
@@ -53,6 +56,14 @@ class Document(models.Model):
         blank=True
     )
     search_vector = models.TextField(_('search vector'), blank=True)
+    is_archived = models.BooleanField(_('is archived'), default=False, editable=False)
+    content_hash = models.CharField(_('content hash'), max_length=64, blank=True, db_index=True)
+    page_count = models.PositiveIntegerField(_('page count'), default=0)
+    page_char_counts = models.JSONField(_('characters per page'), default=list, blank=True)
+    pdf_metadata = models.JSONField(_('PDF metadata'), default=dict, blank=True)
+    pages_reused = models.PositiveIntegerField(_('pages reused'), default=0)
+    extraction_limit = models.CharField(_('extraction limit reached'), max_length=20, blank=True)
+    minhash = models.BinaryField(_('MinHash signature'), null=True, blank=True, editable=False)
 
     class Meta:
         verbose_name = _('document')
@@ -63,25 +74,148 @@ class Document(models.Model):
             models.Index(fields=['uploaded_at']),
             models.Index(fields=['category']),
             models.Index(fields=['is_processed']),
+            models.Index(fields=['is_archived']),
         ]
 
     def __str__(self):
         return f"{self.title} (v{self.version})"
 
     def save(self, *args, **kwargs):
+        file_changed = False
         if not self.pk:  # New document
             self.version = 1
+            file_changed = True
         else:
             # Check if file has changed
-            old_doc = Document.objects.get(pk=self.pk)
-            if old_doc.file != self.file:
+            old_file = Document.objects.values_list('file', flat=True).get(pk=self.pk)
+            if self.file != old_file:
                 self.version += 1
-                self.parent_version = old_doc
+                self.parent_version = Document.objects.get(pk=self.pk).archive()
+                file_changed = True
         if self.file:
             self.file_size = self.file.size
             self.file_type = self.file.name.split('.')[-1].lower()
+            if file_changed or not self.content_hash:
+                self.content_hash = self.compute_content_hash()
+        update_fields = kwargs.get('update_fields')
+        if self.update_search_vector() and update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_vector'}
         super().save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        document = super().from_db(db, field_names, values)
+        document._indexed_source = document._search_source()
+        return document
+
+    def archive(self):
+        """
+        Keep this version as its own row before the document moves to a new file.
+
+        Called on a fresh copy of the stored document; the copy is saved under
+        a new primary key, marked as archived so it is left out of document
+        lists and search, and takes the extracted pages with it.
+
+        Returns:
+            Document: The archived version
+        """
+        current_pk = self.pk
+        self.pk = None
+        self._state.adding = True
+        self.is_archived = True
+        super().save()
+        DocumentPage.objects.filter(document_id=current_pk).update(document=self)
+        return self
+
+    def compute_content_hash(self):
+        """
+        Return the SHA-256 of the document's file.
+
+        Files that came through the hashing upload handlers already carry the
+        digest computed while they streamed in; anything else is read in chunks.
+        """
+        uploaded = getattr(self.file, '_file', None)
+        digest = getattr(uploaded, 'sha256', None)
+        if digest:
+            return digest
+        sha256 = hashlib.sha256()
+        for chunk in self.file.chunks():
+            sha256.update(chunk)
+        if self.file._committed:
+            self.file.close()
+        return sha256.hexdigest()
+
+    def apply_extraction(self, result):
+        """
+        Copy the output of PDFProcessor.extract_document onto the document.
+
+        Returns:
+            bool: True if the PDF contained text
+        """
+        self.page_count = result['page_count']
+        self.page_char_counts = result['page_char_counts']
+        self.pdf_metadata = result['metadata']
+        self.pages_reused = result.get('pages_reused', 0)
+        self.extraction_limit = result.get('limit_reached', '')
+        if not result['text']:
+            return False
+        self.processed_text = result['text']
+        self.is_processed = True
+        self.update_search_vector()
+        return True
+
+    def build_search_vector(self):
+        """
+        Text the full-text index is built from: title and processed text, lowercased.
+
+        Lowercasing up front lets the LIKE search backend use a plain,
+        case-sensitive comparison on every database.
+        """
+        return ' '.join(f"{self.title}\n{self.processed_text}".lower().split())
+
+    def update_search_vector(self):
+        """
+        Rebuild ``search_vector`` if the title or processed text changed since it was built.
+
+        Saves that only touch other fields, like sharing, leave the vector and
+        the FTS5 index alone.
+
+        Returns:
+            bool: True if the vector was rebuilt
+        """
+        if self._search_source() == getattr(self, '_indexed_source', None):
+            return False
+        self.search_vector = self.build_search_vector()
+        self._indexed_source = self._search_source()
+        return True
+
+    def _search_source(self):
+        # Deferred fields read as None, so checking never loads them
+        return self.__dict__.get('title'), self.__dict__.get('processed_text')
+
+    def get_pages(self, start=None, end=None):
+        """
+        Return the stored pages in a range without loading the other pages.
+
+        Args:
+            start (Optional[int]): First page (1-based, inclusive)
+            end (Optional[int]): Last page (1-based, inclusive)
+        """
+        pages = self.pages.all()
+        if start is not None:
+            pages = pages.filter(number__gte=start)
+        if end is not None:
+            pages = pages.filter(number__lte=end)
+        return pages
+
+    def get_page_text(self, start=None, end=None):
+        """Join the text of a range of pages, reading them from the database in chunks."""
+        return " ".join(
+            text for text in
+            self.get_pages(start, end).values_list('text', flat=True).iterator()
+            if text
+        )
+
     def get_version_history(self):
         """Get the complete version history of the document."""
         history = []
@@ -102,4 +236,238 @@ class Document(models.Model):
         self.shared_with.remove(*users)
         if not self.shared_with.exists():
             self.is_shared = False
-        self.save() 
\ No newline at end of file
+        self.save() 
+
+
+class DocumentPage(models.Model):
+    """Cleaned text of a single page of a document."""
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name='pages'
+    )
+    number = models.PositiveIntegerField(_('page number'))
+    text = models.TextField(_('text'), blank=True)
+    char_count = models.PositiveIntegerField(_('character count'), default=0)
+    sha256 = models.CharField(_('SHA-256'), max_length=64)
+    source_hash = models.CharField(_('source hash'), max_length=64, blank=True)
+
+    class Meta:
+        verbose_name = _('page')
+        verbose_name_plural = _('pages')
+        ordering = ['document', 'number']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['document', 'number'],
+                name='unique_page_per_document'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Page {self.number} of document {self.document_id}"
+
+    @classmethod
+    def from_text(cls, document_id, number, text, source_hash=''):
+        """
+        Build an unsaved page with its length and hash filled in.
+
+        ``source_hash`` is the PDFProcessor.page_hash of the page the text
+        came from; it lets later versions of the document reuse the text.
+        """
+        return cls(
+            document_id=document_id,
+            number=number,
+            text=text,
+            char_count=len(text),
+            sha256=hashlib.sha256(text.encode('utf-8')).hexdigest(),
+            source_hash=source_hash
+        )
+
+
+class MinHashBucket(models.Model):
+    """LSH bucket a document's MinHash signature falls in for one band."""
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name='minhash_buckets'
+    )
+    key = models.BigIntegerField(_('bucket key'), db_index=True)
+
+    class Meta:
+        verbose_name = _('MinHash bucket')
+        verbose_name_plural = _('MinHash buckets')
+
+    def __str__(self):
+        return f"Bucket {self.key} of document {self.document_id}"
+
+
+class FullTextField(models.TextField):
+    """Column of an SQLite FTS5 table, queried with the ``match`` lookup."""
+
+
+@FullTextField.register_lookup
+class FullTextMatch(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class DocumentSearchIndex(models.Model):
+    """
+    Row of the SQLite FTS5 index over ``Document.search_vector``.
+
+    The virtual table and the triggers that fill it are created by the
+    migrations where FTS5 is available. The model only lets searches join
+    the index and read its bm25 ``rank``; it is never written through the ORM.
+    """
+    document = models.OneToOneField(
+        Document,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_index'
+    )
+    search_vector = FullTextField(_('search vector'))
+    rank = models.FloatField(_('rank'))
+
+    class Meta:
+        managed = False
+        db_table = 'documents_document_fts'
+        verbose_name = _('search index entry')
+        verbose_name_plural = _('search index entries')
+
+    def __str__(self):
+        return f"Search index of document {self.document_id}"
+
+
+class ExtractionCacheEntry(models.Model):
+    """Extraction result of a PDF, keyed by the file's SHA-256 and the extractor version."""
+    sha256 = models.CharField(_('SHA-256'), max_length=64)
+    extractor_version = models.CharField(_('extractor version'), max_length=50)
+    text = models.TextField(_('text'), blank=True)
+    pages = models.JSONField(_('pages'), default=list, blank=True)
+    page_hashes = models.JSONField(_('page hashes'), default=list, blank=True)
+    page_count = models.PositiveIntegerField(_('page count'), default=0)
+    page_char_counts = models.JSONField(_('characters per page'), default=list, blank=True)
+    pdf_metadata = models.JSONField(_('PDF metadata'), default=dict, blank=True)
+    hit_count = models.PositiveIntegerField(_('hit count'), default=0)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    last_hit_at = models.DateTimeField(_('last hit at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('extraction cache entry')
+        verbose_name_plural = _('extraction cache entries')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['sha256', 'extractor_version'],
+                name='unique_extraction_per_version'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.extractor_version})"
+
+
+class ProcessingJob(models.Model):
+    """Queued text extraction for a document, run by the process_documents worker."""
+
+    class State(models.TextChoices):
+        PENDING = 'pending', _('pending')
+        RUNNING = 'running', _('running')
+        SUCCEEDED = 'succeeded', _('succeeded')
+        FAILED = 'failed', _('failed')
+
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name='processing_jobs'
+    )
+    state = models.CharField(
+        _('state'),
+        max_length=20,
+        choices=State.choices,
+        default=State.PENDING
+    )
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+    error = models.TextField(_('error'), blank=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    started_at = models.DateTimeField(_('started at'), null=True, blank=True)
+    finished_at = models.DateTimeField(_('finished at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('processing job')
+        verbose_name_plural = _('processing jobs')
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['state', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} for document {self.document_id} ({self.state})"
+
+    @property
+    def duration(self):
+        """Seconds spent running the job, or None if it has not finished."""
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return None
+
+
+class UploadSession(models.Model):
+    """Chunked upload of a document, assembled once every byte has arrived."""
+
+    class State(models.TextChoices):
+        ACTIVE = 'active', _('active')
+        COMPLETED = 'completed', _('completed')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+    title = models.CharField(_('title'), max_length=200)
+    filename = models.CharField(_('filename'), max_length=255)
+    category = models.ForeignKey(
+        DocumentCategory,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload_sessions'
+    )
+    total_size = models.PositiveBigIntegerField(_('total size'))
+    offset = models.PositiveBigIntegerField(_('offset'), default=0)
+    expected_sha256 = models.CharField(_('expected SHA-256'), max_length=64, blank=True)
+    sha256 = models.CharField(_('SHA-256'), max_length=64, blank=True)
+    state = models.CharField(
+        _('state'),
+        max_length=20,
+        choices=State.choices,
+        default=State.ACTIVE
+    )
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload_sessions'
+    )
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('upload session')
+        verbose_name_plural = _('upload sessions')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.total_size})"
+
+    @property
+    def temp_path(self):
+        """Where the bytes received so far are stored."""
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', f'{self.pk}.part')
@@ -1,5 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Document, DocumentCategory
+from .models import Document, DocumentCategory, DocumentPage, UploadSession
 
 
 class DocumentCategorySerializer(serializers.ModelSerializer):
@@ -8,6 +9,12 @@ class DocumentCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'created_at']
 
 
+class DocumentPageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DocumentPage
+        fields = ['number', 'text', 'char_count', 'sha256']
+
+
 class DocumentSerializer(serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source='user.username')
     file_url = serializers.SerializerMethodField()
@@ -25,12 +32,16 @@ class DocumentSerializer(serializers.ModelSerializer):
             'id', 'title', 'file', 'file_url', 'uploaded_at',
             'processed_text', 'is_processed', 'file_size', 'file_type',
             'user', 'category', 'category_name', 'version', 'parent_version',
-            'is_shared', 'shared_with', 'version_history', 'search_vector'
+            'is_shared', 'shared_with', 'version_history',
+            'page_count', 'page_char_counts', 'pdf_metadata', 'pages_reused',
+            'extraction_limit'
         ]
         read_only_fields = [
             'uploaded_at', 'processed_text', 'is_processed',
             'file_size', 'file_type', 'user', 'version', 'parent_version',
-            'version_history', 'search_vector'
+            'version_history', 'page_count',
+            'page_char_counts', 'pdf_metadata', 'pages_reused',
+            'extraction_limit'
         ]
 
     def get_file_url(self, obj):
@@ -44,7 +55,9 @@ class DocumentSerializer(serializers.ModelSerializer):
         return [{
             'version': doc.version,
             'uploaded_at': doc.uploaded_at,
-            'file_url': self.get_file_url(doc)
+            'file_url': self.get_file_url(doc),
+            'page_count': doc.page_count,
+            'pages_reused': doc.pages_reused
         } for doc in history]
 
     def validate_file(self, value):
@@ -69,4 +82,28 @@ class DocumentSerializer(serializers.ModelSerializer):
             document.shared_with.set(shared_with)
             document.is_shared = bool(shared_with)
             document.save()
-        return document 
\ No newline at end of file
+        return document 
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'title', 'filename', 'category', 'total_size', 'offset',
+            'expected_sha256', 'sha256', 'state', 'document', 'created_at',
+            'updated_at'
+        ]
+        read_only_fields = [
+            'offset', 'sha256', 'state', 'document', 'created_at', 'updated_at'
+        ]
+
+    def validate_filename(self, value):
+        if not value.lower().endswith('.pdf'):
+            raise serializers.ValidationError('Only PDF files are allowed')
+        return value
+
+    def validate_total_size(self, value):
+        max_size = getattr(settings, 'DOCUMENT_UPLOAD_MAX_SIZE', 1024 * 1024 * 1024)
+        if not 0 < value <= max_size:
+            raise serializers.ValidationError(f'File size must be between 1 and {max_size} bytes')
+        return value
@@ -0,0 +1,1001 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from datetime import timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.core.files import File
+from django.db import connections, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from utils.minhash import MinHasher, band_keys, similarity
+from utils.pdf_processor import ExtractionLimits, PDFProcessor
+from .models import (
+    Document, DocumentPage, DocumentSearchIndex, ExtractionCacheEntry, MinHashBucket,
+    ProcessingJob, UploadSession
+)
+from .signals import document_processed
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+class ExtractionCache:
+    """Content-addressed cache of PDF extraction results."""
+
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+
+    def __init__(self, version: Optional[str] = None):
+        self.version = version or PDFProcessor.VERSION
+
+    @classmethod
+    def _count(cls, hits: int, misses: int):
+        with cls._lock:
+            cls._hits += hits
+            cls._misses += misses
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, dict]:
+        """
+        Look up cached extraction results for several file hashes with one query.
+
+        Args:
+            hashes (Iterable[str]): SHA-256 digests of PDF files
+
+        Returns:
+            Dict[str, dict]: Result (as from PDFProcessor.extract_document) for
+            every hash that was found
+        """
+        hashes = {sha256 for sha256 in hashes if sha256}
+        if not hashes:
+            return {}
+        entries = ExtractionCacheEntry.objects.filter(
+            sha256__in=hashes,
+            extractor_version=self.version
+        )
+        found = {
+            entry['sha256']: {
+                'text': entry['text'],
+                'pages': entry['pages'],
+                'page_hashes': entry['page_hashes'],
+                'metadata': entry['pdf_metadata'],
+                'page_count': entry['page_count'],
+                'page_char_counts': entry['page_char_counts'],
+            }
+            for entry in entries.values(
+                'sha256', 'text', 'pages', 'page_hashes', 'pdf_metadata',
+                'page_count', 'page_char_counts'
+            )
+        }
+        if found:
+            entries.filter(sha256__in=found).update(
+                hit_count=F('hit_count') + 1,
+                last_hit_at=timezone.now()
+            )
+        self._count(hits=len(found), misses=len(hashes) - len(found))
+        return found
+
+    def get(self, sha256: str) -> Optional[dict]:
+        """Return the cached extraction result for a file hash, or None on a miss."""
+        return self.get_many([sha256]).get(sha256)
+
+    def set_many(self, results: Dict[str, dict]):
+        """Store extraction results for several file hashes."""
+        ExtractionCacheEntry.objects.bulk_create([
+            ExtractionCacheEntry(
+                sha256=sha256,
+                extractor_version=self.version,
+                text=result['text'],
+                pages=result['pages'],
+                page_hashes=result['page_hashes'],
+                pdf_metadata=result['metadata'],
+                page_count=result['page_count'],
+                page_char_counts=result['page_char_counts']
+            )
+            for sha256, result in results.items() if sha256
+        ], ignore_conflicts=True)
+
+    def set(self, sha256: str, result: dict):
+        """Store the extraction result of a file."""
+        self.set_many({sha256: result})
+
+    def stats(self) -> dict:
+        """Hit/miss counters of this process plus totals stored in the database."""
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        entries = ExtractionCacheEntry.objects.filter(extractor_version=self.version)
+        lookups = hits + misses
+        return {
+            'extractor_version': self.version,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'entries': entries.count(),
+            'stored_hits': entries.aggregate(total=Sum('hit_count'))['total'] or 0,
+        }
+
+
+def extraction_limits() -> ExtractionLimits:
+    """Build the per-document extraction limits from the DOCUMENT_EXTRACTION_* settings."""
+    return ExtractionLimits(
+        max_pages=getattr(settings, 'DOCUMENT_EXTRACTION_MAX_PAGES', None),
+        max_bytes=getattr(settings, 'DOCUMENT_EXTRACTION_MAX_BYTES', None),
+        max_seconds=getattr(settings, 'DOCUMENT_EXTRACTION_MAX_SECONDS', None)
+    )
+
+
+def store_pages(results: Dict[int, dict]):
+    """
+    Replace the stored pages of several documents.
+
+    Args:
+        results (Dict[int, dict]): PDFProcessor.extract_document results by
+            document ID
+    """
+    with transaction.atomic():
+        DocumentPage.objects.filter(document_id__in=results).delete()
+        DocumentPage.objects.bulk_create([
+            DocumentPage.from_text(document_id, number, text, source_hash)
+            for document_id, result in results.items()
+            for number, (text, source_hash) in enumerate(
+                zip(result['pages'], result['page_hashes']), start=1
+            )
+        ], batch_size=500)
+
+
+class NearDuplicateIndex:
+    """
+    Service class for finding near-duplicate documents with MinHash and LSH.
+
+    Every processed document stores a MinHash signature of its text and one
+    MinHashBucket row per LSH band. Near-duplicates share at least one
+    bucket, so a lookup reads a handful of indexed rows rather than
+    comparing against every document.
+    """
+
+    def __init__(self, num_perm: Optional[int] = None, bands: Optional[int] = None):
+        self.num_perm = num_perm or getattr(settings, 'DOCUMENT_MINHASH_PERMUTATIONS', 128)
+        self.bands = bands or getattr(settings, 'DOCUMENT_MINHASH_BANDS', 16)
+        if self.num_perm % self.bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.hasher = MinHasher(self.num_perm)
+
+    def index(self, documents):
+        """
+        Compute, store and bucket the signatures of documents.
+
+        Documents without text are removed from the index.
+
+        Args:
+            documents (Iterable[Document]): Processed documents
+        """
+        documents = list(documents)
+        buckets = []
+        for document in documents:
+            if document.is_processed and document.processed_text.split():
+                signature = self.hasher.signature(document.processed_text)
+                document.minhash = self.hasher.to_bytes(signature)
+                buckets.extend(
+                    MinHashBucket(document_id=document.pk, key=key)
+                    for key in band_keys(signature, self.bands)
+                )
+            else:
+                document.minhash = None
+        with transaction.atomic():
+            Document.objects.bulk_update(documents, ['minhash'], batch_size=500)
+            MinHashBucket.objects.filter(document__in=documents).delete()
+            MinHashBucket.objects.bulk_create(buckets, batch_size=1000)
+
+    def index_missing(self, batch_size: int = 500) -> int:
+        """
+        Index processed documents that have no signature yet, such as those
+        processed before near-duplicate detection existed. Archived versions
+        are left out.
+
+        Returns:
+            int: Number of documents indexed
+        """
+        pending = Document.objects.filter(
+            is_processed=True, minhash__isnull=True, child_versions__isnull=True
+        ).exclude(processed_text='').only('id', 'is_processed', 'processed_text').order_by('pk')
+        indexed = 0
+        last = 0
+        while True:
+            documents = list(pending.filter(pk__gt=last)[:batch_size])
+            if not documents:
+                return indexed
+            self.index(documents)
+            indexed += len(documents)
+            last = documents[-1].pk
+
+    def similar(self, document, queryset=None, threshold: Optional[float] = None,
+                limit: int = 20) -> List[dict]:
+        """
+        Find documents whose text is nearly identical to a document's.
+
+        Args:
+            document (Document): Indexed document
+            queryset (Optional[QuerySet]): Documents that may be returned;
+                defaults to all documents
+            threshold (Optional[float]): Lowest estimated Jaccard similarity
+                of the word shingles
+            limit (int): Most documents to return
+
+        Returns:
+            List[dict]: ``id``, ``title``, ``version`` and estimated
+            ``similarity`` of each match, most similar first
+        """
+        if threshold is None:
+            threshold = getattr(settings, 'DOCUMENT_SIMILARITY_THRESHOLD', 0.8)
+        if not document.minhash:
+            return []
+        signature = self.hasher.from_bytes(document.minhash)
+        if queryset is None:
+            queryset = Document.objects.all()
+        candidates = list(
+            queryset.filter(
+                pk__in=MinHashBucket.objects.filter(
+                    key__in=band_keys(signature, self.bands)
+                ).values('document_id')
+            ).exclude(pk=document.pk).values_list('id', 'title', 'version', 'minhash')
+        )
+        if not candidates:
+            return []
+        scores = similarity(signature, [self.hasher.from_bytes(row[3]) for row in candidates])
+        found = [
+            {'id': pk, 'title': title, 'version': version, 'similarity': round(float(score), 4)}
+            for (pk, title, version, _), score in zip(candidates, scores)
+            if score >= threshold
+        ]
+        found.sort(key=lambda item: -item['similarity'])
+        return found[:limit]
+
+
+class SearchBackend(ABC):
+    """
+    Full-text search over ``Document.search_vector``.
+
+    Subclasses restrict a queryset to the documents matching a query; the
+    index itself has to follow every write to ``search_vector``.
+    """
+
+    name = ''
+
+    @abstractmethod
+    def search(self, queryset, query: str):
+        """
+        Args:
+            queryset (QuerySet): Documents the user may see
+            query (str): Words to look for
+
+        Returns:
+            QuerySet: The matching documents of the queryset, which can
+            still be filtered further
+        """
+
+    def rebuild(self):
+        """Rebuild the index from the stored search vectors."""
+
+
+class LikeSearchBackend(SearchBackend):
+    """Fallback for any database: a substring match on the lowercased search vector."""
+
+    name = 'like'
+
+    def search(self, queryset, query: str):
+        return queryset.filter(search_vector__contains=' '.join(query.lower().split()))
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    SQLite FTS5 index with ``documents_document`` as its external content.
+
+    Triggers created by the migrations keep the index in step with every
+    insert, delete and change of ``search_vector``, including bulk
+    updates, so ingest needs no extra work. Archived versions are not
+    indexed. Every word of a query must be
+    present, as a word or the start of one, and results are ordered by
+    bm25 relevance.
+    """
+
+    name = 'fts5'
+    TABLE = DocumentSearchIndex._meta.db_table
+
+    _lock = threading.Lock()
+    _available = {}
+
+    @classmethod
+    def available(cls, connection=None) -> bool:
+        """
+        Whether the index exists in a connection's database.
+
+        Introspection costs a query, so the answer is kept per database for
+        the life of the process; migrations clear it through expire.
+        """
+        connection = connection or connections['default']
+        if connection.vendor != 'sqlite':
+            return False
+        key = (connection.alias, str(connection.settings_dict['NAME']))
+        with cls._lock:
+            if key in cls._available:
+                return cls._available[key]
+        found = cls.TABLE in connection.introspection.table_names()
+        with cls._lock:
+            cls._available[key] = found
+        return found
+
+    @classmethod
+    def expire(cls, **kwargs):
+        """Forget which databases have the index; connected to post_migrate."""
+        with cls._lock:
+            cls._available.clear()
+
+    @staticmethod
+    def match_expression(query: str) -> str:
+        """Quote each word so user input cannot use the FTS5 query syntax."""
+        return ' '.join(f'"{word}"*' for word in WORD_PATTERN.findall(query.lower()))
+
+    def search(self, queryset, query: str):
+        expression = self.match_expression(query)
+        if not expression:
+            return LikeSearchBackend().search(queryset, query)
+        # A join rather than a correlated subquery for the rank, which would
+        # run the MATCH again for every matching row
+        return queryset.filter(search_index__search_vector__match=expression).annotate(
+            search_rank=F('search_index__rank')
+        ).order_by('search_rank')
+
+    def rebuild(self):
+        table = Document._meta.db_table
+        with connections['default'].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.TABLE}({self.TABLE}) VALUES ('rebuild')")
+            # rebuild reads every row of the content table
+            cursor.execute(
+                f"INSERT INTO {self.TABLE}({self.TABLE}, rowid, search_vector) "
+                f"SELECT 'delete', id, search_vector FROM {table} WHERE is_archived"
+            )
+
+
+SEARCH_BACKENDS = {
+    LikeSearchBackend.name: LikeSearchBackend,
+    SQLiteFTS5Backend.name: SQLiteFTS5Backend,
+}
+
+
+def get_search_backend(name: Optional[str] = None) -> SearchBackend:
+    """
+    The search backend named by DOCUMENT_SEARCH_BACKEND.
+
+    Args:
+        name (Optional[str]): 'auto' (FTS5 where the index exists, LIKE
+            elsewhere; checked once per process), a key of SEARCH_BACKENDS or the dotted path of a
+            SearchBackend subclass
+
+    Returns:
+        SearchBackend: Backend instance
+    """
+    name = name or getattr(settings, 'DOCUMENT_SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        name = SQLiteFTS5Backend.name if SQLiteFTS5Backend.available() else LikeSearchBackend.name
+    backend = SEARCH_BACKENDS.get(name) or import_string(name)
+    return backend()
+
+
+class DocumentProcessor:
+    """Service class for turning uploaded documents into processed text."""
+
+    def __init__(self, pdf_processor: Optional[PDFProcessor] = None,
+                 cache: Optional[ExtractionCache] = None,
+                 limits: Optional[ExtractionLimits] = None):
+        self.pdf_processor = pdf_processor or PDFProcessor()
+        self.cache = cache or ExtractionCache()
+        self.limits = limits or extraction_limits()
+
+    def extract_text(self, document, start: Optional[int] = None,
+                     end: Optional[int] = None) -> str:
+        """
+        Stream the pages of a document's PDF and join them once at the end.
+
+        Args:
+            document (Document): Document whose file should be read
+            start (Optional[int]): First page to extract (1-based, inclusive)
+            end (Optional[int]): Last page to extract (1-based, inclusive)
+
+        Returns:
+            str: Raw text of the requested pages
+        """
+        pages = [
+            text for _, text in
+            self.pdf_processor.iter_pages(document.file.path, start, end)
+        ]
+        return "".join(pages)
+
+    def apply_cached(self, document) -> Optional[bool]:
+        """
+        Fill a document from the extraction cache without opening the PDF.
+
+        Args:
+            document (Document): Document to process
+
+        Returns:
+            Optional[bool]: None on a cache miss, otherwise the same as process
+        """
+        if not document.content_hash:
+            return None
+        result = self.cache.get(document.content_hash)
+        if result is None:
+            return None
+        return self._store(document, result)
+
+    def process(self, document) -> bool:
+        """
+        Extract, clean and store the text, metadata and page statistics of a document.
+
+        Results already extracted from identical bytes are taken from the
+        cache. For a new version of a document, pages that are unchanged from
+        the parent version reuse its cleaned text instead of being extracted.
+        Extraction is bounded by the configured limits; a partial result is
+        stored with the limit that was reached and is not cached.
+
+        Args:
+            document (Document): Document to process
+
+        Returns:
+            bool: True if text was extracted, False if the PDF had none
+        """
+        cached = self.apply_cached(document)
+        if cached is not None:
+            return cached
+        result = self.pdf_processor.extract_document(
+            document.file.path, self.known_pages(document.parent_version), self.limits
+        )
+        if not result['limit_reached']:
+            self.cache.set(document.content_hash, result)
+        return self._store(document, result)
+
+    def known_pages(self, document) -> Dict[str, Tuple[str, int]]:
+        """
+        Collect the already extracted pages of a document by page hash.
+
+        Args:
+            document (Optional[Document]): Typically the parent version
+
+        Returns:
+            Dict[str, Tuple[str, int]]: Cleaned text and raw character count
+            of each page, in the form PDFProcessor.extract_document expects
+        """
+        if document is None:
+            return {}
+        char_counts = document.page_char_counts
+        known = {}
+        pages = document.pages.exclude(source_hash='').values_list(
+            'source_hash', 'number', 'text'
+        )
+        for source_hash, number, text in pages.iterator():
+            if number <= len(char_counts):
+                known[source_hash] = (text, char_counts[number - 1])
+        return known
+
+    def _store(self, document, result: dict) -> bool:
+        has_text = document.apply_extraction(result)
+        document.save()
+        store_pages({document.pk: result})
+        NearDuplicateIndex().index([document])
+        return has_text
+
+
+class BatchProcessor:
+    """Service class for processing many documents on a process pool."""
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 cache: Optional[ExtractionCache] = None,
+                 limits: Optional[ExtractionLimits] = None):
+        if max_workers is None:
+            max_workers = getattr(settings, 'DOCUMENT_BATCH_WORKERS', 0)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache = cache or ExtractionCache()
+        self.limits = limits or extraction_limits()
+
+    def map_files(self, paths: List[str]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+        """
+        Extract PDF files, yielding each result as soon as it is ready.
+
+        Args:
+            paths (List[str]): Paths of the PDF files to process
+
+        Yields:
+            Tuple[int, Optional[dict], Optional[str]]: Index of the path, the
+            PDFProcessor.extract_document result (None on failure) and error
+            message (None on success)
+        """
+        extract = partial(PDFProcessor.extract_document, limits=self.limits)
+        workers = min(self.max_workers, len(paths))
+        if workers <= 1:
+            for index, path in enumerate(paths):
+                try:
+                    yield index, extract(path), None
+                except Exception as e:
+                    yield index, None, str(e)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(extract, path): index
+                for index, path in enumerate(paths)
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, str(e)
+
+    def process(self, documents) -> List[dict]:
+        """
+        Process documents in parallel and store the results with one bulk update.
+
+        Cached text is used where available and identical files in the batch
+        are only extracted once.
+
+        Args:
+            documents (Iterable[Document]): Documents to process
+
+        Returns:
+            List[dict]: One result per document, in input order
+        """
+        documents = list(documents)
+        results = [self._error(document, 'File not found') for document in documents]
+        extractions, misses = self._lookup(documents)
+
+        hashes = list(misses)
+        errors = {}
+        extracted = {}
+        paths = [group[0].file.path for group in misses.values()]
+        for index, result, error in self.map_files(paths):
+            if error is not None:
+                errors[hashes[index]] = error
+            else:
+                extracted[hashes[index]] = result
+        self.cache.set_many({
+            sha256: result for sha256, result in extracted.items()
+            if not result['limit_reached']
+        })
+        extractions.update(extracted)
+
+        positions = []
+        for position, document in enumerate(documents):
+            if not document.file:
+                continue
+            if document.content_hash in errors:
+                results[position]['message'] = errors[document.content_hash]
+                continue
+            positions.append(position)
+        stored = self._store([documents[position] for position in positions], extractions)
+        for position, result in zip(positions, stored):
+            results[position] = result
+        return results
+
+    def iter_process(self, documents) -> Iterator[dict]:
+        """
+        Process documents in parallel, storing and yielding each result as it finishes.
+
+        Missing files and cached documents come first; every other document
+        is stored as soon as its file has been extracted, so the first
+        results do not wait for the whole batch.
+
+        Args:
+            documents (Iterable[Document]): Documents to process
+
+        Yields:
+            dict: Result of one document like in process, plus its ``index``
+            in the input
+        """
+        documents = list(documents)
+        for position, document in enumerate(documents):
+            if not document.file:
+                yield {'index': position, **self._error(document, 'File not found')}
+        extractions, misses = self._lookup(documents)
+
+        cached = [
+            position for position, document in enumerate(documents)
+            if document.file and document.content_hash in extractions
+        ]
+        stored = self._store([documents[position] for position in cached], extractions)
+        for position, result in zip(cached, stored):
+            yield {'index': position, **result}
+
+        positions = {}
+        for position, document in enumerate(documents):
+            if document.file and document.content_hash in misses:
+                positions.setdefault(document.content_hash, []).append(position)
+        hashes = list(misses)
+        paths = [group[0].file.path for group in misses.values()]
+        for index, result, error in self.map_files(paths):
+            sha256 = hashes[index]
+            group = positions[sha256]
+            if error is not None:
+                for position in group:
+                    yield {'index': position, **self._error(documents[position], error)}
+                continue
+            if not result['limit_reached']:
+                self.cache.set(sha256, result)
+            stored = self._store([documents[position] for position in group], {sha256: result})
+            for position, stored_result in zip(group, stored):
+                yield {'index': position, **stored_result}
+
+    def _lookup(self, documents: List) -> Tuple[Dict[str, dict], Dict[str, List]]:
+        """Split documents with a file into cached extractions and files still to extract."""
+        pending = [document for document in documents if document.file]
+        for document in pending:
+            if not document.content_hash:
+                document.content_hash = document.compute_content_hash()
+        extractions = self.cache.get_many(document.content_hash for document in pending)
+        misses = {}
+        for document in pending:
+            if document.content_hash not in extractions:
+                misses.setdefault(document.content_hash, []).append(document)
+        return extractions, misses
+
+    @staticmethod
+    def _error(document, message: str) -> dict:
+        return {'id': document.id, 'status': 'error', 'message': message}
+
+    def _store(self, documents: List, extractions: Dict[str, dict]) -> List[dict]:
+        """
+        Apply extraction results to documents and save them with one bulk update.
+
+        Args:
+            documents (List[Document]): Documents to store
+            extractions (Dict[str, dict]): Extraction results by content hash
+
+        Returns:
+            List[dict]: One result per document, in the given order
+        """
+        results = []
+        for document in documents:
+            if document.apply_extraction(extractions[document.content_hash]):
+                results.append({'id': document.id, 'status': 'success'})
+            else:
+                results.append(self._error(document, 'No text extracted'))
+        if documents:
+            Document.objects.bulk_update(documents, [
+                'processed_text', 'is_processed', 'content_hash',
+                'page_count', 'page_char_counts', 'pdf_metadata',
+                'pages_reused', 'extraction_limit', 'search_vector'
+            ])
+            store_pages({
+                document.pk: extractions[document.content_hash]
+                for document in documents
+            })
+            NearDuplicateIndex().index(documents)
+        return results
+
+
+class ProcessingQueue:
+    """Database-backed queue of document processing jobs."""
+
+    def __init__(self, processor: Optional[DocumentProcessor] = None):
+        self.processor = processor or DocumentProcessor()
+
+    def enqueue(self, document) -> ProcessingJob:
+        """
+        Queue a document for processing and return immediately.
+
+        A cache hit is applied straight away and recorded as a finished job.
+        A document that already has a pending job is not queued twice. When
+        DOCUMENT_PROCESSING_ASYNC is disabled the job is run straight away.
+
+        Args:
+            document (Document): Document to process
+
+        Returns:
+            ProcessingJob: The pending (or, in synchronous mode, finished) job
+        """
+        cached = self.processor.apply_cached(document)
+        if cached is not None:
+            now = timezone.now()
+            return ProcessingJob.objects.create(
+                document=document,
+                state=ProcessingJob.State.SUCCEEDED if cached else ProcessingJob.State.FAILED,
+                error='' if cached else 'No text extracted',
+                attempts=1,
+                started_at=now,
+                finished_at=now
+            )
+        if document.is_processed:
+            document.is_processed = False
+            Document.objects.filter(pk=document.pk).update(is_processed=False)
+        job = document.processing_jobs.filter(state=ProcessingJob.State.PENDING).first()
+        if job is None:
+            job = ProcessingJob.objects.create(document=document)
+        if not getattr(settings, 'DOCUMENT_PROCESSING_ASYNC', True):
+            claimed = self.claim(job)
+            if claimed is not None:
+                job = self.run(claimed)
+        return job
+
+    def claim(self, job: Optional[ProcessingJob] = None) -> Optional[ProcessingJob]:
+        """
+        Atomically take a pending job and mark it as running.
+
+        The conditional update makes it safe for several workers to poll the
+        same queue: only one of them can move a given job out of pending.
+
+        Args:
+            job (Optional[ProcessingJob]): Specific job to claim; defaults to
+                the oldest pending one
+
+        Returns:
+            Optional[ProcessingJob]: The claimed job or None if nothing was claimed
+        """
+        pending = ProcessingJob.objects.filter(state=ProcessingJob.State.PENDING)
+        if job is not None:
+            candidates = [job.pk]
+        else:
+            candidates = pending.values_list('pk', flat=True)[:10]
+        for job_id in candidates:
+            claimed = pending.filter(pk=job_id).update(
+                state=ProcessingJob.State.RUNNING,
+                started_at=timezone.now(),
+                attempts=F('attempts') + 1
+            )
+            if claimed:
+                return ProcessingJob.objects.select_related('document').get(pk=job_id)
+        return None
+
+    def run(self, job: ProcessingJob) -> ProcessingJob:
+        """
+        Process the document of a claimed job and record the outcome.
+
+        When text was extracted, document_processed is sent as part of the
+        job, so its receivers run on the worker rather than in a request.
+
+        Args:
+            job (ProcessingJob): Job in the running state
+
+        Returns:
+            ProcessingJob: The finished job
+        """
+        try:
+            if self.processor.process(job.document):
+                job.state = ProcessingJob.State.SUCCEEDED
+                job.error = ''
+                document_processed.send_robust(sender=Document, documents=[job.document])
+            else:
+                job.state = ProcessingJob.State.FAILED
+                job.error = 'No text extracted'
+        except Exception as e:
+            job.state = ProcessingJob.State.FAILED
+            job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['state', 'error', 'finished_at'])
+        return job
+
+    def run_next(self) -> Optional[ProcessingJob]:
+        """Claim and run the oldest pending job, if there is one."""
+        job = self.claim()
+        if job is None:
+            return None
+        return self.run(job)
+
+    def requeue_stale(self, timeout: float) -> int:
+        """
+        Put jobs that have been running for too long back in the queue.
+
+        Args:
+            timeout (float): Seconds after which a running job is considered lost
+
+        Returns:
+            int: Number of jobs requeued
+        """
+        cutoff = timezone.now() - timedelta(seconds=timeout)
+        return ProcessingJob.objects.filter(
+            state=ProcessingJob.State.RUNNING,
+            started_at__lt=cutoff
+        ).update(state=ProcessingJob.State.PENDING, started_at=None)
+
+
+class UploadError(Exception):
+    """Raised when a chunk or an upload session cannot be accepted."""
+
+
+class UploadOffsetError(UploadError):
+    """Raised when a chunk does not start where the upload left off."""
+
+    def __init__(self, offset: int):
+        super().__init__(f'Expected a chunk at offset {offset}')
+        self.offset = offset
+
+
+class _AssembledFile(File):
+    """An assembled upload that storage can move into place instead of copying."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class ChunkedUploadService:
+    """
+    Service class for resumable uploads that stream straight to disk.
+
+    Chunks are read from the request in small blocks into a temporary file
+    of their own, and copied to their offset in the partial file once the
+    request has claimed that offset, so memory use does not depend on the
+    size of the file. The SHA-256 is updated as the bytes stream through; the running
+    digest is kept per process and rebuilt from the partial file when a
+    session is resumed elsewhere (another worker or after a restart).
+    """
+
+    BLOCK_SIZE = 64 * 1024
+
+    _lock = threading.Lock()
+    _hashers = {}
+
+    def _hasher(self, session: UploadSession):
+        with self._lock:
+            offset, hasher = self._hashers.get(session.pk, (None, None))
+        if offset == session.offset:
+            return hasher.copy()
+        hasher = hashlib.sha256()
+        if session.offset:
+            with open(session.temp_path, 'rb') as partial:
+                remaining = session.offset
+                while remaining:
+                    block = partial.read(min(self.BLOCK_SIZE, remaining))
+                    if not block:
+                        raise UploadError('Partial upload is missing data')
+                    hasher.update(block)
+                    remaining -= len(block)
+        return hasher
+
+    def write_chunk(self, session: UploadSession, offset: int, stream, length: int) -> int:
+        """
+        Append a chunk read from ``stream`` to an upload.
+
+        Args:
+            session (UploadSession): Active upload session
+            offset (int): Position of the chunk in the file
+            stream: File-like object to read the chunk from
+            length (int): Number of bytes in the chunk
+
+        Returns:
+            int: The new offset of the upload
+
+        Raises:
+            UploadOffsetError: If the chunk does not start at the current offset
+            UploadError: If the chunk is too large or was cut short
+        """
+        if session.state != UploadSession.State.ACTIVE:
+            raise UploadError('Upload is already complete')
+        if offset != session.offset:
+            raise UploadOffsetError(session.offset)
+        max_chunk = getattr(settings, 'DOCUMENT_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+        if length > max_chunk:
+            raise UploadError(f'Chunks must not exceed {max_chunk} bytes')
+        if offset + length > session.total_size:
+            raise UploadError('Chunk goes past the declared file size')
+
+        hasher = self._hasher(session)
+        directory = os.path.dirname(session.temp_path)
+        os.makedirs(directory, exist_ok=True)
+        new_offset = offset + length
+        with tempfile.TemporaryFile(dir=directory) as chunk:
+            remaining = length
+            while remaining:
+                block = stream.read(min(self.BLOCK_SIZE, remaining)) if stream else b''
+                if not block:
+                    raise UploadError('Chunk ended before Content-Length bytes were read')
+                chunk.write(block)
+                hasher.update(block)
+                remaining -= len(block)
+
+            with transaction.atomic():
+                # The conditional update claims the offset and keeps the
+                # session row locked until the chunk is in place, so a
+                # concurrent request for the same offset never writes the file.
+                claimed = UploadSession.objects.filter(pk=session.pk, offset=offset).update(
+                    offset=new_offset, updated_at=timezone.now()
+                )
+                if claimed:
+                    chunk.seek(0)
+                    fd = os.open(session.temp_path, os.O_RDWR | os.O_CREAT, 0o600)
+                    with os.fdopen(fd, 'r+b') as partial:
+                        partial.seek(offset)
+                        shutil.copyfileobj(chunk, partial, self.BLOCK_SIZE)
+                        partial.truncate()
+        if not claimed:
+            session.refresh_from_db(fields=['offset'])
+            raise UploadOffsetError(session.offset)
+        session.offset = new_offset
+        with self._lock:
+            self._hashers[session.pk] = (new_offset, hasher)
+        return new_offset
+
+    def complete(self, session: UploadSession) -> Document:
+        """
+        Turn a fully received upload into a Document and queue its processing.
+
+        The document is created and the session marked completed in one
+        transaction, with the session locked so it cannot be completed twice.
+
+        Args:
+            session (UploadSession): Upload whose bytes have all arrived
+
+        Returns:
+            Document: The new document
+
+        Raises:
+            UploadError: If bytes are missing, the checksum does not match or
+            the file is not a PDF
+        """
+        if session.state != UploadSession.State.ACTIVE:
+            raise UploadError('Upload is already complete')
+        if session.offset != session.total_size:
+            raise UploadError(f'Received {session.offset} of {session.total_size} bytes')
+        digest = self._hasher(session).hexdigest()
+        if session.expected_sha256 and session.expected_sha256.lower() != digest:
+            raise UploadError('Checksum mismatch')
+        with open(session.temp_path, 'rb') as partial:
+            if partial.read(5) != b'%PDF-':
+                raise UploadError('Only PDF files are allowed')
+
+        with transaction.atomic():
+            locked = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if locked.state != UploadSession.State.ACTIVE:
+                raise UploadError('Upload is already complete')
+            with open(session.temp_path, 'rb') as partial:
+                content = _AssembledFile(partial, name=os.path.basename(session.filename))
+                content.sha256 = digest
+                document = Document(
+                    title=session.title,
+                    user=session.user,
+                    category=session.category
+                )
+                document.file = content
+                document.save()
+
+            session.sha256 = digest
+            session.state = UploadSession.State.COMPLETED
+            session.document = document
+            session.save(update_fields=['sha256', 'state', 'document', 'updated_at'])
+        if os.path.exists(session.temp_path):
+            os.remove(session.temp_path)
+        with self._lock:
+            self._hashers.pop(session.pk, None)
+        ProcessingQueue().enqueue(document)
+        return document
+
+    def abort(self, session: UploadSession):
+        """Delete an upload session and whatever it has received."""
+        with self._lock:
+            self._hashers.pop(session.pk, None)
+        if os.path.exists(session.temp_path):
+            os.remove(session.temp_path)
+        session.delete()
+
+    def purge_expired(self, max_age: float) -> int:
+        """
+        Abort active uploads that have not received a chunk for a while.
+
+        Args:
+            max_age (float): Seconds of inactivity after which an upload is dropped
+
+        Returns:
+            int: Number of uploads removed
+        """
+        cutoff = timezone.now() - timedelta(seconds=max_age)
+        expired = UploadSession.objects.filter(
+            state=UploadSession.State.ACTIVE,
+            updated_at__lt=cutoff
+        )
+        count = 0
+        for session in expired:
+            self.abort(session)
+            count += 1
+        return count
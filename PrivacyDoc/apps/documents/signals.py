@@ -0,0 +1,8 @@
+from django.dispatch import Signal
+
+# Sent with ``documents``, the Document instances whose text was just
+# extracted and saved by a processing job. ProcessingQueue sends it with
+# send_robust on the worker, so a failing receiver never fails the job
+# itself. Text stored outside a job (extraction cache hits at upload, batch
+# processing) is not announced.
+document_processed = Signal()
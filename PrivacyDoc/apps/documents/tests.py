@@ -1 +1,814 @@
- 
\ No newline at end of file
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import tracemalloc
+import fitz
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from utils.minhash import LSHIndex, MinHasher, similarity
+from utils.pdf_processor import ExtractionLimits, PDFProcessor
+from utils.text_cleaner import TextCleaner
+from .models import (
+    Document, DocumentCategory, DocumentPage, ExtractionCacheEntry, ProcessingJob, UploadSession
+)
+from .services import (
+    BatchProcessor, ChunkedUploadService, ExtractionCache, NearDuplicateIndex, ProcessingQueue,
+    SearchBackend, SQLiteFTS5Backend, UploadOffsetError, get_search_backend
+)
+from .views import DocumentDeleteView, DocumentListView
+
+User = get_user_model()
+
+
+def make_pdf(path, pages):
+    """Write a PDF with one page per entry in ``pages``."""
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def pdf_bytes(pages):
+    """Return the (reproducible) bytes of a PDF with one page per entry in ``pages``."""
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.set_metadata({})
+    data = doc.tobytes(no_new_id=True)
+    doc.close()
+    return data
+
+
+class PDFProcessorTests(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pdf_path = make_pdf(
+            os.path.join(self.tmpdir.name, 'policy.pdf'),
+            ['First page', 'Second page', 'Third page']
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_iter_pages_yields_numbered_pages(self):
+        pages = list(PDFProcessor.iter_pages(self.pdf_path))
+
+        self.assertEqual([number for number, _ in pages], [1, 2, 3])
+        self.assertIn('Second page', pages[1][1])
+
+    def test_iter_pages_respects_range(self):
+        pages = list(PDFProcessor.iter_pages(self.pdf_path, start=2, end=10))
+
+        self.assertEqual([number for number, _ in pages], [2, 3])
+        with self.assertRaises(ValueError):
+            list(PDFProcessor.iter_pages(self.pdf_path, start=0))
+
+    def test_extract_text_joins_pages(self):
+        text = PDFProcessor.extract_text(self.pdf_path)
+
+        self.assertEqual(
+            text,
+            ''.join(page for _, page in PDFProcessor.iter_pages(self.pdf_path))
+        )
+        self.assertEqual(PDFProcessor.extract_text(self.pdf_path, 3, 3).strip(), 'Third page')
+        self.assertIsNone(PDFProcessor.extract_text(os.path.join(self.tmpdir.name, 'missing.pdf')))
+
+    def test_extract_document_collects_text_and_stats(self):
+        result = PDFProcessor.extract_document(self.pdf_path)
+
+        self.assertEqual(result['text'], 'First page Second page Third page')
+        self.assertEqual(result['page_count'], 3)
+        self.assertEqual(result['pages'], ['First page', 'Second page', 'Third page'])
+        self.assertEqual(
+            result['page_char_counts'],
+            [len(text) for _, text in PDFProcessor.iter_pages(self.pdf_path)]
+        )
+        self.assertEqual(result['metadata']['format'], 'PDF 1.7')
+
+
+class BoundedExtractionTests(SimpleTestCase):
+    PAGES = 1000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.pdf_path = os.path.join(cls.tmpdir.name, 'large.pdf')
+        line = 'We collect personal data and share it with third parties. ' * 2
+        doc = fitz.open()
+        for number in range(cls.PAGES):
+            page = doc.new_page()
+            for row in range(5):
+                page.insert_text((36, 36 + row * 12), f'{number}.{row} {line}', fontsize=7)
+        doc.save(cls.pdf_path)
+        doc.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+        super().tearDownClass()
+
+    def peak_memory(self, limits):
+        tracemalloc.start()
+        try:
+            result = PDFProcessor.extract_document(self.pdf_path, limits=limits)
+            return result, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_byte_limit_keeps_peak_memory_under_budget(self):
+        budget = 256 * 1024
+        result, peak = self.peak_memory(ExtractionLimits(max_bytes=budget))
+
+        self.assertEqual(result['limit_reached'], 'bytes')
+        self.assertEqual(result['page_count'], self.PAGES)
+        self.assertLess(len(result['pages']), self.PAGES)
+        self.assertLessEqual(len(result['text'].encode('utf-8')), budget + len(result['pages']))
+        self.assertLess(peak, 4 * budget)
+
+    def test_peak_memory_is_proportional_to_the_text(self):
+        result, peak = self.peak_memory(ExtractionLimits())
+
+        self.assertEqual(result['limit_reached'], '')
+        self.assertEqual(' '.join(result['pages']).split(), result['text'].split())
+        # The text whole and by page, plus the pieces it is joined from
+        self.assertLess(peak, 4 * len(result['text'].encode('utf-8')))
+
+    def test_page_and_time_limits_return_partial_results(self):
+        result = PDFProcessor.extract_document(self.pdf_path, limits=ExtractionLimits(max_pages=10))
+        self.assertEqual(result['limit_reached'], 'pages')
+        self.assertEqual(len(result['pages']), 10)
+        self.assertTrue(result['text'].startswith('0.0 We collect'))
+
+        result = PDFProcessor.extract_document(self.pdf_path, limits=ExtractionLimits(max_seconds=0))
+        self.assertEqual(result['limit_reached'], 'seconds')
+        self.assertEqual(result['text'], '')
+
+
+class BatchProcessorTests(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = [
+            make_pdf(os.path.join(self.tmpdir.name, f'{number}.pdf'), [f'Policy {number}'])
+            for number in range(3)
+        ]
+        self.paths.append(os.path.join(self.tmpdir.name, 'missing.pdf'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_map_files_reports_every_path(self):
+        for workers in (1, 2):
+            results = sorted(BatchProcessor(max_workers=workers).map_files(self.paths))
+
+            self.assertEqual([index for index, _, _ in results], [0, 1, 2, 3])
+            self.assertEqual(results[1][1]['text'], 'Policy 1')
+            self.assertIsNone(results[1][2])
+            self.assertIsNone(results[3][1])
+            self.assertTrue(results[3][2])
+
+
+class DocumentTestCase(TestCase):
+    """Base class that stores uploads in a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media.cleanup()
+
+    def upload(self, pages, title='Policy'):
+        return self.client.post('/api/documents/documents/', {
+            'title': title,
+            'file': SimpleUploadedFile('policy.pdf', pdf_bytes(pages), 'application/pdf'),
+        }, format='multipart')
+
+
+class ProcessingQueueTests(DocumentTestCase):
+    def test_upload_is_queued_until_worker_runs(self):
+        response = self.upload(['We collect personal data.'])
+        self.assertEqual(response.status_code, 201)
+        document_id = response.data['id']
+
+        status = self.client.get(f'/api/documents/documents/{document_id}/status/').data
+        self.assertFalse(status['is_processed'])
+        self.assertEqual(status['state'], ProcessingJob.State.PENDING)
+        self.assertEqual(status['queue_position'], 1)
+
+        call_command('process_documents', once=True, stdout=open(os.devnull, 'w'))
+
+        status = self.client.get(f'/api/documents/documents/{document_id}/status/').data
+        self.assertTrue(status['is_processed'])
+        self.assertEqual(status['state'], ProcessingJob.State.SUCCEEDED)
+        self.assertEqual(status['attempts'], 1)
+        self.assertIsNotNone(status['duration'])
+        self.assertEqual(
+            Document.objects.get(pk=document_id).processed_text,
+            'We collect personal data.'
+        )
+
+    def test_failed_job_records_error(self):
+        document_id = self.upload(['Policy']).data['id']
+        document = Document.objects.get(pk=document_id)
+        os.remove(document.file.path)
+
+        job = ProcessingQueue().run_next()
+
+        self.assertEqual(job.state, ProcessingJob.State.FAILED)
+        self.assertTrue(job.error)
+        self.assertIsNone(ProcessingQueue().run_next())
+
+    def test_enqueue_does_not_duplicate_pending_jobs(self):
+        document = Document.objects.get(pk=self.upload(['Policy']).data['id'])
+
+        ProcessingQueue().enqueue(document)
+
+        self.assertEqual(document.processing_jobs.count(), 1)
+
+    @override_settings(DOCUMENT_PROCESSING_ASYNC=False)
+    def test_synchronous_mode_processes_on_upload(self):
+        document_id = self.upload(['Inline policy']).data['id']
+
+        self.assertTrue(Document.objects.get(pk=document_id).is_processed)
+
+
+class ExtractionCacheTests(DocumentTestCase):
+    def test_upload_hash_is_computed_while_streaming(self):
+        data = pdf_bytes(['Hash me'])
+        response = self.client.post('/api/documents/documents/', {
+            'title': 'Policy',
+            'file': SimpleUploadedFile('policy.pdf', data, 'application/pdf'),
+        }, format='multipart')
+
+        document = Document.objects.get(pk=response.data['id'])
+        self.assertEqual(document.content_hash, hashlib.sha256(data).hexdigest())
+
+    def test_identical_upload_is_served_from_cache(self):
+        first = self.upload(['Vendor policy text'])
+        ProcessingQueue().run_next()
+        before = ExtractionCache().stats()
+
+        second = self.upload(['Vendor policy text'])
+
+        document = Document.objects.get(pk=second.data['id'])
+        self.assertTrue(document.is_processed)
+        self.assertEqual(
+            document.processed_text,
+            Document.objects.get(pk=first.data['id']).processed_text
+        )
+        self.assertEqual(document.processing_jobs.get().state, ProcessingJob.State.SUCCEEDED)
+        stats = self.client.get('/api/documents/documents/cache_stats/').data
+        self.assertEqual(stats['hits'], before['hits'] + 1)
+        self.assertEqual(stats['entries'], 1)
+
+    def test_batch_process_extracts_identical_files_once(self):
+        ids = [self.upload(['Same bytes']).data['id'] for _ in range(2)]
+        entries_before = ExtractionCacheEntry.objects.count()
+
+        response = self.client.post(
+            '/api/documents/documents/batch_process/',
+            {'document_ids': ids},
+            format='json'
+        )
+
+        self.assertEqual([result['status'] for result in response.data], ['success', 'success'])
+        self.assertEqual(ExtractionCacheEntry.objects.count(), entries_before + 1)
+        self.assertEqual(Document.objects.filter(is_processed=True).count(), 2)
+        self.assertEqual(
+            list(Document.objects.values_list('page_count', flat=True)), [1, 1]
+        )
+
+    @override_settings(DOCUMENT_EXTRACTION_MAX_PAGES=2)
+    def test_partial_extraction_is_reported_and_not_cached(self):
+        response = self.upload(['One', 'Two', 'Three'])
+        ProcessingQueue().run_next()
+
+        document = Document.objects.get(pk=response.data['id'])
+        self.assertEqual(document.processed_text, 'One Two')
+        self.assertEqual(document.extraction_limit, 'pages')
+        self.assertEqual(document.page_count, 3)
+        self.assertFalse(ExtractionCacheEntry.objects.exists())
+        status = self.client.get(f'/api/documents/documents/{document.id}/status/').data
+        self.assertEqual(status['extraction_limit'], 'pages')
+
+    def test_page_stats_are_stored_and_restored_from_cache(self):
+        first = self.upload(['One', 'Two'])
+        ProcessingQueue().run_next()
+        second = self.upload(['One', 'Two'])
+
+        for response in (first, second):
+            data = self.client.get(f"/api/documents/documents/{response.data['id']}/").data
+            self.assertEqual(data['page_count'], 2)
+            self.assertEqual(len(data['page_char_counts']), 2)
+            self.assertIn('format', data['pdf_metadata'])
+
+
+class StreamingBatchTests(DocumentTestCase):
+    def post_stream(self, ids, fmt):
+        response = self.client.post(
+            f'/api/documents/documents/batch_process/?stream={fmt}',
+            {'document_ids': ids},
+            format='json'
+        )
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_stream_reports_every_document(self):
+        ids = [self.upload([f'Policy {number}']).data['id'] for number in range(3)]
+        os.remove(Document.objects.get(pk=ids[1]).file.path)
+
+        response, body = self.post_stream(ids, 'ndjson')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        results = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(sorted(result['index'] for result in results), [0, 1, 2])
+        by_id = {result['id']: result for result in results}
+        self.assertEqual(by_id[ids[0]]['status'], 'success')
+        self.assertEqual(by_id[ids[1]]['status'], 'error')
+        self.assertEqual(by_id[ids[2]]['status'], 'success')
+        self.assertEqual(
+            Document.objects.get(pk=ids[2]).processed_text, 'Policy 2'
+        )
+
+    def test_sse_stream_ends_with_done_event(self):
+        ids = [self.upload(['Policy']).data['id']]
+
+        response, body = self.post_stream(ids, 'sse')
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = body.strip().split('\n\n')
+        self.assertTrue(events[0].startswith('event: result\ndata: '))
+        self.assertEqual(events[-1], 'event: done\ndata: {"count":1}')
+
+
+class DocumentPageTests(DocumentTestCase):
+    def setUp(self):
+        super().setUp()
+        response = self.upload([f'Page {number}' for number in range(1, 6)])
+        ProcessingQueue().run_next()
+        self.document = Document.objects.get(pk=response.data['id'])
+
+    def test_pages_are_stored_at_ingest(self):
+        pages = list(self.document.pages.all())
+
+        self.assertEqual([page.number for page in pages], [1, 2, 3, 4, 5])
+        self.assertEqual(pages[1].text, 'Page 2')
+        self.assertEqual(pages[1].char_count, 6)
+        self.assertEqual(pages[1].sha256, hashlib.sha256(b'Page 2').hexdigest())
+        self.assertEqual(self.document.get_page_text(2, 3), 'Page 2 Page 3')
+
+    def test_page_range_api(self):
+        url = f'/api/documents/documents/{self.document.id}/pages/'
+
+        response = self.client.get(url, {'start': 2, 'end': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([page['text'] for page in response.data['pages']], ['Page 2', 'Page 3'])
+
+        with override_settings(DOCUMENT_PAGE_RANGE_LIMIT=2):
+            response = self.client.get(url, {'start': 4})
+        self.assertEqual(response.data['end'], 5)
+        self.assertEqual(len(response.data['pages']), 2)
+
+        self.assertEqual(self.client.get(url, {'start': 0}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': 'x'}).status_code, 400)
+
+    def test_reprocessing_replaces_pages(self):
+        ProcessingQueue().enqueue(self.document)
+        ProcessingQueue().run_next()
+
+        self.assertEqual(DocumentPage.objects.filter(document=self.document).count(), 5)
+
+
+class IncrementalVersionTests(DocumentTestCase):
+    def test_new_version_reuses_unchanged_pages(self):
+        response = self.upload(['Intro', 'We collect email.', 'Contact us'])
+        ProcessingQueue().run_next()
+        document_id = response.data['id']
+
+        response = self.client.patch(f'/api/documents/documents/{document_id}/', {
+            'file': SimpleUploadedFile(
+                'policy-v2.pdf',
+                pdf_bytes(['Intro', 'We sell email.', 'Contact us']),
+                'application/pdf'
+            ),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        ProcessingQueue().run_next()
+
+        document = Document.objects.get(pk=document_id)
+        parent = document.parent_version
+        self.assertEqual(document.version, 2)
+        self.assertNotEqual(parent.pk, document.pk)
+        self.assertEqual(document.pages_reused, 2)
+        self.assertEqual(document.processed_text, 'Intro We sell email. Contact us')
+        self.assertEqual(
+            list(document.pages.values_list('text', flat=True)),
+            ['Intro', 'We sell email.', 'Contact us']
+        )
+        self.assertEqual(parent.pages.get(number=2).text, 'We collect email.')
+        history = self.client.get(f'/api/documents/documents/{document_id}/').data['version_history']
+        self.assertEqual([entry['pages_reused'] for entry in history], [0, 2])
+
+    def test_archived_versions_are_left_out_of_list_and_search(self):
+        document_id = self.upload(['We collect email.']).data['id']
+        ProcessingQueue().run_next()
+        self.client.patch(f'/api/documents/documents/{document_id}/', {
+            'file': SimpleUploadedFile('policy-v2.pdf', pdf_bytes(['We sell email.']),
+                                       'application/pdf'),
+        }, format='multipart')
+        ProcessingQueue().run_next()
+        archived = Document.objects.get(pk=document_id).parent_version
+
+        self.assertTrue(archived.is_archived)
+        listed = self.client.get('/api/documents/documents/').data['results']
+        self.assertEqual([(item['id'], item['version']) for item in listed], [(document_id, 2)])
+        for query in ('email', 'collect'):
+            found = self.client.get('/api/documents/documents/search/', {'q': query}).data
+            self.assertEqual(
+                [item['id'] for item in found], [document_id] if query == 'email' else []
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM documents_document_fts WHERE documents_document_fts MATCH 'collect'"
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
+        versions = self.client.get(f'/api/documents/documents/{document_id}/versions/').data
+        self.assertEqual([item['id'] for item in versions], [archived.id, document_id])
+        self.assertEqual(
+            self.client.get(f'/api/documents/documents/{archived.id}/').status_code, 200
+        )
+        response = self.client.get(f'/api/documents/documents/{document_id}/diff/')
+        self.assertEqual(response.status_code, 200)
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+        for view in (DocumentListView, DocumentDeleteView):
+            self.assertEqual(
+                list(view(request=request).get_queryset().values_list('id', flat=True)),
+                [document_id]
+            )
+
+    def test_pages_drawn_through_xobjects_are_not_confused(self):
+        def wrapped(pages):
+            """A PDF whose pages only draw the given pages as form XObjects."""
+            source = fitz.open(stream=pdf_bytes(pages), filetype='pdf')
+            doc = fitz.open()
+            for number in range(len(pages)):
+                page = doc.new_page()
+                page.show_pdf_page(page.rect, source, number)
+            data = doc.tobytes(no_new_id=True)
+            doc.close()
+            source.close()
+            return data
+
+        response = self.client.post('/api/documents/documents/', {
+            'title': 'Policy',
+            'file': SimpleUploadedFile('policy.pdf', wrapped(['We collect email.', 'Contact us']),
+                                       'application/pdf'),
+        }, format='multipart')
+        ProcessingQueue().run_next()
+        document_id = response.data['id']
+
+        self.client.patch(f'/api/documents/documents/{document_id}/', {
+            'file': SimpleUploadedFile(
+                'policy-v2.pdf',
+                wrapped(['We collect email.', 'We sell your data to brokers.']),
+                'application/pdf'
+            ),
+        }, format='multipart')
+        ProcessingQueue().run_next()
+
+        document = Document.objects.get(pk=document_id)
+        self.assertEqual(document.processed_text, 'We collect email. We sell your data to brokers.')
+        self.assertEqual(document.pages_reused, 1)
+
+
+def policy_text(seed, words=400):
+    rng = random.Random(seed)
+    vocabulary = [f'word{number}' for number in range(500)]
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+
+class MinHashTests(SimpleTestCase):
+    def test_signature_estimates_jaccard_similarity(self):
+        hasher = MinHasher(num_perm=256)
+        words = policy_text(0).split()
+        edited = ' '.join(words[:300] + policy_text(1, 100).split())
+
+        estimate = similarity(hasher.signature(' '.join(words)), hasher.signature(edited))
+        self.assertAlmostEqual(float(estimate), 296 / 496, delta=0.1)
+        self.assertEqual(
+            float(similarity(hasher.signature(policy_text(0)), hasher.signature(policy_text(0).upper()))),
+            1.0
+        )
+
+    def test_lsh_index_returns_near_duplicates_only(self):
+        hasher = MinHasher()
+        index = LSHIndex(bands=16)
+        index.update((seed, hasher.signature(policy_text(seed))) for seed in range(50))
+        words = policy_text(7).split()
+        words[200] = 'changed'
+
+        matches = index.query(hasher.signature(' '.join(words)), threshold=0.8)
+        self.assertEqual([key for key, _ in matches], [7])
+
+
+class NearDuplicateTests(DocumentTestCase):
+    def test_similar_action_finds_near_duplicates(self):
+        words = policy_text(0).split()
+        texts = [' '.join(words), ' '.join(words[:-5] + ['vendor'] * 5), policy_text(1)]
+        documents = [
+            Document.objects.create(
+                user=self.user, title=f'Vendor {number}', processed_text=text, is_processed=True
+            )
+            for number, text in enumerate(texts)
+        ]
+        NearDuplicateIndex().index(documents)
+
+        response = self.client.get(f'/api/documents/documents/{documents[0].id}/similar/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([match['id'] for match in response.data['similar']], [documents[1].id])
+        self.assertGreater(response.data['similar'][0]['similarity'], 0.9)
+
+        response = self.client.get(
+            f'/api/documents/documents/{documents[0].id}/similar/?threshold=0'
+        )
+        self.assertEqual(len(response.data['similar']), 1)
+
+        Document.objects.filter(pk=documents[1].pk).update(is_archived=True)
+        response = self.client.get(f'/api/documents/documents/{documents[0].id}/similar/')
+        self.assertEqual(response.data['similar'], [])
+
+    def test_processing_indexes_the_document(self):
+        response = self.upload(['We collect email addresses and share them with partners.'])
+        ProcessingQueue().run_next()
+
+        document = Document.objects.get(pk=response.data['id'])
+        self.assertEqual(len(document.minhash), 128 * 4)
+        self.assertEqual(document.minhash_buckets.count(), 16)
+
+
+class SearchIndexTests(DocumentTestCase):
+    def create(self, title, text):
+        return Document.objects.create(
+            title=title, user=self.user, processed_text=text, is_processed=True
+        )
+
+    def search(self, query):
+        response = self.client.get('/api/documents/documents/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [document['title'] for document in response.data]
+
+    def test_search_uses_the_full_text_index(self):
+        self.assertEqual(get_search_backend().name, 'fts5')
+        self.create('Mentions', 'We collect personal data. Personal data is sold.')
+        self.create('Passing', 'We collect personal data once, when you sign up for the service.')
+        self.create('Unrelated', 'Cookies are used for tracking.')
+
+        self.assertEqual(self.search('Personal DATA'), ['Mentions', 'Passing'])
+        self.assertEqual(self.search('collect'), ['Mentions', 'Passing'])
+        self.assertEqual(self.search('unrelated'), ['Unrelated'])
+        self.assertEqual(self.search('data"* -'), ['Mentions', 'Passing'])
+
+    def test_search_composes_with_later_filters(self):
+        category = DocumentCategory.objects.create(name='Vendors')
+        matching = self.create('Vendor', 'We collect personal data.')
+        matching.category = category
+        matching.save()
+        self.create('Other', 'We collect personal data.')
+        Document.objects.create(
+            title='Pending', user=self.user, processed_text='We collect data.', is_processed=False
+        )
+
+        response = self.client.get('/api/documents/documents/search/', {
+            'q': 'collect', 'category': category.id, 'is_processed': 'true'
+        })
+        self.assertEqual([document['title'] for document in response.data], ['Vendor'])
+        response = self.client.get(
+            '/api/documents/documents/search/', {'q': 'collect', 'is_processed': 'false'}
+        )
+        self.assertEqual([document['title'] for document in response.data], ['Pending'])
+        with self.assertRaises(TypeError):
+            SearchBackend()
+
+    def test_index_follows_ingest_updates_and_deletes(self):
+        document_id = self.upload(['Biometric identifiers are stored.']).data['id']
+        self.assertEqual(self.search('biometric'), [])
+        ProcessingQueue().run_next()
+        self.assertEqual(self.search('biometric'), ['Policy'])
+
+        document = Document.objects.get(pk=document_id)
+        document.processed_text = 'Nothing sensitive.'
+        document.save()
+        self.assertEqual(self.search('biometric'), [])
+        self.assertEqual(self.search('sensitive'), ['Policy'])
+
+        document.delete()
+        self.assertEqual(self.search('sensitive'), [])
+
+    def test_only_title_and_text_changes_rebuild_the_search_vector(self):
+        document = self.create('Policy', 'Biometric identifiers are stored.')
+        other = User.objects.create_user(username='other', email='other@example.com',
+                                         password='testpass123')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/api/documents/documents/{document.id}/share/',
+                                        {'user_ids': [other.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('search_vector' in query['sql'] for query in queries))
+        self.assertTrue(Document.objects.get(pk=document.pk).is_shared)
+
+        document = Document.objects.get(pk=document.pk)
+        document.title = 'Renamed'
+        document.save(update_fields=['title'])
+        self.assertEqual(self.search('renamed'), ['Renamed'])
+        self.assertEqual(self.search('biometric'), ['Renamed'])
+
+    def test_auto_backend_is_resolved_once(self):
+        SQLiteFTS5Backend.expire()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_search_backend().name, 'fts5')
+        self.assertGreater(len(queries), 0)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_search_backend().name, 'fts5')
+        self.assertEqual(len(queries), 0)
+
+    @override_settings(DOCUMENT_SEARCH_BACKEND='like')
+    def test_like_backend_fallback(self):
+        self.create('Mentions', 'We collect personal data.')
+        self.create('Unrelated', 'Cookies are used for tracking.')
+
+        self.assertEqual(get_search_backend().name, 'like')
+        self.assertEqual(self.search('Personal  Data'), ['Mentions'])
+
+
+class ZeroStream:
+    """File-like object producing ``size`` zero bytes without holding them."""
+
+    def __init__(self, size):
+        self.remaining = size
+
+    def read(self, size):
+        size = min(size, self.remaining)
+        self.remaining -= size
+        return bytes(size)
+
+
+class ChunkedUploadTests(DocumentTestCase):
+    def start(self, data, **extra):
+        response = self.client.post('/api/documents/uploads/', {
+            'title': 'Bundle',
+            'filename': 'bundle.pdf',
+            'total_size': len(data),
+            **extra
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return f"/api/documents/uploads/{response.data['id']}/"
+
+    def put_chunk(self, url, data, offset):
+        return self.client.put(
+            url + 'chunk/', data,
+            content_type='application/octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_resumed_upload_creates_document(self):
+        data = pdf_bytes(['Chunked policy'] * 3)
+        url = self.start(data, expected_sha256=hashlib.sha256(data).hexdigest())
+        half = len(data) // 2
+
+        self.assertEqual(self.put_chunk(url, data[:half], 0).data['offset'], half)
+        conflict = self.put_chunk(url, data[half:], 0)
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(conflict.data['offset'], half)
+
+        # A different worker (or a restart) has no running digest to continue.
+        ChunkedUploadService._hashers.clear()
+        self.assertEqual(self.client.get(url).data['offset'], half)
+        self.assertTrue(self.put_chunk(url, data[half:], half).data['complete'])
+        response = self.client.post(url + 'complete/')
+
+        self.assertEqual(response.status_code, 201)
+        document = Document.objects.get(pk=response.data['id'])
+        self.assertEqual(document.content_hash, hashlib.sha256(data).hexdigest())
+        self.assertEqual(document.file_size, len(data))
+        self.assertEqual(document.processing_jobs.get().state, ProcessingJob.State.PENDING)
+        self.assertFalse(os.path.exists(UploadSession.objects.get().temp_path))
+
+    def test_losing_request_for_an_offset_leaves_the_file_alone(self):
+        data = pdf_bytes(['Chunked policy'] * 3)
+        url = self.start(data, expected_sha256=hashlib.sha256(data).hexdigest())
+        session = UploadSession.objects.get()
+        # Both requests read the session before either claimed offset 0
+        stale = UploadSession.objects.get()
+        service = ChunkedUploadService()
+
+        service.write_chunk(session, 0, io.BytesIO(data), len(data))
+        with self.assertRaises(UploadOffsetError):
+            service.write_chunk(stale, 0, io.BytesIO(b'X' * len(data)), len(data))
+
+        with open(session.temp_path, 'rb') as partial:
+            self.assertEqual(partial.read(), data)
+        self.assertEqual(self.client.post(url + 'complete/').status_code, 201)
+        self.assertEqual(self.client.post(url + 'complete/').status_code, 400)
+        self.assertEqual(Document.objects.count(), 1)
+
+    def test_incomplete_or_invalid_uploads_are_rejected(self):
+        data = pdf_bytes(['Policy'])
+        url = self.start(data, expected_sha256='0' * 64)
+
+        self.assertEqual(self.client.post(url + 'complete/').status_code, 400)
+        self.put_chunk(url, data, 0)
+        response = self.client.post(url + 'complete/')
+        self.assertEqual(response.data['error'], 'Checksum mismatch')
+
+        response = self.client.post('/api/documents/uploads/', {
+            'title': 'Bundle', 'filename': 'bundle.exe', 'total_size': 10
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_memory_does_not_grow_with_file_size(self):
+        service = ChunkedUploadService()
+        peaks = []
+        for size in (4 * 1024 * 1024, 32 * 1024 * 1024):
+            session = UploadSession.objects.create(
+                user=self.user, title='Big', filename='big.pdf', total_size=size
+            )
+            tracemalloc.start()
+            with override_settings(DOCUMENT_UPLOAD_CHUNK_SIZE=size):
+                service.write_chunk(session, 0, ZeroStream(size), size)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            service.abort(session)
+
+        self.assertLess(peaks[1], 1024 * 1024)
+        self.assertLess(peaks[1], peaks[0] * 2)
+
+
+def legacy_clean_text(text):
+    """The four-pass implementation TextCleaner replaces, kept as a reference."""
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'<.*?>', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s.,!?-]', '', text)
+    return text.strip()
+
+
+class TextCleanerTests(SimpleTestCase):
+    ALPHABET = list('ab c\n\t.,!?-_<>/:@#$%é€  \x00') + [
+        'http://example.com/a?b=1', 'www.', 'https', '<p>', '</a>', '\r\n',
+        '\n\n', 'ﬁ', '٣', 'Privacy Policy',
+    ]
+
+    def random_texts(self, count, seed=0):
+        rng = random.Random(seed)
+        for _ in range(count):
+            yield rng, ''.join(
+                rng.choice(self.ALPHABET) for _ in range(rng.randint(0, 80))
+            )
+
+    def test_clean_matches_legacy_output(self):
+        cleaner = TextCleaner()
+        for _, text in self.random_texts(3000):
+            self.assertEqual(cleaner.clean(text), legacy_clean_text(text), repr(text))
+        self.assertEqual(PDFProcessor.clean_text(' <b>Hi</b>  see https://x.io, ok! '), 'Hi see ok!')
+
+    def test_clean_stream_matches_clean_of_joined_text(self):
+        cleaner = TextCleaner()
+        for rng, text in self.random_texts(3000, seed=1):
+            cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, 5)))
+            chunks = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+            self.assertEqual(
+                ''.join(cleaner.clean_stream(chunks)),
+                legacy_clean_text(text),
+                repr(chunks)
+            )
+
+    def test_rule_subsets(self):
+        text = 'Visit <i>www.example.com</i>   now @ home'
+
+        self.assertEqual(TextCleaner(['whitespace']).clean(text), 'Visit <i>www.example.com</i> now @ home')
+        self.assertEqual(TextCleaner(['html', 'special_chars']).clean(text), 'Visit www.example.com   now  home')
+        with self.assertRaises(ValueError):
+            TextCleaner(['stopwords'])
@@ -0,0 +1,38 @@
+import hashlib
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+
+class HashingUploadMixin:
+    """
+    Compute the SHA-256 of an uploaded file while its chunks stream in.
+
+    The digest is attached to the resulting UploadedFile as ``sha256`` so the
+    file does not have to be read a second time to key the extraction cache.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # Set up the digest first: the memory handler signals that it owns the
+        # file by raising StopFutureHandlers from new_file.
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views_api import DocumentViewSet, DocumentCategoryViewSet
+from .views_api import DocumentViewSet, DocumentCategoryViewSet, UploadSessionViewSet
 
 router = DefaultRouter()
 router.register(r'documents', DocumentViewSet, basename='document')
 router.register(r'categories', DocumentCategoryViewSet, basename='category')
+router.register(r'uploads', UploadSessionViewSet, basename='upload')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -5,7 +5,7 @@ from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
 from .models import Document
 from .forms import DocumentForm
-from utils.pdf_processor import PDFProcessor
+from .services import ProcessingQueue
 
 
 class DocumentListView(LoginRequiredMixin, ListView):
@@ -15,7 +15,10 @@ class DocumentListView(LoginRequiredMixin, ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        return Document.objects.filter(user=self.request.user).order_by('-uploaded_at')
+        # Archived versions are listed with their document, not on their own
+        return Document.objects.filter(
+            user=self.request.user, is_archived=False
+        ).order_by('-uploaded_at')
 
 
 class DocumentDetailView(LoginRequiredMixin, DetailView):
@@ -37,21 +40,10 @@ class DocumentCreateView(LoginRequiredMixin, CreateView):
         form.instance.user = self.request.user
         response = super().form_valid(form)
         
-        # Process the document
-        try:
-            pdf_processor = PDFProcessor()
-            text = pdf_processor.extract_text(self.object.file.path)
-            if text:
-                cleaned_text = pdf_processor.clean_text(text)
-                self.object.processed_text = cleaned_text
-                self.object.is_processed = True
-                self.object.save()
-                messages.success(self.request, 'Document processed successfully.')
-            else:
-                messages.warning(self.request, 'Could not extract text from the document.')
-        except Exception as e:
-            messages.error(self.request, f'Error processing document: {str(e)}')
-        
+        # Queue the document for text extraction
+        ProcessingQueue().enqueue(self.object)
+        messages.success(self.request, 'Document uploaded. Text extraction has been queued.')
+
         return response
 
 
@@ -61,7 +53,7 @@ class DocumentDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy('documents:list')
 
     def get_queryset(self):
-        return Document.objects.filter(user=self.request.user)
+        return Document.objects.filter(user=self.request.user, is_archived=False)
 
     def delete(self, request, *args, **kwargs):
         messages.success(request, 'Document deleted successfully.')
@@ -1,10 +1,20 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
 from django.db.models import Q
-from .models import Document, DocumentCategory
-from .serializers import DocumentSerializer, DocumentCategorySerializer
-from utils.pdf_processor import PDFProcessor
+from apps.analysis.serializers import DocumentAnalysisSerializer
+from apps.analysis.services import DocumentAnalysisService, VersionDiffService
+from apps.core.streaming import stream_format, stream_response
+from .models import Document, DocumentCategory, ProcessingJob, UploadSession
+from .serializers import (
+    DocumentSerializer, DocumentCategorySerializer, DocumentPageSerializer,
+    UploadSessionSerializer
+)
+from .services import (
+    BatchProcessor, ChunkedUploadService, ExtractionCache, NearDuplicateIndex,
+    ProcessingQueue, UploadError, UploadOffsetError, get_search_backend
+)
 
 
 class DocumentCategoryViewSet(viewsets.ModelViewSet):
@@ -21,25 +31,98 @@ class DocumentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        return Document.objects.filter(
+        # search_vector is a second copy of the text that only the index reads
+        queryset = Document.objects.filter(
             Q(user=user) | Q(shared_with=user)
-        ).distinct()
+        ).distinct().defer('search_vector')
+        if self.action in ('list', 'search'):
+            # Archived versions stay reachable by id, through versions and diff
+            queryset = queryset.filter(is_archived=False)
+        return queryset
 
     def perform_create(self, serializer):
         document = serializer.save(user=self.request.user)
+        ProcessingQueue().enqueue(document)
+
+    def perform_update(self, serializer):
+        previous_version = serializer.instance.version
+        document = serializer.save()
+        if document.version != previous_version:
+            ProcessingQueue().enqueue(document)
+
+    @action(detail=True, methods=['get'], url_path='status')
+    def processing_status(self, request, pk=None):
+        document = self.get_object()
+        job = document.processing_jobs.order_by('-created_at').first()
+        data = {
+            'id': document.id,
+            'is_processed': document.is_processed,
+            'version': document.version,
+            'pages_reused': document.pages_reused,
+            'extraction_limit': document.extraction_limit,
+            'state': job.state if job else None,
+            'attempts': job.attempts if job else 0,
+            'queued_at': job.created_at if job else None,
+            'started_at': job.started_at if job else None,
+            'finished_at': job.finished_at if job else None,
+            'duration': job.duration if job else None,
+            'error': job.error if job else '',
+        }
+        if job and job.state == ProcessingJob.State.PENDING:
+            data['queue_position'] = ProcessingJob.objects.filter(
+                state=ProcessingJob.State.PENDING,
+                created_at__lt=job.created_at
+            ).count() + 1
+        return Response(data)
+
+    @action(detail=True, methods=['get'])
+    def pages(self, request, pk=None):
+        document = self.get_object()
+        limit = getattr(settings, 'DOCUMENT_PAGE_RANGE_LIMIT', 50)
         try:
-            pdf_processor = PDFProcessor()
-            text = pdf_processor.extract_text(document.file.path)
-            if text:
-                cleaned_text = pdf_processor.clean_text(text)
-                document.processed_text = cleaned_text
-                document.is_processed = True
-                document.save()
-        except Exception as e:
+            start = int(request.query_params.get('start', 1))
+            end = int(request.query_params.get('end', start + limit - 1))
+        except ValueError:
             return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'start and end must be page numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start < 1 or end < start:
+            return Response(
+                {'error': 'Invalid page range'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        end = min(end, start + limit - 1, document.page_count)
+        pages = document.get_pages(start, end)
+        return Response({
+            'id': document.id,
+            'page_count': document.page_count,
+            'start': start,
+            'end': end,
+            'pages': DocumentPageSerializer(pages, many=True).data
+        })
+
+    @action(detail=True, methods=['get'])
+    def analysis(self, request, pk=None):
+        document = self.get_object()
+        if not document.is_processed:
+            return Response(
+                {'error': 'Document has not been processed yet'},
+                status=status.HTTP_409_CONFLICT
+            )
+        analysis = DocumentAnalysisService().get_analysis(document)
+        if analysis is None:
+            return Response(
+                {'error': 'No analysis available for this document'},
+                status=status.HTTP_404_NOT_FOUND
             )
+        return Response(DocumentAnalysisSerializer(analysis).data)
+
+    @action(detail=True, methods=['get'], url_path='analysis/history')
+    def analysis_history(self, request, pk=None):
+        document = self.get_object()
+        analyses = document.analyses.order_by('-version')
+        return Response(DocumentAnalysisSerializer(analyses, many=True).data)
 
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
@@ -60,6 +143,55 @@ class DocumentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(versions, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def diff(self, request, pk=None):
+        document = self.get_object()
+        versions = {version.version: version for version in document.get_version_history()}
+        try:
+            to_version = int(request.query_params.get('to', document.version))
+            from_version = int(request.query_params.get('from', to_version - 1))
+        except ValueError:
+            return Response(
+                {'error': 'from and to must be version numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if from_version not in versions or to_version not in versions:
+            return Response(
+                {'error': 'Version not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        old, new = versions[from_version], versions[to_version]
+        if not (old.is_processed and new.is_processed):
+            return Response(
+                {'error': 'Both versions must be processed'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(VersionDiffService().diff(old, new))
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        document = self.get_object()
+        try:
+            threshold = float(request.query_params.get(
+                'threshold', getattr(settings, 'DOCUMENT_SIMILARITY_THRESHOLD', 0.8)
+            ))
+        except ValueError:
+            return Response(
+                {'error': 'threshold must be a number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not document.minhash:
+            return Response(
+                {'error': 'Document has not been processed yet'},
+                status=status.HTTP_409_CONFLICT
+            )
+        candidates = self.get_queryset().filter(is_archived=False)
+        return Response({
+            'id': document.id,
+            'threshold': threshold,
+            'similar': NearDuplicateIndex().similar(document, candidates, threshold)
+        })
+
     @action(detail=True, methods=['post'])
     def share(self, request, pk=None):
         document = self.get_object()
@@ -95,10 +227,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
         queryset = self.get_queryset()
         
         if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) |
-                Q(processed_text__icontains=query)
-            )
+            queryset = get_search_backend().search(queryset, query)
         
         if category:
             queryset = queryset.filter(category_id=category)
@@ -119,36 +248,16 @@ class DocumentViewSet(viewsets.ModelViewSet):
             )
 
         documents = self.get_queryset().filter(id__in=document_ids)
-        pdf_processor = PDFProcessor()
-        results = []
-
-        for document in documents:
-            try:
-                text = pdf_processor.extract_text(document.file.path)
-                if text:
-                    cleaned_text = pdf_processor.clean_text(text)
-                    document.processed_text = cleaned_text
-                    document.is_processed = True
-                    document.save()
-                    results.append({
-                        'id': document.id,
-                        'status': 'success'
-                    })
-                else:
-                    results.append({
-                        'id': document.id,
-                        'status': 'error',
-                        'message': 'No text extracted'
-                    })
-            except Exception as e:
-                results.append({
-                    'id': document.id,
-                    'status': 'error',
-                    'message': str(e)
-                })
-
+        fmt = stream_format(request)
+        if fmt is not None:
+            return stream_response(BatchProcessor().iter_process(documents), fmt)
+        results = BatchProcessor().process(documents)
         return Response(results)
 
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        return Response(ExtractionCache().stats())
+
     @action(detail=False, methods=['post'])
     def batch_export(self, request):
         document_ids = request.data.get('document_ids', [])
@@ -168,4 +277,73 @@ class DocumentViewSet(viewsets.ModelViewSet):
             return Response(
                 {'error': 'Unsupported export format'},
                 status=status.HTTP_400_BAD_REQUEST
-            ) 
\ No newline at end of file
+            ) 
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.ListModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Resumable chunked uploads.
+
+    Create a session with the file name and size, PUT the raw bytes of each
+    chunk to ``chunk/`` with an ``Upload-Offset`` header, and POST to
+    ``complete/`` once every byte has arrived. After an interruption, GET the
+    session to find the offset to resume from.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        ChunkedUploadService().abort(instance)
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        session = self.get_object()
+        try:
+            offset = int(request.headers.get('Upload-Offset', request.query_params.get('offset', '')))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response(
+                {'error': 'Upload-Offset header is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            offset = ChunkedUploadService().write_chunk(session, offset, request.stream, length)
+        except UploadOffsetError as e:
+            return Response(
+                {'error': str(e), 'offset': e.offset},
+                status=status.HTTP_409_CONFLICT
+            )
+        except UploadError as e:
+            return Response(
+                {'error': str(e), 'offset': session.offset},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({
+            'id': session.id,
+            'offset': offset,
+            'total_size': session.total_size,
+            'complete': offset == session.total_size
+        })
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        session = self.get_object()
+        try:
+            document = ChunkedUploadService().complete(session)
+        except UploadError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = DocumentSerializer(document, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
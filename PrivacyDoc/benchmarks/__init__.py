@@ -0,0 +1,18 @@
+"""
+Performance benchmarks for the document and analysis pipelines.
+
+Run a benchmark from the project root, e.g. ``python -m benchmarks.bench_batch``.
+Synthetic inputs come from ``corpus`` and measurements from ``harness``.
+``bench_pipeline`` and ``bench_api`` cover every ingest and analysis stage;
+every benchmark takes ``--output`` to write a JSON report that
+``python -m benchmarks.compare`` diffs.
+"""
+import os
+
+import django
+
+
+def setup():
+    """Configure Django so benchmarks can import the project apps."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PrivacyDoc.settings')
+    django.setup()
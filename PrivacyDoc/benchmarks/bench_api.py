@@ -0,0 +1,95 @@
+"""
+End-to-end latency of the REST API through the DRF test client.
+
+    python -m benchmarks.bench_api --sizes small medium --documents 20 --output api.json
+
+Runs against a throwaway test database with uploads processed inline and
+the persistent analysis cache off. Every analyze and compare request sends
+a text that was not sent before, so no response comes from the cache.
+"""
+import argparse
+import itertools
+import tempfile
+
+from benchmarks import setup
+from benchmarks.corpus import make_policy, pdf_bytes
+from benchmarks.harness import Report, measure
+from benchmarks.bench_pipeline import parse_size
+
+
+def checked(response, status=200):
+    assert response.status_code == status, (response.status_code, response.content[:200])
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', default=['small', 'medium'])
+    parser.add_argument('--documents', type=int, default=20, help='Documents per batch')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc runs')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import override_settings
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases
+    from rest_framework.test import APIClient
+
+    setup_test_environment()
+    databases = setup_databases(verbosity=0, interactive=False)
+    report = Report('api', vars(args))
+    media = tempfile.TemporaryDirectory()
+    seeds = itertools.count(1000)
+    try:
+        with override_settings(MEDIA_ROOT=media.name, DOCUMENT_PROCESSING_ASYNC=False,
+                               ANALYSIS_CACHE_PERSIST=False):
+            client = APIClient()
+            client.force_authenticate(get_user_model().objects.create_user('bench', password='bench'))
+
+            def upload(kilobytes):
+                data = pdf_bytes(make_policy(kilobytes, next(seeds)))
+                return checked(client.post('/api/documents/documents/', {
+                    'title': 'Policy',
+                    'file': SimpleUploadedFile('policy.pdf', data, 'application/pdf'),
+                }, format='multipart'), 201).data['id']
+
+            def post(url, payload):
+                return checked(client.post(url, payload, format='json'))
+
+            for size in args.sizes:
+                kilobytes = parse_size(size)
+                document_id = upload(kilobytes)
+                batch = [upload(kilobytes) for _ in range(args.documents)]
+                stages = {
+                    'upload': lambda: upload(kilobytes),
+                    'analyze': lambda: post('/api/analysis/analysis/analyze/', {
+                        'policy_text': make_policy(kilobytes, next(seeds))
+                    }),
+                    'compare': lambda: post('/api/analysis/analysis/compare/', {
+                        'policy_text_1': make_policy(kilobytes, next(seeds)),
+                        'policy_text_2': make_policy(kilobytes, next(seeds)),
+                    }),
+                    'document_analysis': lambda: checked(
+                        client.get(f'/api/documents/documents/{document_id}/analysis/')
+                    ),
+                    'batch_process': lambda: post(
+                        '/api/documents/documents/batch_process/', {'document_ids': batch}
+                    ),
+                    'search': lambda: checked(
+                        client.get('/api/documents/documents/search/', {'q': 'device identifiers'})
+                    ),
+                }
+                for stage, function in stages.items():
+                    measurement = measure(function, args.repeat, not args.no_memory)
+                    report.add(stage, size, measurement, kilobytes=kilobytes)
+    finally:
+        teardown_databases(databases, verbosity=0)
+        media.cleanup()
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Latency of small analyze requests while large ones run, sync vs async endpoint.
+
+    python -m benchmarks.bench_async --light 200 --heavy 10 --heavy-kb 300 --output async.json
+
+Both endpoints are driven through the ASGI handler with AsyncClient. The
+sync DRF view runs in Django's single sync thread under ASGI, so large
+requests hold up everything behind them; the async view hands the work to
+the bounded analysis executor. Every request carries a distinct text so
+no result comes from the cache.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+
+from benchmarks import setup
+from benchmarks.corpus import make_policy
+from benchmarks.harness import Report, measure
+
+ENDPOINTS = {
+    'sync': '/api/analysis/analysis/analyze/',
+    'async': '/api/analysis/async/analyze/',
+}
+
+
+async def request(client, url, text, latencies, statuses):
+    started = time.perf_counter()
+    response = await client.post(url, {'policy_text': text}, content_type='application/json')
+    latencies.append(time.perf_counter() - started)
+    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def run(client, url, args, mode):
+    rng = random.Random(0)
+    light, heavy, statuses = [], [], {}
+    heavy_texts = [f'{mode}. ' + make_policy(args.heavy_kb, seed) for seed in range(args.heavy)]
+    tasks = []
+    for number in range(args.light):
+        text = f'{mode} request {number}. We use tracking and collect personal data for analytics.'
+        tasks.append(request(client, url, text, light, statuses))
+    for text in heavy_texts:
+        tasks.insert(rng.randrange(len(tasks) + 1), request(client, url, text, heavy, statuses))
+
+    pending = []
+    for task in tasks:
+        pending.append(asyncio.ensure_future(task))
+        await asyncio.sleep(1 / args.rate)
+    await asyncio.gather(*pending)
+    return light, heavy, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--light', type=int, default=200, help='Small requests')
+    parser.add_argument('--heavy', type=int, default=10, help='Large requests')
+    parser.add_argument('--heavy-kb', type=int, default=300, help='Size of large requests')
+    parser.add_argument('--rate', type=float, default=100, help='Requests started per second')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.test import AsyncClient, override_settings
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases
+
+    setup_test_environment()
+    databases = setup_databases(verbosity=0, interactive=False)
+    report = Report('async', vars(args))
+    try:
+        with override_settings(ANALYSIS_CACHE_PERSIST=False):
+            user = get_user_model().objects.create_user('bench', password='bench')
+            for mode, url in ENDPOINTS.items():
+                client = AsyncClient()
+                client.force_login(user)
+                outcome = {}
+
+                def drive():
+                    outcome['light'], outcome['heavy'], outcome['statuses'] = asyncio.run(
+                        run(client, url, args, mode)
+                    )
+
+                # One run per endpoint: a repeat would send texts already cached
+                measurement = measure(drive, 1, memory=False)
+                light_ms = np.array(outcome['light']) * 1000
+                report.add(mode, args.light + args.heavy, measurement,
+                           light_p50_ms=float(np.percentile(light_ms, 50)),
+                           light_p99_ms=float(np.percentile(light_ms, 99)),
+                           heavy_p50_ms=float(np.median(outcome['heavy']) * 1000),
+                           statuses=outcome['statuses'])
+    finally:
+        teardown_databases(databases, verbosity=0)
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
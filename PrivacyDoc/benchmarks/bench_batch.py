@@ -0,0 +1,47 @@
+"""
+Measure how batch PDF processing scales with the number of worker processes.
+
+    python -m benchmarks.bench_batch --documents 200 --kb 60 --output batch.json
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks import setup
+from benchmarks.corpus import make_pdf_corpus
+from benchmarks.harness import Report, measure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--documents', type=int, default=50)
+    parser.add_argument('--kb', type=int, default=60, help='Policy text per document')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    setup()
+    from apps.documents.services import BatchProcessor
+
+    report = Report('batch', vars(args))
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_pdf_corpus(directory, args.documents, args.kb)
+        workers = 1
+        baseline = None
+        while workers <= args.max_workers:
+            # Extraction runs in worker processes, out of tracemalloc's sight
+            measurement = measure(
+                lambda: list(BatchProcessor(max_workers=workers).map_files(paths)),
+                args.repeat, memory=False
+            )
+            baseline = baseline or measurement['best']
+            report.add('map_files', workers, measurement,
+                       docs_per_s=len(paths) / measurement['best'],
+                       speedup=baseline / measurement['best'])
+            workers *= 2
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
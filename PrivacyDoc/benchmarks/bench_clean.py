@@ -0,0 +1,87 @@
+"""
+Compare the single-pass TextCleaner against the previous four-pass clean_text.
+
+    python -m benchmarks.bench_clean --sizes 1 4 16 --output clean.json
+"""
+import argparse
+import random
+import re
+
+from benchmarks.harness import Report, measure
+from utils.text_cleaner import TextCleaner
+
+WORDS = (
+    "we collect personal data and may share it with third parties "
+    "for analytics (c) 2024 - see https://example.com/privacy or <b>contact</b> "
+    "us at privacy@example.com; retention: 30 days."
+).split()
+# Typographic characters that show up in real PDF text now and then
+NON_ASCII_WORDS = ["©", "—", "“quoted”", "données", "café's"]
+
+
+def legacy_clean_text(text):
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'<.*?>', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s.,!?-]', '', text)
+    return text.strip()
+
+
+def make_pages(megabytes, non_ascii=0.1, page_size=4000, seed=0):
+    rng = random.Random(seed)
+    pages = []
+    total = 0
+    while total < megabytes * 1024 * 1024:
+        lines = []
+        length = 0
+        while length < page_size:
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 14))]
+            if rng.random() < non_ascii:
+                words.append(rng.choice(NON_ASCII_WORDS))
+            line = ' '.join(words)
+            lines.append(line)
+            length += len(line) + 1
+        page = '\n'.join(lines) + '\n'
+        pages.append(page)
+        total += len(page)
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1, 4, 16],
+                        help='Input sizes in megabytes')
+    parser.add_argument('--non-ascii', type=float, default=0.1,
+                        help='Share of lines containing a non-ASCII word')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc runs')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    cleaner = TextCleaner()
+    report = Report('clean', vars(args))
+    for size in args.sizes:
+        pages = make_pages(size, args.non_ascii)
+        text = ''.join(pages)
+        megabytes = len(text) / 1024 / 1024
+        expected = legacy_clean_text(text)
+        assert cleaner.clean(text) == expected
+        assert ''.join(cleaner.clean_stream(pages)) == expected
+        stages = {
+            'legacy_clean_text': lambda: legacy_clean_text(text),
+            'clean': lambda: cleaner.clean(text),
+            'clean_stream': lambda: ''.join(cleaner.clean_stream(pages)),
+        }
+        measurements = {
+            stage: measure(function, args.repeat, not args.no_memory)
+            for stage, function in stages.items()
+        }
+        legacy = measurements['legacy_clean_text']['best']
+        for stage, measurement in measurements.items():
+            report.add(stage, size, measurement, mb_per_s=megabytes / measurement['best'],
+                       speedup=legacy / measurement['best'])
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Compare LSH near-duplicate lookups against scanning every MinHash signature.
+
+    python -m benchmarks.bench_minhash --docs 100000 --queries 200 --output minhash.json
+
+The corpus is made of boilerplate templates, each copied many times with a
+few words changed, like vendor policies built from the same generator.
+"""
+import argparse
+import random
+
+import numpy as np
+
+from benchmarks.harness import Report, measure
+from utils.minhash import LSHIndex, MinHasher, similarity
+
+VOCABULARY = [f'word{number}' for number in range(2000)]
+
+
+def make_corpus(docs, templates, words, edits, seed=0):
+    rng = random.Random(seed)
+    bases = [[rng.choice(VOCABULARY) for _ in range(words)] for _ in range(templates)]
+    for number in range(docs):
+        text = list(bases[number % templates])
+        for _ in range(edits):
+            text[rng.randrange(words)] = rng.choice(VOCABULARY)
+        yield ' '.join(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=100000)
+    parser.add_argument('--templates', type=int, default=2000,
+                        help='Distinct boilerplate policies the corpus is made of')
+    parser.add_argument('--words', type=int, default=300, help='Words per document')
+    parser.add_argument('--edits', type=int, default=3, help='Words changed in each copy')
+    parser.add_argument('--perm', type=int, default=128)
+    parser.add_argument('--bands', type=int, default=16)
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each query stage')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    hasher = MinHasher(args.perm)
+    report = Report('minhash', vars(args))
+    # Signing and indexing the corpus run once, keeping what they build
+    built = {}
+
+    def sign():
+        built['signatures'] = np.stack([
+            hasher.signature(text)
+            for text in make_corpus(args.docs, args.templates, args.words, args.edits)
+        ])
+
+    def index_build():
+        built['index'] = LSHIndex(args.bands)
+        built['index'].update(enumerate(built['signatures']))
+
+    measurement = measure(sign, 1, memory=False)
+    signatures = built['signatures']
+    report.add('signatures', args.docs, measurement,
+               mb=signatures.nbytes / 1024 / 1024)
+    report.add('index_build', args.docs, measure(index_build, 1, memory=False))
+    index = built['index']
+
+    queries = random.Random(1).sample(range(args.docs), args.queries)
+    lsh = {query: index.query(signatures[query], args.threshold) for query in queries}
+    recall = []
+    for query in queries:
+        scores = similarity(signatures[query], signatures)
+        expected = set(np.flatnonzero(scores >= args.threshold).tolist())
+        found = {key for key, _ in lsh[query]}
+        recall.append(len(found & expected) / len(expected))
+    candidates = np.mean([len(index.candidates(signatures[query])) for query in queries])
+
+    stages = {
+        'lsh_query': lambda: [index.query(signatures[query], args.threshold) for query in queries],
+        'full_scan': lambda: [
+            np.flatnonzero(similarity(signatures[query], signatures) >= args.threshold)
+            for query in queries
+        ],
+    }
+    measurements = {
+        stage: measure(function, args.repeat, memory=False) for stage, function in stages.items()
+    }
+    scan = measurements['full_scan']['best']
+    quality = {'lsh_query': {'candidates': float(candidates), 'recall': float(np.mean(recall))}}
+    for stage, measurement in measurements.items():
+        report.add(stage, args.docs, measurement,
+                   ms_per_query=measurement['best'] * 1000 / args.queries,
+                   speedup=scan / measurement['best'], **quality.get(stage, {}))
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
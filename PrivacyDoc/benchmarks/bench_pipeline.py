@@ -0,0 +1,60 @@
+"""
+Throughput and peak memory of each ingest and analysis stage as policies grow.
+
+    python -m benchmarks.bench_pipeline --sizes small medium large --output pipeline.json
+
+Sizes are names from benchmarks.corpus.SIZES or kilobytes of policy text.
+Stages run on the same seeded corpus every time: PDF text extraction,
+cleaning, analysis and two-policy comparison, with the result cache off.
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks import setup
+from benchmarks.corpus import RISKY_TERMS, SIZES, make_pdf, make_policy
+from benchmarks.harness import Report, measure
+
+
+def parse_size(value):
+    return SIZES[value] if value in SIZES else float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', default=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc runs')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    setup()
+    from apps.analysis.services import PolicyAnalyzer, RiskLexicon
+    from utils.pdf_processor import PDFProcessor
+
+    analyzer = PolicyAnalyzer(use_cache=False, lexicon=RiskLexicon(RISKY_TERMS))
+    analyzer.analyze(make_policy(1))
+    report = Report('pipeline', vars(args))
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            kilobytes = parse_size(size)
+            path = make_pdf(os.path.join(directory, f'{size}.pdf'), kilobytes)
+            raw = PDFProcessor.extract_text(path)
+            text = PDFProcessor.clean_text(raw)
+            other = make_policy(kilobytes, seed=1)
+            megabytes = len(text) / 1024 / 1024
+            stages = {
+                'extract_text': lambda: PDFProcessor.extract_text(path),
+                'clean_text': lambda: PDFProcessor.clean_text(raw),
+                'analyze_policy': lambda: analyzer.analyze_policy(text),
+                'compare_policies': lambda: analyzer.compare_policies(text, other),
+            }
+            for stage, function in stages.items():
+                measurement = measure(function, args.repeat, not args.no_memory)
+                report.add(stage, size, measurement, kilobytes=kilobytes,
+                           mb_per_s=megabytes / measurement['best'])
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
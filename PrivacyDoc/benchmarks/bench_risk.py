@@ -0,0 +1,94 @@
+"""
+Compare RiskMatcher against looping over the risky terms.
+
+    python -m benchmarks.bench_risk --terms 11 100 1000 5000 --size 1 --output risk.json
+"""
+import argparse
+import random
+
+from benchmarks.corpus import RISKY_TERMS, WORDS
+from benchmarks.harness import Report, measure
+from utils.risk_matcher import RiskMatcher
+
+
+def make_terms(count, seed=0):
+    """The real risky terms, padded with two- and three-word phrases from the corpus."""
+    rng = random.Random(seed)
+    terms = list(RISKY_TERMS)
+    seen = set(terms)
+    while len(terms) < count:
+        term = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 3)))
+        if term not in seen:
+            seen.add(term)
+            terms.append(term)
+    return terms[:count]
+
+
+def make_text(megabytes, seed=0):
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < megabytes * 1024 * 1024:
+        word = rng.choice(WORDS)
+        if rng.random() < 0.1:
+            word = word.capitalize()
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def presence_loop(terms, text):
+    """What analyze_policy used to do: one lower() and one scan per term."""
+    return [term for term in terms if term.lower() in text.lower()]
+
+
+def offsets_loop(terms, text):
+    """The loop extended to report the same counts and offsets as RiskMatcher."""
+    lowered = text.lower()
+    found = {}
+    for term in dict.fromkeys(term.lower() for term in terms):
+        start = lowered.find(term)
+        while start >= 0:
+            found.setdefault(term, []).append((start, start + len(term)))
+            start = lowered.find(term, start + 1)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--terms', type=int, nargs='+', default=[11, 100, 1000, 5000],
+                        help='Numbers of terms to match')
+    parser.add_argument('--size', type=float, default=1, help='Text size in megabytes')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc runs')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    text = make_text(args.size)
+    report = Report('risk', vars(args))
+    for count in args.terms:
+        terms = make_terms(count)
+        expected = offsets_loop(terms, text)
+        matcher = RiskMatcher(terms)
+        found = matcher.match(text)
+        assert found == {term: expected[term] for term in matcher.terms if term in expected}
+        hits = sum(len(offsets) for offsets in found.values())
+        stages = {
+            'presence_loop': lambda: presence_loop(terms, text),
+            'offsets_loop': lambda: offsets_loop(terms, text),
+            'compile': lambda: RiskMatcher(terms),
+            'match': lambda: matcher.match(text),
+        }
+        measurements = {
+            stage: measure(function, args.repeat, not args.no_memory)
+            for stage, function in stages.items()
+        }
+        loop = measurements['offsets_loop']['best']
+        for stage, measurement in measurements.items():
+            report.add(stage, count, measurement, hits=hits,
+                       vs_offsets=loop / measurement['best'])
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Document search: the old icontains scan against the LIKE and FTS5 backends.
+
+    python -m benchmarks.bench_search --documents 50000 --kb 2 --output search.json
+
+Each document is a seeded policy plus a reference number that only it
+contains, so queries range from one hit (a reference) through a word in a
+few hundred documents to phrases found in nearly all of them. Every query
+fetches the first page of 20 ids, as the paginated API would.
+"""
+import argparse
+import random
+import time
+
+from benchmarks import setup
+from benchmarks.corpus import make_policy
+from benchmarks.harness import Report, measure
+
+RARE_WORDS = ['biometric', 'genetic', 'geolocation', 'fingerprint']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--documents', type=int, default=50000)
+    parser.add_argument('--kb', type=float, default=2, help='Policy text per document')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.db.models import Q
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases
+    from apps.documents.models import Document
+    from apps.documents.services import LikeSearchBackend, SQLiteFTS5Backend
+
+    setup_test_environment()
+    databases = setup_databases(verbosity=0, interactive=False)
+    report = Report('search', vars(args))
+    try:
+        user = get_user_model().objects.create_user('bench', password='bench')
+        rng = random.Random(0)
+        texts = [make_policy(args.kb, seed) for seed in range(100)]
+        started = time.perf_counter()
+        batch = []
+        for number in range(args.documents):
+            text = f"{texts[number % len(texts)]} Reference ref{number}."
+            if rng.random() < 0.01:
+                text += f" We process {rng.choice(RARE_WORDS)} data."
+            document = Document(title=f'Policy {number}', user=user,
+                                processed_text=text, is_processed=True)
+            document.search_vector = document.build_search_vector()
+            batch.append(document)
+            if len(batch) == 1000:
+                Document.objects.bulk_create(batch)
+                batch = []
+        Document.objects.bulk_create(batch)
+        print(f"Inserted and indexed {args.documents} documents in "
+              f"{time.perf_counter() - started:.1f} s")
+
+        queryset = Document.objects.filter(Q(user=user) | Q(shared_with=user)).distinct()
+        backends = {
+            'icontains': lambda query: queryset.filter(
+                Q(title__icontains=query) | Q(processed_text__icontains=query)
+            ),
+            'like': lambda query: LikeSearchBackend().search(queryset, query),
+            'fts5': lambda query: SQLiteFTS5Backend().search(queryset, query),
+        }
+        queries = [f'ref{args.documents // 2}', 'biometric', 'device identifiers']
+        for query in queries:
+            hits = SQLiteFTS5Backend().search(queryset, query).count()
+            for name, search in backends.items():
+                measurement = measure(
+                    lambda: list(search(query).values_list('id', flat=True)[:20]),
+                    args.repeat, memory=False
+                )
+                report.add(f'{name}', query, measurement, hits=hits)
+    finally:
+        teardown_databases(databases, verbosity=0)
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Time to first result of streamed batch analysis versus the full batch.
+
+    python -m benchmarks.bench_streaming --sizes 10 100 1000 --kb 5 --output streaming.json
+
+Every text is distinct and the cache is off, so each size measures the
+pipeline rather than cache hits.
+"""
+import argparse
+from functools import partial
+
+from benchmarks import setup
+from benchmarks.corpus import make_policy
+from benchmarks.harness import Report, measure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--kb', type=int, default=5, help='Size of each text')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc runs')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    setup()
+    from apps.analysis.services import PolicyAnalyzer
+
+    analyzer = PolicyAnalyzer(use_cache=False)
+    analyzer.analyze(make_policy(1))
+    report = Report('streaming', vars(args))
+    for size in args.sizes:
+        texts = [make_policy(args.kb, seed) for seed in range(size)]
+        stream = partial(analyzer.iter_analyze_many, texts, batch_size=args.batch_size)
+        stages = {
+            'first_result': lambda: next(stream()),
+            'all_results': lambda: list(stream()),
+        }
+        for stage, function in stages.items():
+            measurement = measure(function, args.repeat, not args.no_memory)
+            report.add(stage, size, measurement, texts_per_s=size / measurement['best'])
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
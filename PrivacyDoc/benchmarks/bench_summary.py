@@ -0,0 +1,43 @@
+"""
+Measure what TF-IDF summarization adds on top of sentence segmentation.
+
+    python -m benchmarks.bench_summary --sizes 10 100 1000 --output summary.json
+
+Sizes are in kilobytes of policy text.
+"""
+import argparse
+
+from benchmarks.corpus import RISKY_TERMS, make_policy
+from benchmarks.harness import Report, measure
+from utils.risk_matcher import RiskMatcher
+from utils.spacy_models import get_nlp, iter_sentences
+from utils.summarizer import TfidfSummarizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--summary', type=int, default=5, help='Sentences per summary')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc runs')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    nlp = get_nlp()
+    summarizer = TfidfSummarizer()
+    matcher = RiskMatcher(RISKY_TERMS)
+    report = Report('summary', vars(args))
+    for size in args.sizes:
+        text = make_policy(size)
+        sentences = list(iter_sentences(nlp, text))
+        segment = measure(lambda: list(iter_sentences(nlp, text)), args.repeat, not args.no_memory)
+        rank = measure(lambda: summarizer.summarize(sentences, args.summary, matcher),
+                       args.repeat, not args.no_memory)
+        report.add('segment', size, segment, sentences=len(sentences))
+        report.add('summarize', size, rank, sentences=len(sentences),
+                   overhead=rank['best'] / segment['best'])
+    report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
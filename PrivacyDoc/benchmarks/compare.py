@@ -0,0 +1,47 @@
+"""
+Compare two JSON reports written by the benchmarks' ``--output`` option.
+
+    python -m benchmarks.compare before.json after.json --threshold 0.1
+
+Prints the best time of every stage and size found in both reports and
+exits with status 1 if any got slower by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as report:
+        data = json.load(report)
+    return data, {(result['stage'], str(result['size'])): result for result in data['results']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative slowdown reported as a regression')
+    args = parser.parse_args()
+
+    before, old = load(args.before)
+    after, new = load(args.after)
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    print(f"{'stage':>18} {'size':>8} {'before s':>10} {'after s':>10} {'change':>8}")
+    regressions = 0
+    for key in old:
+        if key not in new:
+            continue
+        change = new[key]['best'] / old[key]['best'] - 1
+        flag = ''
+        if change > args.threshold:
+            regressions += 1
+            flag = '  slower'
+        print(f"{key[0]:>18} {key[1]:>8} {old[key]['best']:>10.4f} "
+              f"{new[key]['best']:>10.4f} {change:>+7.1%}{flag}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Synthetic privacy policies and PDFs for the benchmarks.
+
+Everything is generated from a seed, so two runs of a benchmark see the
+same corpus and their results can be compared.
+"""
+import os
+import random
+
+import fitz
+
+# Policy sizes in kilobytes of text
+SIZES = {'small': 10, 'medium': 100, 'large': 1000}
+
+RISKY_TERMS = [
+    "third party", "share with third parties", "sell your data",
+    "no encryption", "data retention", "tracking", "personal data",
+    "consent", "collect", "disclose", "transfer"
+]
+WORDS = (
+    "we collect personal data and may share it with third parties for "
+    "tracking purposes subject to your consent data retention applies to "
+    "account records location history and device identifiers"
+).split()
+# Characters of policy text per generated PDF page
+PAGE_CHARS = 3000
+
+
+def make_policy(kilobytes, seed=0):
+    """Sentences of 6 to 30 policy words, up to ``kilobytes`` of text."""
+    rng = random.Random(seed)
+    sentences = []
+    length = 0
+    while length < kilobytes * 1024:
+        sentence = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 30)))
+        sentence = sentence.capitalize() + '.'
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return ' '.join(sentences)
+
+
+def make_policies(count, kilobytes, seed=0):
+    """``count`` distinct policies, so none is served from a cache."""
+    return [make_policy(kilobytes, seed + number) for number in range(count)]
+
+
+def pdf_bytes(text):
+    """A PDF holding ``text``, ``PAGE_CHARS`` characters per page."""
+    doc = fitz.open()
+    for start in range(0, max(len(text), 1), PAGE_CHARS):
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), text[start:start + PAGE_CHARS],
+                            fontsize=7)
+    doc.set_metadata({})
+    data = doc.tobytes(no_new_id=True)
+    doc.close()
+    return data
+
+
+def make_pdf(path, kilobytes, seed=0):
+    with open(path, 'wb') as pdf:
+        pdf.write(pdf_bytes(make_policy(kilobytes, seed)))
+    return path
+
+
+def make_pdf_corpus(directory, documents, kilobytes, seed=0):
+    """Write ``documents`` distinct policy PDFs and return their paths."""
+    return [
+        make_pdf(os.path.join(directory, f'policy_{number}.pdf'), kilobytes, seed + number)
+        for number in range(documents)
+    ]
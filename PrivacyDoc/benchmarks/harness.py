@@ -0,0 +1,99 @@
+"""
+Timing and memory measurement, and JSON reports that runs can be compared by.
+"""
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+
+def measure(function, repeat=3, memory=True):
+    """
+    Time a function and, in a separate untimed call, its peak Python allocations.
+
+    tracemalloc slows allocation-heavy code down, so the peak is taken
+    from one extra call rather than from the timed ones.
+
+    Returns:
+        dict: ``best`` and ``mean`` seconds over ``repeat`` calls, and
+        ``peak_bytes`` allocated during one call (None without ``memory``)
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'best': min(times), 'mean': sum(times) / len(times), 'peak_bytes': peak}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Report:
+    """
+    Results of one benchmark run, keyed by benchmark, stage and size.
+
+    Args:
+        name (str): Benchmark the results belong to
+        parameters (dict): Command-line settings of the run
+    """
+
+    def __init__(self, name, parameters=None):
+        self.name = name
+        self.parameters = parameters or {}
+        self.results = []
+        print(f"{'stage':>18} {'size':>8} {'best':>12} {'peak':>12}")
+
+    def add(self, stage, size, measurement, **extra):
+        """Record and print one measurement; ``extra`` holds derived figures like throughput."""
+        result = {'stage': stage, 'size': size, **measurement, **extra}
+        self.results.append(result)
+        peak = measurement.get('peak_bytes')
+        peak = f"{peak / 1024 / 1024:9.1f} MB" if peak is not None else f"{'-':>12}"
+        figures = ' '.join(
+            f"{key} {value:.4g}" if isinstance(value, float) else f"{key} {value}"
+            for key, value in extra.items()
+        )
+        print(f"{stage:>18} {str(size):>8} {measurement['best']:10.4f} s {peak}  {figures}")
+        return result
+
+    def to_dict(self):
+        return {
+            'benchmark': self.name,
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': _git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'parameters': self.parameters,
+            'results': self.results,
+        }
+
+    def write(self, path):
+        if not path:
+            return
+        with open(path, 'w') as output:
+            json.dump(self.to_dict(), output, indent=2)
+        print(f"Wrote {path}")
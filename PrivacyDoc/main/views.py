@@ -40,19 +40,11 @@
 
 
 # views.py
+from itertools import islice
 from django.shortcuts import render
-import spacy
 import nltk
-
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
-
-# Define a list of risky terms
-risky_terms = [
-    "third party", "share with third parties", "sell your data", 
-    "no encryption", "data retention", "tracking", "personal data", 
-    "consent", "collect", "disclose", "transfer"
-]
+from apps.analysis.services import get_lexicon_cache
+from utils.spacy_models import get_nlp, iter_sentences
 
 # views.py
 def home(request):
@@ -73,19 +65,14 @@ def home(request):
 
 
 def analyze_policy(text):
-    doc = nlp(text)
+    # Summarize the policy (returning top 5 sentences as an example); only
+    # the start of the text is parsed, chunk by chunk
+    sentences = list(islice(iter_sentences(get_nlp(), text), 5))
     
-    # Summarize the policy (returning top 5 sentences as an example)
-    sentences = [sent.text for sent in doc.sents][:5]
-    
-    # Risk scoring: Count risky terms
-    risk_score = 0
-    found_risks = []
-
-    for term in risky_terms:
-        if term.lower() in text.lower():
-            risk_score += 1
-            found_risks.append(term)
+    # Risk scoring: weigh the risky terms, found in one pass over the text
+    lexicon = get_lexicon_cache().get()
+    found_risks = lexicon.matcher.find_terms(text)
+    risk_score = lexicon.score(found_risks)
 
     # Higher score = riskier policy
     return sentences, risk_score, found_risks
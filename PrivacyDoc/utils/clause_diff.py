@@ -0,0 +1,91 @@
+import hashlib
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
+
+CLAUSE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n+')
+
+# Two clauses in a replaced block are paired as one changed clause when
+# they are at least this similar; otherwise they are reported as removed
+# and added.
+CHANGED_RATIO = 0.5
+# New clauses an old clause is compared with before it counts as removed
+LOOKAHEAD = 8
+
+
+def split_clauses(text: str) -> List[str]:
+    """Split text into sentence-level clauses at sentence punctuation and line breaks."""
+    return [clause.strip() for clause in CLAUSE_BOUNDARY.split(text) if clause.strip()]
+
+
+def fingerprint(clause: str) -> bytes:
+    """Hash of a clause that ignores case and whitespace differences."""
+    normalized = ' '.join(clause.lower().split())
+    return hashlib.blake2b(normalized.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+
+
+def _change(kind: str, old: List[str], new: List[str],
+            old_index: Optional[int], new_index: Optional[int]) -> Dict:
+    return {
+        'type': kind,
+        'old_index': old_index,
+        'new_index': new_index,
+        'old': old[old_index] if old_index is not None else None,
+        'new': new[new_index] if new_index is not None else None,
+    }
+
+
+def _pair_replaced(old: List[str], new: List[str], i1: int, i2: int,
+                   j1: int, j2: int) -> List[Dict]:
+    """Report a replaced block, pairing each old clause with the next similar new one."""
+    changes = []
+    j = j1
+    for i in range(i1, i2):
+        match = None
+        for candidate in range(j, min(j + LOOKAHEAD, j2)):
+            matcher = SequenceMatcher(None, old[i], new[candidate], autojunk=False)
+            if (matcher.real_quick_ratio() >= CHANGED_RATIO
+                    and matcher.quick_ratio() >= CHANGED_RATIO
+                    and matcher.ratio() >= CHANGED_RATIO):
+                match = candidate
+                break
+        if match is None:
+            changes.append(_change('removed', old, new, i, None))
+            continue
+        changes.extend(_change('added', old, new, None, index) for index in range(j, match))
+        changes.append(_change('changed', old, new, i, match))
+        j = match + 1
+    changes.extend(_change('added', old, new, None, index) for index in range(j, j2))
+    return changes
+
+
+def diff_clauses(old: List[str], new: List[str]) -> List[Dict]:
+    """
+    Align two lists of clauses and report what changed between them.
+
+    Clauses are compared by fingerprint, so difflib works on short hashes
+    instead of the clause text. Within a replaced block, similar clauses
+    are paired as ``changed``; the rest are ``added`` or ``removed``.
+
+    Args:
+        old (List[str]): Clauses of the earlier text
+        new (List[str]): Clauses of the later text
+
+    Returns:
+        List[Dict]: Changes in document order, each with its ``type``, the
+        ``old_index`` and ``new_index`` of the clauses involved and their
+        ``old`` and ``new`` text (None where the clause does not exist)
+    """
+    matcher = SequenceMatcher(
+        None, [fingerprint(clause) for clause in old],
+        [fingerprint(clause) for clause in new], autojunk=False
+    )
+    changes = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'delete':
+            changes.extend(_change('removed', old, new, index, None) for index in range(i1, i2))
+        elif tag == 'insert':
+            changes.extend(_change('added', old, new, None, index) for index in range(j1, j2))
+        elif tag == 'replace':
+            changes.extend(_pair_replaced(old, new, i1, i2, j1, j2))
+    return changes
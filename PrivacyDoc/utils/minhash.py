@@ -0,0 +1,179 @@
+import hashlib
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Set
+import numpy as np
+
+# Mersenne prime used by the permutations; hashes are reduced below it
+_PRIME = np.uint64((1 << 31) - 1)
+# Multiplier of the polynomial that combines word hashes into shingle hashes
+_BASE = np.uint64(1000003)
+
+
+class MinHasher:
+    """
+    MinHash signatures of texts, for estimating Jaccard similarity of their word shingles.
+
+    A text is lowercased and split into words; every run of ``shingle_size``
+    consecutive words is a shingle. Each of the ``num_perm`` hash
+    permutations keeps the smallest hash of any shingle, and the share of
+    positions two signatures agree on estimates the Jaccard similarity of
+    the shingle sets.
+
+    Args:
+        num_perm (int): Signature length
+        shingle_size (int): Words per shingle
+        seed (int): Seed of the permutations; signatures are only
+            comparable when made with the same seed and num_perm
+    """
+
+    # Shingles hashed per numpy block, bounding the temporary arrays
+    BLOCK = 8192
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_PRIME), size=num_perm).astype(np.uint64)[:, None]
+        self._b = rng.randint(0, int(_PRIME), size=num_perm).astype(np.uint64)[:, None]
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Distinct hashes of the word shingles of a text, below the prime."""
+        words = text.lower().split()
+        if not words:
+            return np.zeros(0, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(word.encode('utf-8', 'surrogatepass')) for word in words),
+            dtype=np.uint64, count=len(words)
+        ) % _PRIME
+        size = min(self.shingle_size, len(hashes))
+        shingles = hashes[:len(hashes) - size + 1].copy()
+        for offset in range(1, size):
+            shingles = (shingles * _BASE + hashes[offset:len(hashes) - size + 1 + offset]) % _PRIME
+        return np.unique(shingles)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        MinHash signature of a text.
+
+        Args:
+            text (str): Text to hash
+
+        Returns:
+            np.ndarray: ``num_perm`` uint32 values; all equal to the prime
+            for a text without words
+        """
+        signature = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        shingles = self.shingles(text)
+        for start in range(0, len(shingles), self.BLOCK):
+            block = shingles[start:start + self.BLOCK][None, :]
+            np.minimum(signature, ((self._a * block + self._b) % _PRIME).min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+    def to_bytes(self, signature: np.ndarray) -> bytes:
+        return signature.astype('<u4').tobytes()
+
+    def from_bytes(self, data: bytes) -> np.ndarray:
+        return np.frombuffer(bytes(data), dtype='<u4').astype(np.uint32)
+
+
+def similarity(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """
+    Estimated Jaccard similarity between a signature and one or more others.
+
+    Args:
+        signature (np.ndarray): Signature of shape (num_perm,)
+        others (np.ndarray): Signatures of shape (num_perm,) or (n, num_perm)
+
+    Returns:
+        np.ndarray: Share of equal positions, one value per signature in others
+    """
+    return (np.asarray(others) == signature).mean(axis=-1)
+
+
+def band_keys(signature: np.ndarray, bands: int) -> List[int]:
+    """
+    LSH bucket keys of a signature, one per band.
+
+    The signature is cut into ``bands`` equal slices and each slice is
+    hashed together with its band number into a signed 64-bit key, so two
+    signatures share a key exactly when they agree on a whole band.
+
+    Args:
+        signature (np.ndarray): MinHash signature; its length must be a
+            multiple of bands
+        bands (int): Number of bands
+
+    Returns:
+        List[int]: One key per band
+    """
+    rows = len(signature) // bands
+    data = signature.astype('<u4').tobytes()
+    width = rows * 4
+    return [
+        int.from_bytes(
+            hashlib.blake2b(data[band * width:(band + 1) * width],
+                            digest_size=8, salt=band.to_bytes(16, 'little')).digest(),
+            'little', signed=True
+        )
+        for band in range(bands)
+    ]
+
+
+class LSHIndex:
+    """
+    In-memory LSH index over MinHash signatures.
+
+    Documents that agree on every row of at least one band land in the same
+    bucket, so a query only looks at the documents sharing a bucket with it
+    instead of at the whole corpus. With ``b`` bands of ``r`` rows, pairs
+    with similarity ``s`` become candidates with probability
+    ``1 - (1 - s**r)**b``.
+
+    Args:
+        bands (int): Number of bands
+    """
+
+    def __init__(self, bands: int = 16):
+        self.bands = bands
+        self._buckets: Dict[int, Set[Hashable]] = defaultdict(set)
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def add(self, key: Hashable, signature: np.ndarray):
+        """Index a signature under a key, such as a document id."""
+        self._signatures[key] = signature
+        for bucket in band_keys(signature, self.bands):
+            self._buckets[bucket].add(key)
+
+    def candidates(self, signature: np.ndarray) -> Set[Hashable]:
+        """Keys sharing at least one bucket with a signature."""
+        found = set()
+        for bucket in band_keys(signature, self.bands):
+            found |= self._buckets.get(bucket, set())
+        return found
+
+    def query(self, signature: np.ndarray, threshold: float = 0.8) -> List[tuple]:
+        """
+        Find indexed signatures similar to a signature.
+
+        Args:
+            signature (np.ndarray): Signature to look up
+            threshold (float): Lowest estimated similarity to report
+
+        Returns:
+            List[tuple]: ``(key, similarity)`` of each match, most similar first
+        """
+        keys = list(self.candidates(signature))
+        if not keys:
+            return []
+        scores = similarity(signature, np.stack([self._signatures[key] for key in keys]))
+        found = [(key, float(score)) for key, score in zip(keys, scores) if score >= threshold]
+        return sorted(found, key=lambda item: -item[1])
+
+    def update(self, items: Iterable[tuple]):
+        """Index several ``(key, signature)`` pairs."""
+        for key, signature in items:
+            self.add(key, signature)
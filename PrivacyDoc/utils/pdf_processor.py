@@ -1,37 +1,216 @@
+import hashlib
+import time
 import fitz  # PyMuPDF
-from typing import Optional
-import re
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from utils.text_cleaner import TextCleaner
+
+_cleaner = TextCleaner()
+
+
+class ExtractionLimits:
+    """
+    Per-document bounds for PDFProcessor.extract_document.
+
+    Extraction stops cleanly at the first limit reached and returns what was
+    extracted so far. The limits are checked between pages, so a single
+    page can still exceed the time budget.
+
+    ``max_bytes`` is what bounds memory: the result holds the cleaned text
+    twice, once whole and once split into pages.
+
+    Args:
+        max_pages (Optional[int]): Maximum number of pages to extract
+        max_bytes (Optional[int]): Maximum size of the cleaned text, in UTF-8 bytes
+        max_seconds (Optional[float]): Maximum time to spend on the document
+    """
+
+    def __init__(self, max_pages: Optional[int] = None, max_bytes: Optional[int] = None,
+                 max_seconds: Optional[float] = None):
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
 
 
 class PDFProcessor:
     """Utility class for processing PDF documents."""
 
+    # Bump whenever extraction or cleaning output changes, so cached text
+    # produced by an older implementation is not reused.
+    VERSION = f"5-pymupdf-{fitz.VersionBind}"
+
+    @staticmethod
+    def iter_pages(
+        pdf_path: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Lazily yield the text of each page in a PDF file.
+
+        Pages are read one at a time, so callers can start working on the
+        first pages before the rest of the document has been loaded.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+            start (Optional[int]): First page to yield (1-based, inclusive)
+            end (Optional[int]): Last page to yield (1-based, inclusive)
+
+        Yields:
+            Tuple[int, str]: Page number and the text of that page
+        """
+        if start is not None and start < 1:
+            raise ValueError('Page numbers start at 1')
+        with fitz.open(pdf_path) as doc:
+            first = (start or 1) - 1
+            last = doc.page_count if end is None else min(end, doc.page_count)
+            for index in range(first, last):
+                yield index + 1, doc.load_page(index).get_text()
+
     @staticmethod
-    def extract_text(pdf_path: str) -> Optional[str]:
+    def extract_text(
+        pdf_path: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> Optional[str]:
         """
         Extract text from a PDF file.
         
         Args:
             pdf_path (str): Path to the PDF file
+            start (Optional[int]): First page to extract (1-based, inclusive)
+            end (Optional[int]): Last page to extract (1-based, inclusive)
             
         Returns:
             Optional[str]: Extracted text or None if processing fails
         """
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-            return text
+            return "".join(
+                text for _, text in PDFProcessor.iter_pages(pdf_path, start, end)
+            )
         except Exception as e:
             print(f"Error processing PDF: {str(e)}")
             return None
 
+    @staticmethod
+    def page_hash(page) -> str:
+        """
+        Fingerprint a page by what draws its text, without extracting it.
+
+        The page's own content stream is not enough: pages that only draw a
+        form XObject all share a stream like ``q /fzFrm0 Do Q``. The streams
+        of every XObject the page references, nested ones included, and
+        the fonts it uses are hashed along with it.
+
+        Args:
+            page (fitz.Page): Page of an open document
+
+        Returns:
+            str: SHA-256 of the page's (decompressed) content stream and the
+            resources it draws
+        """
+        doc = page.parent
+        digest = hashlib.sha256(page.read_contents())
+        for xref, name, _, _ in page.get_xobjects():
+            digest.update(b'\0xobject\0' + name.encode())
+            digest.update(doc.xref_stream(xref) or b'')
+        for xref, _, font_type, base_font, name, encoding, *_ in page.get_fonts(full=True):
+            digest.update(f'\0font\0{name}\0{font_type}\0{base_font}\0{encoding}'.encode())
+            kind, value = doc.xref_get_key(xref, 'ToUnicode') if xref else ('null', '')
+            if kind == 'xref':
+                digest.update(doc.xref_stream(int(value.split()[0])) or b'')
+        return digest.hexdigest()
+
+    @staticmethod
+    def extract_document(
+        pdf_path: str,
+        known_pages: Optional[Dict[str, Tuple[str, int]]] = None,
+        limits: Optional[ExtractionLimits] = None
+    ) -> dict:
+        """
+        Open a PDF file once and extract everything ingestion needs from it.
+
+        The pages are cleaned as they are read, so the raw text of the whole
+        document is never held in memory. The result holds the cleaned text
+        both whole and by page; ``limits.max_bytes`` is what bounds its size.
+        Unlike extract_text, errors are raised to the caller.
+
+        Pages whose hash is in ``known_pages`` (typically the pages of the
+        previous version of a document) are not extracted again: their
+        cleaned text is reused and fed to the document-level cleaner in
+        place of the raw text.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+            known_pages (Optional[Dict[str, Tuple[str, int]]]): Cleaned text
+                and raw character count of already extracted pages, by page hash
+            limits (Optional[ExtractionLimits]): Bounds on pages, text size
+                and time; unbounded by default
+
+        Returns:
+            dict: ``text`` (cleaned), ``pages`` (cleaned text of each page),
+            ``page_hashes``, ``pages_reused``, ``metadata``, ``page_count``,
+            ``page_char_counts`` (raw characters per page) and
+            ``limit_reached`` ('pages', 'bytes' or 'seconds' if extraction
+            stopped early, otherwise '')
+        """
+        known_pages = known_pages or {}
+        limits = limits or ExtractionLimits()
+        deadline = None
+        if limits.max_seconds is not None:
+            deadline = time.monotonic() + limits.max_seconds
+        page_char_counts = []
+        cleaned_pages = []
+        page_hashes = []
+        reused = 0
+        text_bytes = 0
+        limit_reached = ''
+        with fitz.open(pdf_path) as doc:
+            def pages():
+                nonlocal reused, text_bytes, limit_reached
+                for page in doc:
+                    if limits.max_pages is not None and len(cleaned_pages) >= limits.max_pages:
+                        limit_reached = 'pages'
+                        return
+                    if deadline is not None and time.monotonic() > deadline:
+                        limit_reached = 'seconds'
+                        return
+                    digest = PDFProcessor.page_hash(page)
+                    if digest in known_pages:
+                        cleaned, char_count = known_pages[digest]
+                        raw = cleaned + "\n"
+                    else:
+                        raw = page.get_text()
+                        char_count = len(raw)
+                        cleaned = _cleaner.clean(raw)
+                    size = len(cleaned.encode('utf-8'))
+                    if limits.max_bytes is not None and text_bytes + size > limits.max_bytes:
+                        limit_reached = 'bytes'
+                        return
+                    text_bytes += size
+                    reused += digest in known_pages
+                    page_hashes.append(digest)
+                    page_char_counts.append(char_count)
+                    cleaned_pages.append(cleaned)
+                    yield raw
+
+            return {
+                'text': ''.join(PDFProcessor.clean_stream(pages())),
+                'pages': cleaned_pages,
+                'page_hashes': page_hashes,
+                'pages_reused': reused,
+                'metadata': dict(doc.metadata or {}),
+                'page_count': doc.page_count,
+                'page_char_counts': page_char_counts,
+                'limit_reached': limit_reached,
+            }
+
     @staticmethod
     def clean_text(text: str) -> str:
         """
         Clean extracted text by removing unwanted elements.
+
+        URLs, HTML tags and special characters are removed and whitespace is
+        collapsed; see TextCleaner for the single-pass implementation.
         
         Args:
             text (str): Text to clean
@@ -39,19 +218,20 @@ class PDFProcessor:
         Returns:
             str: Cleaned text
         """
-        # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-        
-        # Remove HTML tags
-        text = re.sub(r'<.*?>', '', text)
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove special characters
-        text = re.sub(r'[^\w\s.,!?-]', '', text)
-        
-        return text.strip()
+        return _cleaner.clean(text)
+
+    @staticmethod
+    def clean_stream(chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Clean text page by page without joining the raw pages first.
+
+        Args:
+            chunks (Iterable[str]): Consecutive pieces of text, e.g. PDF pages
+
+        Yields:
+            str: Pieces of cleaned text that join to clean_text of the whole
+        """
+        return _cleaner.clean_stream(chunks)
 
     @staticmethod
     def get_metadata(pdf_path: str) -> dict:
@@ -0,0 +1,133 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class RiskMatcher:
+    """
+    Find every occurrence of many terms in a text with one compiled regex.
+
+    Matching follows ``term.lower() in text.lower()``: terms are found as
+    case-insensitive substrings, anywhere in the text. Overlapping hits are
+    all reported, including terms that are prefixes of other terms.
+
+    The terms are compiled into a trie-shaped regex inside a lookahead, so
+    the engine tries every start position of the lowered text once and
+    follows a single path through the trie from there, however many terms
+    there are. The regex
+    captures the longest term starting at a position; shorter terms that
+    start there are its prefixes and are read off the same trie path.
+
+    Synonyms are compiled into the same trie and reported as the term they
+    belong to, with the offsets of the synonym in the text.
+
+    Args:
+        terms (Iterable[str]): Terms to find
+        synonyms (Optional[Dict[str, Iterable[str]]]): Other spellings of
+            some of the terms
+    """
+
+    def __init__(self, terms: Iterable[str],
+                 synonyms: Optional[Dict[str, Iterable[str]]] = None):
+        self.terms = list(dict.fromkeys(term.lower() for term in terms if term))
+        spellings = {term: term for term in self.terms}
+        for term, others in (synonyms or {}).items():
+            if term.lower() in spellings:
+                for other in others:
+                    if other:
+                        spellings.setdefault(other.lower(), term.lower())
+        self._trie = {}
+        for spelling, term in spellings.items():
+            node = self._trie
+            for char in spelling:
+                node = node.setdefault(char, {})
+            node[''] = term
+        # Terms that are prefixes of each spelling (itself included), with
+        # the length of the matching spelling, shortest first
+        self._prefixes = {spelling: self._walk(spelling) for spelling in spellings}
+        pattern = f"(?=({self._build(self._trie)}))"
+        self._pattern = re.compile(pattern)
+        self._pattern_ignorecase = re.compile(pattern, re.IGNORECASE)
+
+    @classmethod
+    def _build(cls, node: dict) -> str:
+        parts = [
+            re.escape(char) + cls._build(child)
+            for char, child in node.items() if char
+        ]
+        if not parts:
+            return ''
+        branches = parts[0] if len(parts) == 1 else f"(?:{'|'.join(parts)})"
+        # Greedy, so the longest term wins; a term ending here is the fallback.
+        return f"(?:{branches})?" if '' in node else branches
+
+    def finditer(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """
+        Yield every hit in order of position.
+
+        Args:
+            text (str): Text to search
+
+        Yields:
+            Tuple[str, int, int]: Term and the start and end offsets of the hit
+        """
+        if not self.terms:
+            return
+        # Matching the lowered text is much faster than IGNORECASE, but only
+        # keeps offsets valid if lowering did not change the length.
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = self._pattern.finditer(lowered)
+        else:
+            matches = self._pattern_ignorecase.finditer(text)
+        prefixes = self._prefixes
+        for match in matches:
+            start, end = match.span(1)
+            terms = prefixes.get(match.group(1).lower())
+            if terms is not None:
+                for term, length in terms:
+                    yield term, start, start + length
+                continue
+            # lower() changed the length of the hit; walk the trie instead.
+            node = self._trie
+            seen = set()
+            for position in range(start, end):
+                node = node.get(text[position].lower())
+                if node is None:
+                    break
+                if '' in node and node[''] not in seen:
+                    seen.add(node[''])
+                    yield node[''], start, position + 1
+
+    def _walk(self, spelling: str) -> List[Tuple[str, int]]:
+        node = self._trie
+        found = {}
+        for length, char in enumerate(spelling, 1):
+            node = node[char]
+            if '' in node:
+                # A term and its synonym may both start here; keep the shorter
+                found.setdefault(node[''], length)
+        return list(found.items())
+
+    def match(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Collect the offsets of every hit by term.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            Dict[str, List[Tuple[int, int]]]: Start and end offsets of each
+            term found, with terms in the order they were given
+        """
+        found = {}
+        for term, start, end in self.finditer(text):
+            found.setdefault(term, []).append((start, end))
+        return {term: found[term] for term in self.terms if term in found}
+
+    def counts(self, text: str) -> Dict[str, int]:
+        """Number of hits of each term found in the text."""
+        return {term: len(offsets) for term, offsets in self.match(text).items()}
+
+    def find_terms(self, text: str) -> List[str]:
+        """Terms that occur in the text, in the order they were given."""
+        return list(self.match(text))
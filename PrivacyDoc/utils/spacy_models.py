@@ -0,0 +1,141 @@
+import threading
+import time
+import tracemalloc
+from typing import Callable, Iterable, Iterator, List, Optional
+import spacy
+
+DEFAULT_MODEL = "en_core_web_sm"
+
+# Components the summary and risk scoring code never reads. Sentence
+# boundaries come from the parser, so it has to stay.
+DEFAULT_EXCLUDE = ("ner", "lemmatizer")
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded spaCy pipelines.
+
+    Each pipeline is loaded on first use and shared by every caller in the
+    process. Loading happens under a lock, so concurrent first requests
+    wait for one load instead of each loading their own copy.
+    """
+
+    def __init__(self, loader: Optional[Callable] = None):
+        self._loader = loader or spacy.load
+        self._lock = threading.Lock()
+        self._models = {}
+        self._stats = {}
+
+    def get(self, name: str = DEFAULT_MODEL, exclude: Iterable[str] = DEFAULT_EXCLUDE):
+        """
+        Return a loaded pipeline, loading it if this process has not yet.
+
+        Args:
+            name (str): Package name or path of the spaCy pipeline
+            exclude (Iterable[str]): Components to leave out of the pipeline
+
+        Returns:
+            spacy.language.Language: The shared pipeline
+        """
+        key = (name, tuple(sorted(exclude)))
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._load(key)
+            return model
+
+    def _load(self, key):
+        name, exclude = key
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            model = self._loader(name, exclude=list(exclude))
+            seconds = time.perf_counter() - started
+            memory = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        self._stats[key] = {
+            'name': name,
+            'excluded': list(exclude),
+            'pipeline': list(getattr(model, 'pipe_names', [])),
+            'load_seconds': round(seconds, 3),
+            'memory_bytes': memory,
+            'loaded_at': time.time(),
+        }
+        self._models[key] = model
+        return model
+
+    def stats(self) -> List[dict]:
+        """Load time, memory allocated while loading and components of each loaded pipeline."""
+        with self._lock:
+            return [dict(stats) for stats in self._stats.values()]
+
+    def clear(self):
+        """Forget every loaded pipeline; they are reloaded on next use."""
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+
+
+registry = ModelRegistry()
+
+
+def get_nlp(name: str = DEFAULT_MODEL, exclude: Iterable[str] = DEFAULT_EXCLUDE):
+    """Shortcut for ``registry.get``."""
+    return registry.get(name, exclude)
+
+
+def _chunk_end(text: str, start: int, size: int) -> int:
+    """End of a chunk of at most ``size`` characters, at a line break or space if possible."""
+    limit = start + size
+    if limit >= len(text):
+        return len(text)
+    for separator in ('\n', ' '):
+        end = text.rfind(separator, start + size // 2, limit)
+        if end > start:
+            return end + 1
+    return limit
+
+
+def iter_sentences(nlp, text: str, chunk_size: int = 10000) -> Iterator[str]:
+    """
+    Segment a text into sentences, parsing it one chunk at a time.
+
+    Only as much of the text is parsed as the caller consumes, so taking
+    the first few sentences of a long document costs about the same as for
+    a short one, and texts longer than ``nlp.max_length`` can be read too.
+    The last sentence of a chunk may be cut off by the chunk boundary, so
+    it is parsed again at the start of the next chunk.
+
+    Args:
+        nlp (spacy.language.Language): Pipeline that sets sentence boundaries
+        text (str): Text to segment
+        chunk_size (int): Characters parsed at a time; capped at ``nlp.max_length``
+
+    Yields:
+        str: Each sentence, in order
+    """
+    chunk_size = max(1, min(chunk_size, nlp.max_length))
+    start = 0
+    size = chunk_size
+    while start < len(text):
+        end = _chunk_end(text, start, size)
+        sentences = list(nlp(text[start:end]).sents)
+        if end < len(text) and len(sentences) == 1 and size < nlp.max_length:
+            # One sentence fills the chunk; look further for its end.
+            size = min(size * 2, nlp.max_length)
+            continue
+        if end < len(text) and len(sentences) > 1:
+            last = sentences.pop()
+            end = start + last.start_char
+        for sentence in sentences:
+            yield sentence.text
+        start = end
+        size = chunk_size
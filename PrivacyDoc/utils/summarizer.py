@@ -0,0 +1,120 @@
+import re
+from itertools import chain
+from typing import List, Optional
+import numpy as np
+from .risk_matcher import RiskMatcher
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+class TfidfSummarizer:
+    """
+    Extractive summarizer that ranks sentences by TF-IDF centrality and risk terms.
+
+    Every sentence is a TF-IDF vector over the words of the text, with
+    sentences as the "documents" for IDF. A sentence's centrality is the
+    cosine similarity of its vector to the sum of all vectors, so sentences
+    about what the whole policy talks about rank first. Sentences
+    mentioning risky terms of the given RiskMatcher get a bonus of up to
+    ``risk_weight``. The top
+    sentences are returned in the order they appear in the text.
+
+    All scoring runs on flat numpy arrays of (sentence, word) pairs, so the
+    cost is linear in the number of words and no sentence-by-vocabulary
+    matrix is built.
+
+    Args:
+        risk_weight (float): Bonus for the sentence with the most distinct
+            risky terms; others get a proportional share
+        min_words (int): Sentences with fewer words are never picked
+    """
+
+    def __init__(self, risk_weight: float = 0.5, min_words: int = 4):
+        self.risk_weight = risk_weight
+        self.min_words = min_words
+
+    def scores(self, sentences: List[str],
+               risk_matcher: Optional[RiskMatcher] = None) -> np.ndarray:
+        """
+        Score sentences for inclusion in the summary.
+
+        Args:
+            sentences (List[str]): Sentences of one text, in order
+            risk_matcher (Optional[RiskMatcher]): Terms that make a sentence
+                more relevant
+
+        Returns:
+            np.ndarray: One score per sentence; -inf for sentences that are
+            too short to be picked
+        """
+        count = len(sentences)
+        tokens = [WORD_PATTERN.findall(sentence.lower()) for sentence in sentences]
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=count)
+        flat = list(chain.from_iterable(tokens))
+        if not flat:
+            return np.full(count, -np.inf)
+        vocabulary = {word: index for index, word in enumerate(dict.fromkeys(flat))}
+        rows = np.repeat(np.arange(count, dtype=np.int64), lengths)
+        words = np.fromiter(map(vocabulary.__getitem__, flat), dtype=np.int64, count=len(flat))
+
+        # Term frequencies as unique (sentence, word) pairs with counts
+        pairs, tf = np.unique(rows * len(vocabulary) + words, return_counts=True)
+        pair_rows, pair_words = np.divmod(pairs, len(vocabulary))
+        df = np.bincount(pair_words, minlength=len(vocabulary))
+        idf = np.log((1 + count) / (1 + df)) + 1
+        weights = tf * idf[pair_words]
+
+        centroid = np.bincount(pair_words, weights=weights, minlength=len(vocabulary))
+        dots = np.bincount(pair_rows, weights=weights * centroid[pair_words], minlength=count)
+        norms = np.sqrt(np.bincount(pair_rows, weights=weights ** 2, minlength=count))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(norms > 0, dots / (norms * np.linalg.norm(centroid)), 0.0)
+
+        if self.risk_weight and risk_matcher is not None and risk_matcher.terms:
+            risks = self._distinct_risks(sentences, risk_matcher)
+            if risks.max() > 0:
+                scores = scores + self.risk_weight * risks / risks.max()
+        scores[lengths < self.min_words] = -np.inf
+        return scores
+
+    @staticmethod
+    def _distinct_risks(sentences: List[str], risk_matcher: RiskMatcher) -> np.ndarray:
+        """Number of distinct risky terms in each sentence, from one pass over all of them."""
+        starts = np.cumsum([0] + [len(sentence) + 1 for sentence in sentences[:-1]])
+        columns = {term: index for index, term in enumerate(risk_matcher.terms)}
+        hits = [
+            (start, columns[term])
+            for term, start, _ in risk_matcher.finditer('\n'.join(sentences))
+        ]
+        if not hits:
+            return np.zeros(len(sentences))
+        positions, terms = np.array(hits, dtype=np.int64).T
+        rows = np.searchsorted(starts, positions, side='right') - 1
+        distinct = np.unique(rows * len(columns) + terms) // len(columns)
+        return np.bincount(distinct, minlength=len(sentences)).astype(np.float64)
+
+    def summarize(self, sentences: List[str], size: int = 5,
+                  risk_matcher: Optional[RiskMatcher] = None) -> List[str]:
+        """
+        Pick the best sentences of a text.
+
+        Args:
+            sentences (List[str]): Sentences of one text, in order
+            size (int): Sentences to return
+            risk_matcher (Optional[RiskMatcher]): Terms that make a sentence
+                more relevant
+
+        Returns:
+            List[str]: Up to ``size`` sentences in document order. If too few
+            sentences are long enough to score, the earliest short ones
+            fill the remaining places.
+        """
+        if len(sentences) <= size:
+            return list(sentences)
+        scores = self.scores(sentences, risk_matcher)
+        eligible = int(np.isfinite(scores).sum())
+        if eligible < size:
+            picked = np.argsort(-scores, kind='stable')[:size]
+        else:
+            picked = np.argpartition(-scores, size - 1)[:size]
+        return [sentences[index] for index in np.sort(picked)]
@@ -0,0 +1,153 @@
+import re
+from typing import Iterable, Iterator, Optional
+
+URL_PATTERN = re.compile(r'http\S+|www\S+|https\S+', flags=re.MULTILINE)
+HTML_TAG_PATTERN = re.compile(r'<.*?>')
+NON_ASCII_PATTERN = re.compile(r'[^\x00-\x7f]+')
+
+# Stand-in for characters removed by the special character rule. It is itself
+# a special character, so input that contains it is still cleaned correctly.
+_REMOVED = '\x00'
+
+
+def _classify(char: str, whitespace: bool, special_chars: bool) -> str:
+    """Map one character the way the whitespace and special character rules would."""
+    if char.isspace():
+        return ' ' if whitespace else char
+    if special_chars and not (char.isalnum() or char in '_.,!?-'):
+        return _REMOVED
+    return char
+
+
+class _TranslationTable(dict):
+    """str.translate table that classifies each code point on first use."""
+
+    def __init__(self, whitespace: bool, special_chars: bool):
+        super().__init__()
+        self.whitespace = whitespace
+        self.special_chars = special_chars
+
+    def __missing__(self, codepoint: int) -> str:
+        value = self[codepoint] = _classify(chr(codepoint), self.whitespace, self.special_chars)
+        return value
+
+
+class TextCleaner:
+    """
+    Single-pass cleaner for extracted PDF text.
+
+    Produces the same output as applying, in order: URL removal, HTML tag
+    removal, whitespace collapsing (``\\s+`` to one space) and special
+    character removal (``[^\\w\\s.,!?-]``), followed by strip().
+
+    The character rules are folded into one translate table: whitespace maps
+    to a space and special characters to a removal marker. ASCII is handled
+    by bytes.translate on the UTF-8 encoding, so only runs of non-ASCII
+    characters need a per-character lookup. The markup rules are precompiled
+    and skipped when their trigger substrings do not occur.
+    """
+
+    RULES = ('urls', 'html', 'whitespace', 'special_chars')
+
+    def __init__(self, rules: Optional[Iterable[str]] = None):
+        rules = frozenset(self.RULES if rules is None else rules)
+        unknown = rules - set(self.RULES)
+        if unknown:
+            raise ValueError(f"Unknown cleaning rules: {', '.join(sorted(unknown))}")
+        self.rules = rules
+        self._collapse = 'whitespace' in rules
+        self._strip_marker = 'special_chars' in rules
+        self._table = None
+        if self._collapse or self._strip_marker:
+            self._table = _TranslationTable(self._collapse, self._strip_marker)
+            # UTF-8 lead and continuation bytes are >= 0x80 and map to themselves
+            self._byte_table = bytes(
+                ord(_classify(chr(byte), self._collapse, self._strip_marker))
+                if byte < 0x80 else byte
+                for byte in range(256)
+            )
+
+    def clean(self, text: str) -> str:
+        """
+        Clean a complete text.
+
+        Args:
+            text (str): Text to clean
+
+        Returns:
+            str: Cleaned text
+        """
+        return self._apply_chars(self._apply_markup(text)).strip()
+
+    def clean_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Clean text that arrives in pieces, such as the pages of a PDF.
+
+        Complete lines are cleaned as soon as they arrive; the unfinished last
+        line and any trailing whitespace are carried into the next chunk.
+        Joining the yielded pieces gives exactly ``clean("".join(chunks))``.
+
+        Args:
+            chunks (Iterable[str]): Consecutive pieces of the text
+
+        Yields:
+            str: Consecutive pieces of the cleaned text
+        """
+        carry = ''
+        pending = ''
+        started = False
+        for chunk in chunks:
+            buffer = carry + chunk
+            cut = buffer.rfind('\n') + 1
+            if not cut:
+                carry = buffer
+                continue
+            # URLs and tags cannot span a line break, so complete lines can
+            # have the markup rules applied on their own. Whitespace runs can,
+            # so the trailing run waits for the next chunk.
+            lines = self._apply_markup(buffer[:cut])
+            body = lines.rstrip()
+            carry = lines[len(body):] + buffer[cut:]
+            if not body:
+                continue
+            piece = self._apply_chars(body)
+            if not started:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+                started = True
+            content = piece.rstrip()
+            if content:
+                yield pending + content
+                pending = piece[len(content):]
+            else:
+                pending += piece
+
+        piece = self._apply_chars(self._apply_markup(carry)).rstrip()
+        if not started:
+            piece = piece.lstrip()
+        if piece:
+            yield pending + piece
+
+    def _apply_markup(self, text: str) -> str:
+        if 'urls' in self.rules and ('http' in text or 'www' in text):
+            text = URL_PATTERN.sub('', text)
+        if 'html' in self.rules and '<' in text:
+            text = HTML_TAG_PATTERN.sub('', text)
+        return text
+
+    def _apply_chars(self, text: str) -> str:
+        if self._table is None:
+            return text
+        if not text.isascii():
+            text = NON_ASCII_PATTERN.sub(self._translate_run, text)
+        data = text.encode('utf-8', 'surrogatepass').translate(self._byte_table)
+        if self._collapse:
+            while b'  ' in data:
+                data = data.replace(b'  ', b' ')
+        if self._strip_marker:
+            data = data.replace(b'\x00', b'')
+        return data.decode('utf-8', 'surrogatepass')
+
+    def _translate_run(self, match) -> str:
+        return match.group().translate(self._table)
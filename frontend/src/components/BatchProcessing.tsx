@@ -1,12 +1,16 @@
 import React, { useState } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
-import { Document } from '../types';
+import { BatchProcessResult, Document } from '../types';
 import { LoadingSpinner } from './LoadingSpinner';
 import { ErrorMessage } from './ErrorMessage';
 
 interface BatchProcessingProps {
   documents: Document[];
   onProcess: (documentIds: number[]) => Promise<void>;
+  onProcessStream?: (
+    documentIds: number[],
+    onResult: (result: BatchProcessResult) => void
+  ) => Promise<void>;
   onExport: (documentIds: number[], format: string) => Promise<void>;
   onDelete: (documentIds: number[]) => Promise<void>;
 }
@@ -14,6 +18,7 @@ interface BatchProcessingProps {
 export const BatchProcessing: React.FC<BatchProcessingProps> = ({
   documents,
   onProcess,
+  onProcessStream,
   onExport,
   onDelete,
 }) => {
@@ -23,6 +28,7 @@ export const BatchProcessing: React.FC<BatchProcessingProps> = ({
   const [isDeleting, setIsDeleting] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [exportFormat, setExportFormat] = useState('pdf');
+  const [results, setResults] = useState<Record<number, BatchProcessResult>>({});
 
   const handleSelectAll = () => {
     if (selectedDocuments.length === documents.length) {
@@ -48,9 +54,16 @@ export const BatchProcessing: React.FC<BatchProcessingProps> = ({
 
     setIsProcessing(true);
     setError(null);
+    setResults({});
 
     try {
-      await onProcess(selectedDocuments);
+      if (onProcessStream) {
+        await onProcessStream(selectedDocuments, (result) =>
+          setResults((prev) => ({ ...prev, [result.id]: result }))
+        );
+      } else {
+        await onProcess(selectedDocuments);
+      }
     } catch (err) {
       setError('Failed to process documents. Please try again.');
     } finally {
@@ -182,14 +195,32 @@ export const BatchProcessing: React.FC<BatchProcessingProps> = ({
                 </p>
               </div>
               <div className="text-sm text-gray-500">
-                {document.is_processed ? 'Processed' : 'Not Processed'}
+                {results[document.id] ? (
+                  results[document.id].status === 'success' ? (
+                    <span className="text-green-600">Processed</span>
+                  ) : (
+                    <span className="text-red-600">{results[document.id].message || 'Failed'}</span>
+                  )
+                ) : isProcessing && onProcessStream && selectedDocuments.includes(document.id) ? (
+                  'Processing...'
+                ) : document.is_processed ? (
+                  'Processed'
+                ) : (
+                  'Not Processed'
+                )}
               </div>
             </div>
           </motion.div>
         ))}
       </div>
 
-      {(isProcessing || isExporting || isDeleting) && (
+      {isProcessing && onProcessStream && (
+        <p className="text-sm text-gray-700">
+          {Object.keys(results).length} of {selectedDocuments.length} documents processed
+        </p>
+      )}
+
+      {((isProcessing && !onProcessStream) || isExporting || isDeleting) && (
         <div className="fixed inset-0 bg-gray-500 bg-opacity-75 flex items-center justify-center">
           <div className="bg-white rounded-lg p-6 text-center">
             <LoadingSpinner size="large" />
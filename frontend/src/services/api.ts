@@ -1,5 +1,5 @@
 import axios, { AxiosError, AxiosInstance } from 'axios';
-import { Document, DocumentCategory, ApiError } from '../types';
+import { Document, DocumentCategory, ApiError, BatchProcessResult } from '../types';
 
 const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api';
 
@@ -79,6 +79,40 @@ class ApiService {
     return response.data;
   }
 
+  // Streams one NDJSON line per document as soon as it is processed
+  async streamBatchProcessDocuments(
+    documentIds: number[],
+    onResult: (result: BatchProcessResult) => void
+  ) {
+    const response = await fetch(`${API_URL}/documents/batch_process/?stream=ndjson`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      credentials: 'include',
+      body: JSON.stringify({ document_ids: documentIds }),
+    });
+    if (!response.ok || !response.body) {
+      const apiError: ApiError = {
+        message: 'An error occurred',
+        code: response.status.toString(),
+      };
+      throw apiError;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      buffer += decoder.decode(value, { stream: !done });
+      const lines = buffer.split('\n');
+      buffer = done ? '' : lines.pop() || '';
+      lines.filter((line) => line.trim()).forEach((line) => onResult(JSON.parse(line)));
+      if (done) {
+        break;
+      }
+    }
+  }
+
   async batchExportDocuments(documentIds: number[], format: string = 'json') {
     const response = await this.api.post('/documents/batch_export/', {
       document_ids: documentIds,
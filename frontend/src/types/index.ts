@@ -37,6 +37,13 @@ export interface Document {
   }[];
 }
 
+export interface BatchProcessResult {
+  index: number;
+  id: number;
+  status: 'success' | 'error';
+  message?: string;
+}
+
 export interface ApiError {
   message: string;
   code?: string;